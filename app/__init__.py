@@ -1,11 +1,23 @@
 from flask import Flask
+from config.config import Config
 
 def create_app():
     app = Flask(__name__)
     
+    # Log estruturado assíncrono (fila + listener)
+    from app.services.structured_logging import configure_logging
+    configure_logging()
+    
     # Registrar blueprints (rotas)
     from app.routes import invenra_routes, game_routes
     app.register_blueprint(invenra_routes.bp)
     app.register_blueprint(game_routes.bp)
     
+    # Instrumentação por rota e endpoint /metrics
+    if Config.METRICS_ENABLED:
+        from app.routes import metrics_routes
+        from app.services import instrumentation
+        instrumentation.init_app(app)
+        app.register_blueprint(metrics_routes.bp)
+    
     return app
@@ -0,0 +1,296 @@
+"""
+Modo de execução ASGI (uvicorn asgi:app)
+
+No modo WSGI (gunicorn app:app) cada requisição ocupa um worker até
+terminar, então cada dashboard conectado em /game/events ou esperando em
+/game/poll prende um worker inteiro. Aqui essas conexões longas são
+corrotinas num event loop: esperam os eventos do ProgressEventBus sem
+ocupar uma thread, e um processo mantém milhares delas abertas.
+
+As demais rotas (comandos do jogo, endpoints da Inven!RA) continuam
+sendo as dos blueprints Flask, executadas num pool de threads limitado
+(ASGI_THREADS). São operações curtas sobre o repositório, que já é
+thread-safe; o pool só impede que uma gravação no SQLite bloqueie o
+event loop.
+"""
+
+import asyncio
+import io
+import json
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+from config.config import Config
+from app import create_app
+from app.services.progress_events import aiter_sse, format_poll_response, parse_cursor
+
+# Chunks de uma resposta em streaming à espera do envio ao cliente
+STREAM_QUEUE_CHUNKS = 16
+
+# Marcadores da fila entre a thread da requisição e o event loop
+_HEADERS = object()
+_END = object()
+
+
+def _header(scope, name):
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+async def _read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+async def _send_response(send, status, body, content_type="application/json", headers=()):
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", content_type.encode()), *headers]
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def _error(message):
+    return json.dumps({"success": False, "message": message})
+
+
+def build_environ(scope, body):
+    """Monta o environ WSGI (PEP 3333) de uma requisição HTTP ASGI"""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope["query_string"].decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False
+    }
+    for key, value in scope["headers"]:
+        name = key.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if name == "CONTENT_TYPE":
+            environ["CONTENT_TYPE"] = value
+        elif name != "CONTENT_LENGTH":
+            name = "HTTP_" + name
+            environ[name] = f"{environ[name]},{value}" if name in environ else value
+    return environ
+
+
+class AsgiApplication:
+    """
+    Aplicação ASGI: conexões longas nativas + blueprints Flask no pool
+
+    Args:
+        wsgi_app: Aplicação Flask (create_app())
+        event_bus (ProgressEventBus): Barramento usado por /game/events e /game/poll
+        max_threads (int): Threads para as rotas Flask
+    """
+
+    def __init__(self, wsgi_app, event_bus, max_threads=32):
+        self.wsgi_app = wsgi_app
+        self.event_bus = event_bus
+        self.max_threads = max_threads
+        self.executor = None
+        self.native_routes = {
+            "/game/events/": self.progress_event_stream,
+            "/game/poll/": self.progress_long_poll
+        }
+
+    def _executor(self):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(self.max_threads, thread_name_prefix="asgi-wsgi")
+        return self.executor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        if scope["method"] == "GET":
+            for prefix, handler in self.native_routes.items():
+                activity_id = scope["path"][len(prefix):]
+                if scope["path"].startswith(prefix) and activity_id and "/" not in activity_id:
+                    await handler(scope, receive, send, activity_id)
+                    return
+        await self.call_wsgi(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self.executor is not None:
+                    self.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    # ========== ROTAS FLASK (POOL DE THREADS) ==========
+
+    async def call_wsgi(self, scope, receive, send):
+        """
+        Executa a requisição na aplicação Flask, numa thread do pool
+
+        A mesma thread chama a aplicação, percorre o corpo e o fecha: um
+        corpo em streaming (?stream=true) pode usar recursos presos à
+        thread, como a conexão SQLite. Os chunks chegam ao event loop por
+        uma fila limitada; com a fila cheia (cliente lento) a thread
+        espera, sem acumular o corpo em memória.
+        """
+        environ = build_environ(scope, await _read_body(receive))
+        loop = asyncio.get_running_loop()
+        chunks = asyncio.Queue(maxsize=STREAM_QUEUE_CHUNKS)
+        stopped = threading.Event()
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response["status"] = int(status.split(" ", 1)[0])
+            response["headers"] = [
+                (name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers
+            ]
+
+        def put(item):
+            asyncio.run_coroutine_threadsafe(chunks.put(item), loop).result()
+
+        def run():
+            try:
+                iterable = self.wsgi_app(environ, start_response)
+                try:
+                    put(_HEADERS)
+                    if any(name == b"content-length" for name, _ in response["headers"]):
+                        # Resposta completa: lida de uma vez
+                        put(b"".join(iterable))
+                    else:
+                        for chunk in iterable:
+                            if stopped.is_set():
+                                break
+                            if chunk:
+                                put(chunk)
+                finally:
+                    if hasattr(iterable, "close"):
+                        iterable.close()
+            finally:
+                put(_END)
+
+        worker = loop.run_in_executor(self._executor(), run)
+        item = None
+        try:
+            item = await chunks.get()
+            if item is not _HEADERS:
+                # A aplicação falhou antes de responder
+                await worker
+                return
+            await send({
+                "type": "http.response.start",
+                "status": response["status"],
+                "headers": response["headers"]
+            })
+            while True:
+                item = await chunks.get()
+                if item is _END:
+                    break
+                await send({"type": "http.response.body", "body": item, "more_body": True})
+            # Uma falha no meio do corpo não pode parecer uma resposta completa
+            await worker
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            # Envio interrompido: a thread para no próximo chunk e fecha o corpo
+            stopped.set()
+            while item is not _END:
+                item = await chunks.get()
+
+    # ========== CONEXÕES LONGAS (EVENT LOOP) ==========
+
+    async def _subscribe(self, activity_id, after):
+        if self.event_bus.repository.blocking_io:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor(), self.event_bus.subscribe, activity_id, after
+            )
+        return self.event_bus.subscribe(activity_id, after)
+
+    async def progress_long_poll(self, scope, receive, send, activity_id):
+        """Mesmo contrato de GET /game/poll/<activity_id>"""
+        args = parse_qs(scope["query_string"].decode("latin-1"))
+        try:
+            after = parse_cursor(args.get("after", [None])[0] or _header(scope, b"last-event-id"))
+            timeout = min(float(args.get("timeout", [Config.LONG_POLL_TIMEOUT_SECONDS])[0]),
+                          Config.LONG_POLL_TIMEOUT_SECONDS)
+        except ValueError:
+            await _send_response(send, 400, _error("after and timeout must be numbers"))
+            return
+
+        with await self._subscribe(activity_id, after) as subscription:
+            events = await subscription.next_events_async(timeout=max(timeout, 0))
+            cursor = subscription.position
+        await _send_response(send, 200, format_poll_response(cursor, events))
+
+    async def progress_event_stream(self, scope, receive, send, activity_id):
+        """Mesmo contrato de GET /game/events/<activity_id>"""
+        args = parse_qs(scope["query_string"].decode("latin-1"))
+        try:
+            after = parse_cursor(args.get("after", [None])[0] or _header(scope, b"last-event-id"))
+        except ValueError:
+            await _send_response(send, 400, _error("after must be a non-negative integer"))
+            return
+
+        stream = aiter_sse(await self._subscribe(activity_id, after), Config.SSE_HEARTBEAT_SECONDS)
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream; charset=utf-8"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no")
+            ]
+        })
+
+        async def forward():
+            async for chunk in stream:
+                await send({"type": "http.response.body", "body": chunk.encode("utf-8"), "more_body": True})
+
+        async def wait_disconnect():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+
+        # Termina quando o cliente desconecta (ou o envio falha)
+        tasks = [asyncio.ensure_future(forward()), asyncio.ensure_future(wait_disconnect())]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await stream.aclose()
+
+
+def create_asgi_app():
+    """Cria a aplicação ASGI com os mesmos blueprints de create_app()"""
+    from app.routes import game_routes
+    return AsgiApplication(create_app(), game_routes.progress_events, max_threads=Config.ASGI_THREADS)
@@ -12,17 +12,31 @@ do jogo como objetos independentes, permitindo:
 from .base_command import Command
 from .game_commands import (
     SaveStudentProgressCommand,
+    BatchSaveProgressCommand,
     RetrieveAnalyticsCommand,
+    RetrieveClassStatisticsCommand,
     UpdateStudentScoreCommand,
-    ResetStudentProgressCommand
+    ResetStudentProgressCommand,
+    RecordReviewCommand
 )
 from .command_invoker import CommandInvoker
+from .command_queue import AsyncCommandQueue, CommandTicket, QueueFullError
+from .write_coalescer import ScoreUpdateCoalescer
+from .command_journal import CommandJournal
 
 __all__ = [
     'Command',
     'SaveStudentProgressCommand',
+    'BatchSaveProgressCommand',
     'RetrieveAnalyticsCommand',
+    'RetrieveClassStatisticsCommand',
     'UpdateStudentScoreCommand',
     'ResetStudentProgressCommand',
-    'CommandInvoker'
+    'RecordReviewCommand',
+    'CommandInvoker',
+    'AsyncCommandQueue',
+    'CommandTicket',
+    'QueueFullError',
+    'ScoreUpdateCoalescer',
+    'CommandJournal'
 ]
@@ -12,6 +12,9 @@ class Command(ABC):
     encapsulando uma ação específica e seus parâmetros.
     """
     
+    # Comandos de escrita registrados no journal (ver command_journal.py)
+    journaled = False
+    
     def __init__(self):
         self.executed_at = None
         self.result = None
@@ -36,6 +39,64 @@ class Command(ABC):
         """
         pass
     
+    def get_lock_keys(self):
+        """
+        Retorna as atividades cujas escritas este comando precisa serializar
+        
+        O invoker adquire o lock da faixa de cada chave, de modo que
+        comandos de turmas diferentes executam em paralelo (salvo quando
+        caem na mesma faixa). A implementação padrão trata o comando
+        como escrita e retorna o activity_id, se houver; comandos somente
+        leitura devem sobrescrevê-la e retornar uma tupla vazia.
+        
+        Returns:
+            tuple: IDs das atividades afetadas
+        """
+        activity_id = getattr(self, "activity_id", None)
+        return (activity_id,) if activity_id is not None else ()
+    
+    def get_ordering_key(self):
+        """
+        Retorna a chave que define a ordem de execução na fila assíncrona
+        
+        Comandos com a mesma chave são executados na ordem em que foram
+        enfileirados.
+        
+        Returns:
+            tuple ou None: (activity_id, student_id) ou None se não há ordem
+        """
+        activity_id = getattr(self, "activity_id", None)
+        student_id = getattr(self, "student_id", None)
+        if activity_id is None or student_id is None:
+            return None
+        return (activity_id, student_id)
+    
+    def to_record(self):
+        """
+        Retorna os parâmetros necessários para reconstruir o comando
+        
+        Usado pelo journal; o serviço de analytics não faz parte do registro
+        e é injetado novamente no replay.
+        
+        Returns:
+            dict: Argumentos nomeados do construtor
+        """
+        raise NotImplementedError(f"{self.__class__.__name__} não suporta journal")
+    
+    def changed_state(self, result):
+        """
+        Indica se a execução alterou o armazenamento
+        
+        O invoker só anexa ao journal comandos que alteraram o estado.
+        
+        Args:
+            result (dict): Retorno de execute()
+            
+        Returns:
+            bool: True se o comando deve ser registrado no journal
+        """
+        return bool(result.get('success'))
+    
     def mark_executed(self):
         """Marca o timestamp de execução"""
         self.executed_at = datetime.now()
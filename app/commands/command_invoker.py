@@ -4,9 +4,17 @@ Invoker do padrão Command
 Responsável por executar comandos e manter histórico de operações.
 """
 
-from typing import List
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack
+from itertools import islice
+from app.services.structured_logging import get_logger
 from .base_command import Command
 
+logger = get_logger("commands")
+
 
 class CommandInvoker:
     """
@@ -23,11 +31,40 @@ class CommandInvoker:
     - Permite logging automático de todas as operações
     - Facilita debugging e auditoria
     - Possibilita implementar filas de comandos
+    
+    Concorrência:
+    - O histórico é um buffer circular (deque com maxlen): inserir e
+      descartar a entrada mais antiga custam O(1)
+    - As atividades são distribuídas por um número fixo de locks (faixas),
+      então escritas em turmas de faixas diferentes não se serializam e a
+      memória não cresce com o número de turmas; comandos que tocam várias
+      turmas adquirem as faixas em ordem para evitar deadlock
+    
+    Durabilidade (opcional):
+    - Com um CommandJournal, cada comando de escrita bem-sucedido é
+      anexado ao journal, permitindo reconstruir o estado no reinício
+    
+    Instrumentação:
+    - Cada execução gera o evento de log "command_executed" (amostrado
+      no pipeline assíncrono; falhas e exceções sempre são registradas)
+    - Com um MetricsRegistry, registra a latência e o resultado de cada
+      comando, por classe (command_duration_seconds, commands_total)
     """
     
-    def __init__(self):
-        self.history: List[Command] = []
-        self.max_history_size = 100  # Limita o tamanho do histórico
+    ACTIVITY_LOCK_STRIPES = 64
+    
+    def __init__(self, max_history_size: int = 100, journal=None, metrics=None):
+        self.max_history_size = max_history_size  # Limita o tamanho do histórico
+        self.history: deque = deque(maxlen=max_history_size)
+        self._history_lock = threading.Lock()
+        self._activity_locks = [threading.Lock() for _ in range(self.ACTIVITY_LOCK_STRIPES)]
+        self.journal = journal
+        self.metrics = metrics
+    
+    def _locks_for(self, keys):
+        # Duas chaves podem cair na mesma faixa: cada faixa entra uma só vez
+        stripes = sorted({hash(key) % self.ACTIVITY_LOCK_STRIPES for key in keys})
+        return [self._activity_locks[stripe] for stripe in stripes]
     
     def execute_command(self, command: Command):
         """
@@ -39,14 +76,49 @@ class CommandInvoker:
         Returns:
             Resultado da execução do comando
         """
-        result = command.execute()
-        
-        # Adiciona ao histórico
-        self.history.append(command)
+        command_name = type(command).__name__
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            result = self._execute(command)
+            outcome = "success" if result.get('success') else "failure"
+            return result
+        except Exception:
+            logger.exception("command_failed", extra={"fields": {"command": command_name}})
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            if self.metrics is not None:
+                labels = (("command", command_name),)
+                self.metrics.observe("command_duration_seconds", elapsed, labels)
+                self.metrics.inc("commands_total", labels + (("outcome", outcome),))
+            if outcome != "error":
+                logger.log(
+                    logging.INFO if outcome == "success" else logging.WARNING,
+                    "command_executed",
+                    extra={"fields": {
+                        "command": command_name,
+                        "outcome": outcome,
+                        "duration_ms": round(elapsed * 1000, 3)
+                    }}
+                )
+    
+    def _execute(self, command: Command):
+        with ExitStack() as stack:
+            journaled = self.journal is not None and command.journaled
+            if journaled:
+                stack.enter_context(self.journal.recording())
+            for lock in self._locks_for(command.get_lock_keys()):
+                stack.enter_context(lock)
+            result = command.execute()
+            
+            # Registra apenas escritas que alteraram o estado
+            if journaled and command.changed_state(result):
+                self.journal.append(command)
         
-        # Mantém o histórico dentro do limite
-        if len(self.history) > self.max_history_size:
-            self.history.pop(0)
+        # Adiciona ao histórico (a entrada mais antiga sai automaticamente)
+        with self._history_lock:
+            self.history.append(command)
         
         return result
     
@@ -60,7 +132,13 @@ class CommandInvoker:
         Returns:
             list: Lista de entradas de log dos comandos
         """
-        history_to_return = self.history if limit is None else self.history[-limit:]
+        with self._history_lock:
+            if limit is None:
+                history_to_return = list(self.history)
+            else:
+                # Percorre apenas as últimas `limit` entradas
+                history_to_return = list(islice(reversed(self.history), max(limit, 0)))
+                history_to_return.reverse()
         return [cmd.get_log_entry() for cmd in history_to_return]
     
     def get_last_command(self):
@@ -70,12 +148,14 @@ class CommandInvoker:
         Returns:
             Command ou None: O último comando ou None se o histórico está vazio
         """
-        return self.history[-1] if self.history else None
+        with self._history_lock:
+            return self.history[-1] if self.history else None
     
     def clear_history(self):
         """Limpa o histórico de comandos"""
-        self.history.clear()
-        
+        with self._history_lock:
+            self.history.clear()
+    
     def replay_commands(self, start_index: int = 0, end_index: int = None):
         """
         Reexecuta comandos do histórico
@@ -86,12 +166,15 @@ class CommandInvoker:
         Returns:
             list: Resultados das re-execuções
         """
-        end = end_index if end_index is not None else len(self.history)
-        commands_to_replay = self.history[start_index:end]
+        with self._history_lock:
+            commands_to_replay = list(self.history)[start_index:end_index]
         
         results = []
         for cmd in commands_to_replay:
-            result = cmd.execute()
+            with ExitStack() as stack:
+                for lock in self._locks_for(cmd.get_lock_keys()):
+                    stack.enter_context(lock)
+                result = cmd.execute()
             results.append({
                 "command": cmd.get_description(),
                 "result": result
@@ -0,0 +1,340 @@
+"""
+Journal durável de comandos (append-only) com snapshots
+
+Cada comando de escrita executado pelo CommandInvoker é anexado a um
+arquivo JSONL com um número de sequência monotônico:
+
+    {"seq": 42, "ts": 1718000000.0, "type": "UpdateStudentScoreCommand", "params": {...}}
+
+Na inicialização, recover() carrega o snapshot mais recente e reexecuta
+apenas os registros do journal com seq maior que o do snapshot. A
+leitura do journal é feita linha a linha, sem carregar o arquivo todo.
+
+Durabilidade:
+- As escritas vão para o buffer do arquivo e um fsync é feito em grupo:
+  a cada fsync_batch registros ou a cada fsync_interval segundos, o que
+  vier primeiro. Um crash pode perder no máximo esse intervalo.
+- O snapshot é gravado num arquivo temporário e renomeado atomicamente;
+  depois dele o journal é truncado.
+
+O journal pressupõe um único processo escritor: use-o com um worker
+do gunicorn ou prefira o motor SQLite para vários workers.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from .game_commands import (
+    SaveStudentProgressCommand,
+    BatchSaveProgressCommand,
+    UpdateStudentScoreCommand,
+    ResetStudentProgressCommand
+)
+
+JOURNAL_FILENAME = "commands.jsonl"
+SNAPSHOT_FILENAME = "snapshot.json"
+
+# Registro dos comandos que podem ser reconstruídos a partir do journal
+COMMAND_TYPES = {
+    cls.__name__: cls for cls in (
+        SaveStudentProgressCommand,
+        BatchSaveProgressCommand,
+        UpdateStudentScoreCommand,
+        ResetStudentProgressCommand
+    )
+}
+
+
+class _SharedExclusiveLock:
+    """
+    Lock de leitura/escrita simples
+
+    Vários comandos podem executar e anexar ao journal ao mesmo tempo
+    (modo compartilhado); o snapshot precisa de acesso exclusivo para
+    que estado e número de sequência correspondam exatamente.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._shared = 0
+        self._exclusive = False
+
+    @contextmanager
+    def shared(self):
+        with self._cond:
+            while self._exclusive:
+                self._cond.wait()
+            self._shared += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._shared -= 1
+                if self._shared == 0:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def exclusive(self):
+        with self._cond:
+            while self._exclusive:
+                self._cond.wait()
+            self._exclusive = True
+            while self._shared:
+                self._cond.wait()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._exclusive = False
+                self._cond.notify_all()
+
+
+class CommandJournal:
+    """
+    Journal append-only dos comandos de escrita
+    """
+
+    def __init__(self, directory, analytics_service, fsync_interval=0.1,
+                 fsync_batch=256, snapshot_every=10000):
+        self.directory = directory
+        self.analytics_service = analytics_service
+        self.fsync_interval = fsync_interval
+        self.fsync_batch = fsync_batch
+        self.snapshot_every = snapshot_every
+
+        os.makedirs(directory, exist_ok=True)
+        self.journal_path = os.path.join(directory, JOURNAL_FILENAME)
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_FILENAME)
+
+        self.last_seq = 0
+        self._since_snapshot = 0
+        self._unsynced = 0
+        self._file = None
+        self._file_lock = threading.Lock()
+        self._state_lock = _SharedExclusiveLock()
+
+        self._syncer = None
+        self._stop = threading.Event()
+        self._snapshot_requested = threading.Event()
+
+    # ========== ESCRITA ==========
+
+    def open(self):
+        """Abre o journal para escrita e inicia a thread de fsync"""
+        if self._file is not None:
+            return
+        self._file = open(self.journal_path, "a", encoding="utf-8")
+        self._syncer = threading.Thread(target=self._sync_loop, name="journal-sync", daemon=True)
+        self._syncer.start()
+        atexit.register(self.close)
+
+    def close(self):
+        """Grava o que estiver pendente e fecha o arquivo"""
+        self._stop.set()
+        if self._syncer is not None:
+            self._syncer.join()
+            self._syncer = None
+        with self._file_lock:
+            if self._file is not None:
+                self._sync_locked()
+                self._file.close()
+                self._file = None
+
+    @contextmanager
+    def recording(self):
+        """
+        Envolve a execução de um comando e o seu append
+
+        Garante que nenhum snapshot é tirado entre a escrita no
+        armazenamento e o registro correspondente no journal.
+        """
+        with self._state_lock.shared():
+            yield
+
+    def append(self, command):
+        """
+        Anexa um comando executado com sucesso ao journal
+
+        Returns:
+            int: Número de sequência atribuído
+        """
+        with self._file_lock:
+            self.last_seq += 1
+            entry = {
+                "seq": self.last_seq,
+                "ts": time.time(),
+                "type": command.__class__.__name__,
+                "params": command.to_record()
+            }
+            self._file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            self._unsynced += 1
+            self._since_snapshot += 1
+
+            # Group commit: fsync imediato quando o lote enche
+            if self._unsynced >= self.fsync_batch:
+                self._sync_locked()
+
+            if self.snapshot_every and self._since_snapshot >= self.snapshot_every:
+                self._snapshot_requested.set()
+
+            return self.last_seq
+
+    def _sync_locked(self):
+        if self._unsynced == 0:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def _sync_loop(self):
+        while not self._stop.wait(self.fsync_interval):
+            with self._file_lock:
+                if self._file is not None:
+                    self._sync_locked()
+            if self._snapshot_requested.is_set():
+                self._snapshot_requested.clear()
+                self.snapshot()
+
+    # ========== SNAPSHOT ==========
+
+    def snapshot(self):
+        """
+        Grava o estado completo do repositório e trunca o journal
+
+        Returns:
+            int: Sequência incluída no snapshot
+        """
+        repository = self.analytics_service.repository
+
+        with self._state_lock.exclusive():
+            with self._file_lock:
+                seq = self.last_seq
+                if self._file is not None:
+                    self._sync_locked()
+
+            tmp_path = self.snapshot_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as snapshot_file:
+                snapshot_file.write('{"seq":%d,"activities":{' % seq)
+                # Uma atividade por vez, para não montar o estado inteiro em memória
+                for index, activity_id in enumerate(repository.list_activities()):
+                    if index:
+                        snapshot_file.write(",")
+                    snapshot_file.write(json.dumps(activity_id))
+                    snapshot_file.write(":")
+                    snapshot_file.write(json.dumps(repository.list_students(activity_id)))
+                snapshot_file.write("}}")
+                snapshot_file.flush()
+                os.fsync(snapshot_file.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+
+            # Tudo até `seq` está no snapshot: o journal pode recomeçar vazio
+            with self._file_lock:
+                if self._file is not None:
+                    self._file.truncate(0)
+                    self._file.seek(0)
+                else:
+                    open(self.journal_path, "w").close()
+                self._since_snapshot = 0
+
+        return seq
+
+    # ========== RECUPERAÇÃO ==========
+
+    def iter_records(self, after_seq=0):
+        """
+        Percorre o journal em streaming
+
+        Uma última linha incompleta (crash durante a escrita) é ignorada.
+
+        Yields:
+            dict: Registros com seq > after_seq
+        """
+        for entry, _ in self._iter_complete(after_seq):
+            yield entry
+
+    def _iter_complete(self, after_seq=0):
+        # (registro, offset do fim da linha) de cada linha completa
+        if not os.path.exists(self.journal_path):
+            return
+
+        offset = 0
+        with open(self.journal_path, "rb") as journal_file:
+            for line in journal_file:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                offset += len(line)
+                if entry["seq"] > after_seq:
+                    yield entry, offset
+
+    def restore_command(self, entry):
+        """Reconstrói o comando de um registro do journal"""
+        command_cls = COMMAND_TYPES[entry["type"]]
+        return command_cls(self.analytics_service, **entry["params"])
+
+    def recover(self):
+        """
+        Reconstrói o estado: snapshot mais recente + cauda do journal
+
+        Deve ser chamado antes de open() e antes de atender requisições.
+        Uma cauda incompleta deixada por um crash é removida do arquivo,
+        para que os próximos registros não sejam anexados a ela.
+
+        Num motor durável (SQLite) cada comando já foi gravado no banco
+        antes de entrar no journal: nada é reexecutado (os incrementos
+        seriam aplicados duas vezes) e o snapshot não é carregado (é mais
+        antigo que o banco). Só a numeração é retomada.
+
+        Returns:
+            int: Número de comandos reexecutados
+        """
+        repository = self.analytics_service.repository
+        replay = not repository.durable
+        snapshot = None
+        snapshot_seq = 0
+
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r", encoding="utf-8") as snapshot_file:
+                snapshot = json.load(snapshot_file)
+            snapshot_seq = snapshot["seq"]
+
+        if replay and snapshot is not None:
+            with repository.transaction():
+                for activity_id in repository.list_activities():
+                    repository.delete_activity(activity_id)
+                for activity_id, records in snapshot["activities"].items():
+                    for record in records:
+                        repository.save_student(
+                            activity_id,
+                            record["student_id"],
+                            record["time"],
+                            record["words"],
+                            record["note"]
+                        )
+
+        self.last_seq = snapshot_seq
+        replayed = 0
+        complete = 0
+        for entry, complete in self._iter_complete():
+            if entry["seq"] <= snapshot_seq:
+                continue
+            if replay:
+                self.restore_command(entry).execute()
+                replayed += 1
+            self.last_seq = entry["seq"]
+
+        if os.path.exists(self.journal_path) and os.path.getsize(self.journal_path) > complete:
+            with open(self.journal_path, "r+b") as journal_file:
+                journal_file.truncate(complete)
+                journal_file.flush()
+                os.fsync(journal_file.fileno())
+
+        self._since_snapshot = replayed
+        return replayed
@@ -0,0 +1,177 @@
+"""
+Fila assíncrona de comandos
+
+Implementa o "enfileiramento de operações" do padrão Command: o
+chamador recebe imediatamente um ticket e um pool de threads executa
+os comandos através do CommandInvoker em segundo plano.
+
+Garantias:
+- Ordem por estudante: comandos com a mesma chave de ordenação
+  (activity_id, student_id) vão sempre para o mesmo worker, que os
+  executa em ordem FIFO. Comandos sem chave (ex.: lotes com vários
+  alunos) são distribuídos em rodízio e não têm ordem garantida em
+  relação aos demais
+- Backpressure: cada worker tem uma fila limitada; quando ela enche,
+  submit() levanta QueueFullError em vez de acumular memória
+"""
+
+import itertools
+import queue
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+
+class QueueFullError(Exception):
+    """A fila atingiu o limite de comandos pendentes"""
+    pass
+
+
+class CommandTicket:
+    """
+    Acompanha o estado de um comando enfileirado
+
+    Estados: queued -> running -> done | failed
+    """
+
+    __slots__ = ("ticket_id", "description", "status", "result", "error",
+                 "created_at", "finished_at")
+
+    def __init__(self, ticket_id, description):
+        self.ticket_id = ticket_id
+        self.description = description
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.created_at = datetime.now()
+        self.finished_at = None
+
+    def is_finished(self):
+        return self.status in ("done", "failed")
+
+    def to_dict(self):
+        return {
+            "ticket_id": self.ticket_id,
+            "description": self.description,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+class AsyncCommandQueue:
+    """
+    Executa comandos em segundo plano através de um pool de workers
+
+    As threads são criadas apenas no primeiro submit(), o que evita
+    criá-las no processo mestre do gunicorn antes do fork dos workers.
+    """
+
+    def __init__(self, invoker, num_workers=4, max_pending=10000, max_tickets=10000):
+        self.invoker = invoker
+        self.num_workers = max(1, num_workers)
+        self.max_tickets = max_tickets
+
+        per_worker = max(1, max_pending // self.num_workers)
+        self._queues = [queue.Queue(maxsize=per_worker) for _ in range(self.num_workers)]
+        self._workers = []
+        self._started = False
+        self._start_lock = threading.Lock()
+        # Distribui comandos sem chave de ordenação entre os workers
+        self._round_robin = itertools.count()
+
+        self._tickets = OrderedDict()
+        self._tickets_lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._started:
+            return
+        with self._start_lock:
+            if self._started:
+                return
+            for index, work_queue in enumerate(self._queues):
+                worker = threading.Thread(
+                    target=self._worker_loop,
+                    args=(work_queue,),
+                    name=f"command-worker-{index}",
+                    daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+            self._started = True
+
+    def _queue_for(self, command):
+        key = command.get_ordering_key()
+        if key is None:
+            index = next(self._round_robin) % self.num_workers
+        else:
+            index = hash(key) % self.num_workers
+        return self._queues[index]
+
+    def _remember(self, ticket):
+        with self._tickets_lock:
+            self._tickets[ticket.ticket_id] = ticket
+            # Descarta os tickets mais antigos já finalizados
+            while len(self._tickets) > self.max_tickets:
+                oldest_id, oldest = next(iter(self._tickets.items()))
+                if not oldest.is_finished():
+                    break
+                del self._tickets[oldest_id]
+
+    def submit(self, command):
+        """
+        Enfileira um comando para execução assíncrona
+
+        Args:
+            command (Command): Comando a executar
+
+        Returns:
+            CommandTicket: Ticket para consultar o resultado
+
+        Raises:
+            QueueFullError: Se a fila do worker responsável está cheia
+        """
+        self._ensure_started()
+
+        ticket = CommandTicket(uuid.uuid4().hex, command.get_description())
+        # Registra antes de enfileirar para o ticket já poder ser consultado
+        self._remember(ticket)
+        try:
+            self._queue_for(command).put_nowait((ticket, command))
+        except queue.Full:
+            with self._tickets_lock:
+                self._tickets.pop(ticket.ticket_id, None)
+            raise QueueFullError("Command queue is full, retry later")
+
+        return ticket
+
+    def get_ticket(self, ticket_id):
+        """Retorna o ticket ou None se ele não existe (ou já foi descartado)"""
+        with self._tickets_lock:
+            return self._tickets.get(ticket_id)
+
+    def pending_count(self):
+        """Número de comandos aguardando execução"""
+        return sum(work_queue.qsize() for work_queue in self._queues)
+
+    def wait_until_idle(self):
+        """Bloqueia até todos os comandos enfileirados serem executados"""
+        for work_queue in self._queues:
+            work_queue.join()
+
+    def _worker_loop(self, work_queue):
+        while True:
+            ticket, command = work_queue.get()
+            ticket.status = "running"
+            try:
+                ticket.result = self.invoker.execute_command(command)
+                ticket.status = "done"
+            except Exception as exc:
+                ticket.error = str(exc)
+                ticket.status = "failed"
+            finally:
+                ticket.finished_at = datetime.now()
+                work_queue.task_done()
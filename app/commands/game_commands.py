@@ -6,6 +6,7 @@ incluindo todos os parâmetros necessários para sua execução.
 """
 
 from .base_command import Command
+from app.repositories import StudentQuery
 from app.services.analytics_service import AnalyticsService
 
 
@@ -16,6 +17,8 @@ class SaveStudentProgressCommand(Command):
     Encapsula a operação de persistir dados de uma sessão de jogo.
     """
     
+    journaled = True
+    
     def __init__(self, analytics_service: AnalyticsService, activity_id: str, 
                  student_id: str, time_played: int, words_learned: int, feedback: str):
         super().__init__()
@@ -30,69 +33,239 @@ class SaveStudentProgressCommand(Command):
         """Executa o salvamento do progresso"""
         self.mark_executed()
         
-        # Verifica se a turma existe no banco simulado
-        if self.activity_id not in self.analytics_service.fake_database:
-            self.analytics_service.fake_database[self.activity_id] = []
-        
-        # Adiciona ou atualiza o registro do estudante
-        students = self.analytics_service.fake_database[self.activity_id]
-        
-        # Procura se o estudante já existe
-        student_found = False
-        for student in students:
-            if student["student_id"] == self.student_id:
-                # Atualiza dados existentes
-                student["time"] = self.time_played
-                student["words"] = self.words_learned
-                student["note"] = self.feedback
-                student_found = True
-                break
-        
-        # Se não existe, cria novo registro
-        if not student_found:
-            students.append({
-                "student_id": self.student_id,
-                "time": self.time_played,
-                "words": self.words_learned,
-                "note": self.feedback
-            })
+        # Mesma validação dos registros do lote: um corpo malformado não
+        # pode chegar aos motores de armazenamento
+        error = BatchSaveProgressCommand.validate_record(self.to_record())
+        if error is not None:
+            return {"success": False, "message": error}
+        
+        # Cria ou atualiza o registro do estudante (busca O(1) pelo índice)
+        self.analytics_service.repository.save_student(
+            self.activity_id,
+            self.student_id,
+            self.time_played,
+            self.words_learned,
+            self.feedback
+        )
         
         self.result = f"Progress saved for {self.student_id}"
         return {"success": True, "message": self.result}
     
+    def to_record(self):
+        return {
+            "activity_id": self.activity_id,
+            "student_id": self.student_id,
+            "time_played": self.time_played,
+            "words_learned": self.words_learned,
+            "feedback": self.feedback
+        }
+    
     def get_description(self):
         return f"Save progress for student {self.student_id} in activity {self.activity_id}"
 
 
+class BatchSaveProgressCommand(Command):
+    """
+    Comando para salvar o progresso de vários estudantes de uma só vez
+    
+    Os registros podem pertencer a atividades diferentes. Todos os
+    registros válidos são gravados numa única transação do repositório
+    (um único lock/commit), e o resultado é informado item a item.
+    """
+    
+    REQUIRED_FIELDS = ("activity_id", "student_id")
+    NUMERIC_FIELDS = ("time_played", "words_learned")
+    
+    journaled = True
+    
+    def __init__(self, analytics_service: AnalyticsService, records: list):
+        super().__init__()
+        self.analytics_service = analytics_service
+        self.records = records
+    
+    @classmethod
+    def validate_record(cls, record):
+        """
+        Valida um registro de progresso do lote
+        
+        Returns:
+            str ou None: Mensagem de erro ou None se o registro é válido
+        """
+        if not isinstance(record, dict):
+            return "Record must be an object"
+        
+        for field in cls.REQUIRED_FIELDS:
+            value = record.get(field)
+            if not value or not isinstance(value, str):
+                return f"{field} must be a non-empty string"
+        
+        for field in cls.NUMERIC_FIELDS:
+            value = record.get(field, 0)
+            if not isinstance(value, int) or isinstance(value, bool):
+                return f"{field} must be an integer"
+        
+        if not isinstance(record.get("feedback", ""), str):
+            return "feedback must be a string"
+        
+        return None
+    
+    def get_lock_keys(self):
+        activity_ids = {
+            record.get("activity_id") for record in self.records if isinstance(record, dict)
+        }
+        return tuple(sorted(a for a in activity_ids if isinstance(a, str)))
+    
+    def execute(self):
+        """Executa o salvamento em lote"""
+        self.mark_executed()
+        
+        repository = self.analytics_service.repository
+        results = []
+        saved = 0
+        
+        with repository.transaction():
+            for index, record in enumerate(self.records):
+                error = self.validate_record(record)
+                
+                if error is not None:
+                    results.append({"index": index, "success": False, "message": error})
+                    continue
+                
+                repository.save_student(
+                    record["activity_id"],
+                    record["student_id"],
+                    record.get("time_played", 0),
+                    record.get("words_learned", 0),
+                    record.get("feedback", "")
+                )
+                saved += 1
+                results.append({
+                    "index": index,
+                    "success": True,
+                    "activity_id": record["activity_id"],
+                    "student_id": record["student_id"]
+                })
+        
+        failed = len(self.records) - saved
+        self.result = f"Batch saved {saved} records ({failed} failed)"
+        return {
+            "success": failed == 0,
+            "message": self.result,
+            "saved": saved,
+            "failed": failed,
+            "results": results
+        }
+    
+    def to_record(self):
+        return {"records": self.records}
+    
+    def changed_state(self, result):
+        # Um lote parcialmente rejeitado ainda gravou os registros válidos;
+        # no replay a validação rejeita de novo os mesmos registros
+        return result.get('saved', 0) > 0
+    
+    def get_description(self):
+        return f"Batch save progress for {len(self.records)} records"
+
+
 class RetrieveAnalyticsCommand(Command):
     """
     Comando para recuperar analytics de uma atividade
     
-    Encapsula a operação de busca de dados analíticos.
+    Encapsula a operação de busca de dados analíticos. Com uma
+    StudentQuery retorna apenas uma página (filtrada/ordenada) e o
+    cursor da próxima; com since, apenas as mudanças depois do cursor.
     """
     
-    def __init__(self, analytics_service: AnalyticsService, activity_id: str):
+    def __init__(self, analytics_service: AnalyticsService, activity_id: str,
+                 query=None, fields=None, since=None):
         super().__init__()
         self.analytics_service = analytics_service
         self.activity_id = activity_id
+        self.query = query
+        self.fields = fields
+        self.since = since
+    
+    def get_lock_keys(self):
+        # Leitura: o repositório já é thread-safe, não precisa serializar
+        return ()
     
     def execute(self):
         """Executa a recuperação dos analytics"""
         self.mark_executed()
         
-        analytics_data = self.analytics_service.get_analytics_for_activity(self.activity_id)
+        if self.since is not None:
+            changes = self.analytics_service.get_changes_for_activity(self.activity_id, self.since)
+            self.result = f"Retrieved {len(changes['data'])} changed student records"
+            
+            return {
+                "success": True,
+                "count": len(changes["data"]),
+                **changes
+            }
+        
+        if self.query is None and self.fields is None:
+            analytics_data = self.analytics_service.get_analytics_for_activity(self.activity_id)
+            self.result = f"Retrieved {len(analytics_data)} student records"
+            
+            return {
+                "success": True,
+                "data": analytics_data,
+                "count": len(analytics_data)
+            }
+        
+        analytics_data, next_cursor = self.analytics_service.query_analytics_for_activity(
+            self.activity_id, self.query or StudentQuery(), self.fields
+        )
         self.result = f"Retrieved {len(analytics_data)} student records"
         
         return {
             "success": True,
             "data": analytics_data,
-            "count": len(analytics_data)
+            "count": len(analytics_data),
+            "next_cursor": next_cursor
         }
     
     def get_description(self):
         return f"Retrieve analytics for activity {self.activity_id}"
 
 
+class RetrieveClassStatisticsCommand(Command):
+    """
+    Comando para recuperar as estatísticas agregadas de uma turma
+    
+    Encapsula a consulta vetorizada usada pelos dashboards da turma.
+    """
+    
+    def __init__(self, analytics_service: AnalyticsService, activity_id: str, top: int = 10, bins: int = 10):
+        super().__init__()
+        self.analytics_service = analytics_service
+        self.activity_id = activity_id
+        self.top = top
+        self.bins = bins
+    
+    def get_lock_keys(self):
+        # Leitura: o repositório já é thread-safe, não precisa serializar
+        return ()
+    
+    def execute(self):
+        """Executa o cálculo das estatísticas"""
+        self.mark_executed()
+        
+        statistics = self.analytics_service.get_class_statistics(
+            self.activity_id, top=self.top, bins=self.bins
+        )
+        self.result = f"Computed statistics for {statistics['count']} students"
+        
+        return {
+            "success": True,
+            "data": statistics
+        }
+    
+    def get_description(self):
+        return f"Retrieve class statistics for activity {self.activity_id}"
+
+
 class UpdateStudentScoreCommand(Command):
     """
     Comando para atualizar apenas a pontuação de um estudante
@@ -100,6 +273,8 @@ class UpdateStudentScoreCommand(Command):
     Útil para atualizações incrementais durante o jogo.
     """
     
+    journaled = True
+    
     def __init__(self, analytics_service: AnalyticsService, activity_id: str, 
                  student_id: str, additional_words: int, additional_time: int):
         super().__init__()
@@ -109,32 +284,59 @@ class UpdateStudentScoreCommand(Command):
         self.additional_words = additional_words
         self.additional_time = additional_time
     
+    @staticmethod
+    def validate_deltas(additional_words, additional_time):
+        """
+        Valida os incrementos de palavras e de tempo
+        
+        Returns:
+            str ou None: Mensagem de erro ou None se ambos são inteiros
+        """
+        for field, value in (("additional_words", additional_words), ("additional_time", additional_time)):
+            if not isinstance(value, int) or isinstance(value, bool):
+                return f"{field} must be an integer"
+        return None
+    
     def execute(self):
         """Executa a atualização incremental"""
         self.mark_executed()
         
-        if self.activity_id not in self.analytics_service.fake_database:
+        # Também chega aqui pelo journal, pela fila assíncrona e pelo
+        # coalescer: um delta malformado não pode chegar ao repositório
+        error = self.validate_deltas(self.additional_words, self.additional_time)
+        if error is not None:
+            return {"success": False, "message": error}
+        
+        repository = self.analytics_service.repository
+        
+        if not repository.has_activity(self.activity_id):
             return {"success": False, "message": "Activity not found"}
         
-        students = self.analytics_service.fake_database[self.activity_id]
+        # Atualiza incrementalmente
+        student = repository.increment_student(
+            self.activity_id, self.student_id, self.additional_time, self.additional_words
+        )
         
-        for student in students:
-            if student["student_id"] == self.student_id:
-                # Atualiza incrementalmente
-                student["time"] += self.additional_time
-                student["words"] += self.additional_words
-                
-                self.result = f"Updated score for {self.student_id}"
-                return {
-                    "success": True,
-                    "message": self.result,
-                    "new_totals": {
-                        "time": student["time"],
-                        "words": student["words"]
-                    }
-                }
+        if student is None:
+            return {"success": False, "message": "Student not found"}
         
-        return {"success": False, "message": "Student not found"}
+        self.result = f"Updated score for {self.student_id}"
+        return {
+            "success": True,
+            "message": self.result,
+            "new_totals": {
+                "time": student["time"],
+                "words": student["words"]
+            }
+        }
+    
+    def to_record(self):
+        return {
+            "activity_id": self.activity_id,
+            "student_id": self.student_id,
+            "additional_words": self.additional_words,
+            "additional_time": self.additional_time
+        }
     
     def get_description(self):
         return f"Update score for {self.student_id}: +{self.additional_words} words, +{self.additional_time}s"
@@ -147,6 +349,8 @@ class ResetStudentProgressCommand(Command):
     Útil para permitir que estudantes reiniciem o jogo.
     """
     
+    journaled = True
+    
     def __init__(self, analytics_service: AnalyticsService, activity_id: str, student_id: str):
         super().__init__()
         self.analytics_service = analytics_service
@@ -158,23 +362,20 @@ class ResetStudentProgressCommand(Command):
         """Executa o reset do progresso"""
         self.mark_executed()
         
-        if self.activity_id not in self.analytics_service.fake_database:
+        repository = self.analytics_service.repository
+        
+        if not repository.has_activity(self.activity_id):
             return {"success": False, "message": "Activity not found"}
         
-        students = self.analytics_service.fake_database[self.activity_id]
+        # Remove o estudante e guarda backup para possível undo
+        removed = repository.remove_student(self.activity_id, self.student_id)
         
-        for i, student in enumerate(students):
-            if student["student_id"] == self.student_id:
-                # Guarda backup para possível undo
-                self.backup = student.copy()
-                
-                # Remove o estudante
-                students.pop(i)
-                
-                self.result = f"Reset progress for {self.student_id}"
-                return {"success": True, "message": self.result}
+        if removed is None:
+            return {"success": False, "message": "Student not found"}
         
-        return {"success": False, "message": "Student not found"}
+        self.backup = removed.copy()
+        self.result = f"Reset progress for {self.student_id}"
+        return {"success": True, "message": self.result}
     
     def undo(self):
         """
@@ -186,11 +387,56 @@ class ResetStudentProgressCommand(Command):
         if self.backup is None:
             return {"success": False, "message": "No backup available"}
         
-        if self.activity_id in self.analytics_service.fake_database:
-            self.analytics_service.fake_database[self.activity_id].append(self.backup)
+        if self.analytics_service.repository.restore_student(self.activity_id, self.backup):
             return {"success": True, "message": "Progress restored"}
         
         return {"success": False, "message": "Activity not found"}
     
+    def to_record(self):
+        return {"activity_id": self.activity_id, "student_id": self.student_id}
+    
     def get_description(self):
         return f"Reset progress for student {self.student_id}"
+
+
+class RecordReviewCommand(Command):
+    """
+    Comando para registrar a resposta de um aluno a uma carta do deck
+    
+    Atualiza o agendamento SM-2 da palavra (ver ReviewScheduler). O
+    estado do agendador vive só em memória e não entra nos snapshots do
+    journal, por isso o comando não é registrado nele.
+    """
+    
+    def __init__(self, scheduler, activity_id: str, student_id: str, word: str,
+                 quality: int, reviewed_at: float = None):
+        super().__init__()
+        self.scheduler = scheduler
+        self.activity_id = activity_id
+        self.student_id = student_id
+        self.word = word
+        self.quality = quality
+        self.reviewed_at = reviewed_at
+    
+    def execute(self):
+        """Registra a revisão e retorna o novo estado da carta"""
+        self.mark_executed()
+        
+        if not self.activity_id or not self.student_id or not self.word:
+            return {"success": False, "message": "activity_id, student_id and word are required"}
+        
+        if isinstance(self.quality, bool) or not isinstance(self.quality, int) or not 0 <= self.quality <= 5:
+            return {"success": False, "message": "quality must be an integer between 0 and 5"}
+        
+        card = self.scheduler.review(
+            self.activity_id, self.student_id, self.word, self.quality, now=self.reviewed_at
+        )
+        
+        if card is None:
+            return {"success": False, "message": "Word not found in deck"}
+        
+        self.result = f"Reviewed {self.word} for {self.student_id}"
+        return {"success": True, "message": self.result, "card": card}
+    
+    def get_description(self):
+        return f"Review {self.word} for {self.student_id}: quality {self.quality}"
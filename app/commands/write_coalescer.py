@@ -0,0 +1,200 @@
+"""
+Agregação (coalescing) de atualizações incrementais de pontuação
+
+Durante o jogo o cliente envia muitos /game/update-score pequenos para
+o mesmo aluno. Em vez de gravar cada um, os deltas pendentes de cada
+(activity_id, student_id) são somados em memória e aplicados ao
+armazenamento como um único UpdateStudentScoreCommand quando:
+- o número de atualizações acumuladas atinge max_pending_updates, ou
+- a atualização mais antiga pendente passa de window_seconds
+
+Cada chamada continua recebendo os totais corretos (valor gravado +
+deltas pendentes). Leituras diretas do armazenamento podem ficar até
+window_seconds atrasadas; use flush_activity() antes de uma leitura
+que precise enxergar tudo.
+"""
+
+import atexit
+import threading
+import time
+
+from .command_invoker import CommandInvoker
+from .game_commands import UpdateStudentScoreCommand
+
+
+class PendingScore:
+    """Deltas acumulados de um aluno e os totais já gravados"""
+
+    __slots__ = ("base_time", "base_words", "pending_time", "pending_words", "count", "first_at")
+
+    def __init__(self, base_time, base_words):
+        self.base_time = base_time
+        self.base_words = base_words
+        self.pending_time = 0
+        self.pending_words = 0
+        self.count = 0
+        self.first_at = time.monotonic()
+
+
+class ScoreUpdateCoalescer:
+    """
+    Agrega atualizações de pontuação e as grava em lote
+
+    Locks:
+    - _lock protege o dicionário de pendências (seções curtas, sem I/O)
+    - um lock por chave (distribuído em faixas) é mantido durante a
+      leitura inicial do aluno e durante o flush, garantindo que uma nova
+      pendência nunca lê o armazenamento com um flush da mesma chave em
+      andamento
+    """
+
+    KEY_LOCK_STRIPES = 64
+
+    def __init__(self, analytics_service, invoker: CommandInvoker,
+                 window_seconds=0.5, max_pending_updates=20):
+        self.analytics_service = analytics_service
+        self.invoker = invoker
+        self.window_seconds = window_seconds
+        self.max_pending_updates = max_pending_updates
+
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._key_locks = [threading.Lock() for _ in range(self.KEY_LOCK_STRIPES)]
+
+        self._flusher = None
+        self._flusher_lock = threading.Lock()
+        self._stop = threading.Event()
+
+        # Estatísticas: atualizações recebidas x escritas realizadas
+        self.updates_received = 0
+        self.writes_applied = 0
+
+    def _key_lock(self, key):
+        return self._key_locks[hash(key) % self.KEY_LOCK_STRIPES]
+
+    def _ensure_flusher(self):
+        if self._flusher is not None:
+            return
+        with self._flusher_lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(
+                target=self._flush_loop, name="score-coalescer", daemon=True
+            )
+            self._flusher.start()
+            # Não perde deltas pendentes num encerramento normal do processo
+            atexit.register(self.flush_all)
+
+    def submit(self, activity_id, student_id, additional_words, additional_time):
+        """
+        Registra uma atualização incremental
+
+        Returns:
+            dict: Mesmo formato do UpdateStudentScoreCommand, com os
+                  totais correntes (gravado + pendente)
+        """
+        # Valida antes de tocar em _pending: um delta rejeitado não pode
+        # ficar pendente e ser gravado no próximo flush
+        error = UpdateStudentScoreCommand.validate_deltas(additional_words, additional_time)
+        if error is not None:
+            return {"success": False, "message": error}
+        
+        self._ensure_flusher()
+        key = (activity_id, student_id)
+
+        with self._key_lock(key):
+            with self._lock:
+                entry = self._pending.get(key)
+
+            if entry is None:
+                repository = self.analytics_service.repository
+                record = repository.get_student(activity_id, student_id)
+                if record is None:
+                    if not repository.has_activity(activity_id):
+                        return {"success": False, "message": "Activity not found"}
+                    return {"success": False, "message": "Student not found"}
+                entry = PendingScore(record["time"], record["words"])
+
+            with self._lock:
+                self._pending[key] = entry
+                entry.pending_time += additional_time
+                entry.pending_words += additional_words
+                entry.count += 1
+                self.updates_received += 1
+                totals = {
+                    "time": entry.base_time + entry.pending_time,
+                    "words": entry.base_words + entry.pending_words
+                }
+                should_flush = entry.count >= self.max_pending_updates
+
+            if should_flush:
+                self._flush_key_locked(key)
+
+        return {
+            "success": True,
+            "message": f"Updated score for {student_id}",
+            "new_totals": totals,
+            "coalesced": True
+        }
+
+    def _flush_key_locked(self, key):
+        # Deve ser chamado com o lock da chave adquirido
+        with self._lock:
+            entry = self._pending.pop(key, None)
+        if entry is None or entry.count == 0:
+            return None
+
+        command = UpdateStudentScoreCommand(
+            analytics_service=self.analytics_service,
+            activity_id=key[0],
+            student_id=key[1],
+            additional_words=entry.pending_words,
+            additional_time=entry.pending_time
+        )
+        result = self.invoker.execute_command(command)
+        with self._lock:
+            self.writes_applied += 1
+        return result
+
+    def flush_key(self, activity_id, student_id):
+        """Grava imediatamente os deltas pendentes de um aluno"""
+        key = (activity_id, student_id)
+        with self._key_lock(key):
+            return self._flush_key_locked(key)
+
+    def flush_activity(self, activity_id):
+        """Grava imediatamente os deltas pendentes de todos os alunos da atividade"""
+        with self._lock:
+            keys = [key for key in self._pending if key[0] == activity_id]
+        for key in keys:
+            self.flush_key(*key)
+
+    def flush_all(self):
+        """Grava todos os deltas pendentes"""
+        with self._lock:
+            keys = list(self._pending)
+        for key in keys:
+            self.flush_key(*key)
+
+    def has_pending(self):
+        with self._lock:
+            return bool(self._pending)
+
+    def pending_count(self):
+        """Número de alunos com deltas ainda não gravados"""
+        with self._lock:
+            return len(self._pending)
+
+    def stop(self):
+        """Encerra a thread de flush e grava o que estiver pendente"""
+        self._stop.set()
+        self.flush_all()
+
+    def _flush_loop(self):
+        interval = max(self.window_seconds / 2, 0.01)
+        while not self._stop.wait(interval):
+            deadline = time.monotonic() - self.window_seconds
+            with self._lock:
+                expired = [key for key, entry in self._pending.items() if entry.first_at <= deadline]
+            for key in expired:
+                self.flush_key(*key)
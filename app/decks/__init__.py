@@ -0,0 +1,30 @@
+"""
+Módulo de decks - Listas de palavras compiladas num formato binário
+mapeado em memória (mmap)
+"""
+from .deck_format import CompiledDeck, DeckFormatError, DECK_SUFFIX
+from .deck_compiler import build_deck, compile_deck, load_source
+from .deck_store import DeckStore
+from .distractors import DISTRACTORS_PER_WORD, build_distractor_index, build_round
+from .answer_matching import AnswerIndex, check_answer, grade_answer, normalize_answer
+from .deck_cache import CachedDeck, DeckCache, get_shared_deck_cache
+
+__all__ = [
+    'CompiledDeck',
+    'DeckFormatError',
+    'DECK_SUFFIX',
+    'build_deck',
+    'compile_deck',
+    'load_source',
+    'DeckStore',
+    'DISTRACTORS_PER_WORD',
+    'build_distractor_index',
+    'build_round',
+    'AnswerIndex',
+    'check_answer',
+    'grade_answer',
+    'normalize_answer',
+    'CachedDeck',
+    'DeckCache',
+    'get_shared_deck_cache'
+]
@@ -0,0 +1,44 @@
+"""
+Compilação de decks pela linha de comando
+
+Uso:
+    python -m app.decks                    compila as fontes novas de DECK_DIR
+    python -m app.decks --force            recompila todas
+    python -m app.decks FONTE [-o SAIDA]   compila uma fonte CSV/JSON
+"""
+import argparse
+import sys
+
+from config.config import Config
+from .deck_compiler import compile_deck
+from .deck_format import DeckFormatError
+from .deck_store import DeckStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("source", nargs="?", help="fonte CSV/JSON (padrão: todas as de --deck-dir)")
+    parser.add_argument("-o", "--output", help="arquivo .wmdeck de saída")
+    parser.add_argument("--deck-id")
+    parser.add_argument("--deck-dir", default=Config.DECK_DIR)
+    parser.add_argument("--force", action="store_true", help="recompila mesmo sem alterações")
+    args = parser.parse_args()
+
+    try:
+        if args.source:
+            results = [compile_deck(args.source, args.output, deck_id=args.deck_id)]
+        else:
+            results = DeckStore(args.deck_dir).compile_all(force=args.force)
+    except DeckFormatError as exc:
+        print(f"Erro: {exc}", file=sys.stderr)
+        sys.exit(1)
+
+    for result in results:
+        print(f"{result['deck_id']}: {result['entries']} palavras, {result['bytes']:,} bytes -> {result['path']}"
+              + (f" ({result['duplicates']} repetidas ignoradas)" if result["duplicates"] else ""))
+    if not results:
+        print("Nenhum deck a compilar")
+
+
+if __name__ == "__main__":
+    main()
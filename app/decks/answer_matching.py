@@ -0,0 +1,393 @@
+"""
+Correção das respostas digitadas pelos alunos, tolerante a erros
+
+As respostas são comparadas depois de normalizadas: NFKD, sem acentos
+nem diacríticos, em minúsculas (casefold, que também troca ß por ss) e
+com os espaços colapsados. Assim "Grün", "grun" e "GRÜN" são a mesma
+resposta. As respostas com trema também são indexadas na grafia sem
+trema do alemão (ä -> ae, ö -> oe, ü -> ue), de modo que "gruen" é uma
+resposta exata para "grün".
+
+Erros de digitação são aceitos até um número de edições (Levenshtein)
+que cresce com o comprimento da resposta (max_edits_for). A distância é
+calculada numa faixa de largura 2k+1 da matriz e abandonada assim que
+passa de k.
+
+O AnswerIndex encontra todas as respostas do deck a até k edições de um
+texto sem percorrer o deck. As chaves ficam numa lista ordenada, que
+funciona como uma trie implícita: as chaves com um mesmo prefixo formam
+um bloco contíguo, delimitado com bisect. A busca desce por essa trie
+com um autômato de Levenshtein limitado (simulado em paralelo de bits e
+determinizado sob demanda) e abandona um bloco inteiro assim que o
+autômato morre no prefixo. Para que os primeiros níveis não se
+ramifiquem, a busca é feita duas vezes: sem erros na primeira metade da
+resposta, pelo início das chaves, e com menos erros na segunda metade,
+pelo fim das chaves (uma segunda lista com as chaves invertidas).
+"""
+
+import sys
+import unicodedata
+from bisect import bisect_left
+
+# Limite absoluto de edições aceitas
+MAX_EDITS = 2
+
+# Palavras sugeridas em confused_with
+CONFUSED_WITH_LIMIT = 5
+
+# Grafia sem trema usada nos teclados sem umlaut
+UMLAUT_SPELLINGS = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue", "Ä": "Ae", "Ö": "Oe", "Ü": "Ue"})
+
+# Maior code point: prefixo + _LAST ordena depois de qualquer chave com o prefixo
+_LAST = chr(0x10FFFF)
+
+
+def normalize_answer(text):
+    """Forma canônica de uma resposta: sem acentos, casefold e espaços simples"""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    folded = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(folded.split())
+
+
+def answer_spellings(text):
+    """Grafias aceitas como exatas para uma resposta esperada"""
+    spellings = [normalize_answer(text)]
+    transliterated = normalize_answer(text.translate(UMLAUT_SPELLINGS))
+    if transliterated != spellings[0]:
+        spellings.append(transliterated)
+    return spellings
+
+
+def max_edits_for(text, limit=MAX_EDITS):
+    """Edições toleradas: nenhuma até 3 caracteres, 1 até 6 e depois 2"""
+    length = len(text)
+    if length <= 3:
+        return 0
+    return min(limit, 1 if length <= 6 else 2)
+
+
+def bounded_distance(first, second, max_edits):
+    """
+    Distância de Levenshtein limitada
+
+    Returns:
+        int ou None: A distância, ou None se for maior que max_edits
+    """
+    if abs(len(first) - len(second)) > max_edits:
+        return None
+    if first == second:
+        return 0
+
+    beyond = max_edits + 1
+    previous = list(range(len(second) + 1))
+    for row, char in enumerate(first, 1):
+        low = max(1, row - max_edits)
+        high = min(len(second), row + max_edits)
+        current = [beyond] * (len(second) + 1)
+        if low == 1:
+            current[0] = row
+        best = current[0]
+        for column in range(low, high + 1):
+            value = min(
+                previous[column] + 1,
+                current[column - 1] + 1,
+                previous[column - 1] + (char != second[column - 1])
+            )
+            current[column] = value
+            if value < best:
+                best = value
+        if best > max_edits:
+            return None
+        previous = current
+
+    distance = previous[len(second)]
+    return distance if distance <= max_edits else None
+
+
+class AnswerIndex:
+    """
+    Índice das respostas de um deck para busca aproximada
+
+    Args:
+        answers (list): Resposta esperada de cada entrada do deck, na
+                        ordem do deck
+    """
+
+    def __init__(self, answers):
+        postings = {}
+        for index, answer in enumerate(answers):
+            for spelling in answer_spellings(answer):
+                postings.setdefault(spelling, []).append(index)
+        self.keys = sorted(postings)
+        self.postings = [tuple(postings[key]) for key in self.keys]
+        # As mesmas chaves escritas de trás para frente (busca pelo fim)
+        order = sorted(range(len(self.keys)), key=lambda position: self.keys[position][::-1])
+        self.reversed_keys = [self.keys[position][::-1] for position in order]
+        self.reversed_postings = [self.postings[position] for position in order]
+
+    @classmethod
+    def from_deck(cls, deck):
+        """Índice das respostas (tradução, ou a palavra se não houver) de um CompiledDeck"""
+        answers = []
+        for index in range(len(deck)):
+            entry = deck.entry(index)
+            answers.append(entry["translation"] or entry["word"])
+        return cls(answers)
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def nbytes(self):
+        """Tamanho aproximado das duas listas de chaves"""
+        return 2 * (sum(sys.getsizeof(key) for key in self.keys) + 8 * len(self.keys)) + \
+            sum(sys.getsizeof(posting) for posting in self.postings)
+
+    def search(self, text, max_edits=None):
+        """
+        Entradas cuja resposta está a até max_edits edições do texto
+
+        Args:
+            text (str): Resposta digitada (normalizada aqui)
+            max_edits (int): Padrão: max_edits_for(texto normalizado)
+
+        Returns:
+            list: (índice da entrada, distância), da mais próxima para a
+                  mais distante e depois pela ordem do deck
+        """
+        query = normalize_answer(text)
+        if max_edits is None:
+            max_edits = max_edits_for(query)
+
+        found = {}
+        if max_edits == 0:
+            position = bisect_left(self.keys, query)
+            if position < len(self.keys) and self.keys[position] == query:
+                found = dict.fromkeys(self.postings[position], 0)
+        elif self.keys:
+            # Um casamento a até k edições ou copia sem erros a primeira
+            # metade da resposta (sem inserção logo depois dela), ou tem
+            # no máximo k - 1 edições na segunda metade. A primeira busca
+            # (pelo início) não aceita erros na primeira metade; a
+            # segunda, nas chaves invertidas, aceita só k - 1 no começo
+            size = len(query)
+            head = size // 2
+            self._search(self.keys, self.postings, query, [0] + [head + 1] * max_edits, found)
+            self._search(self.reversed_keys, self.reversed_postings, query[::-1],
+                         [0] * max_edits + [size - head], found)
+        return sorted(found.items(), key=lambda item: (item[1], item[0]))
+
+    def _search(self, keys, postings, query, thresholds, found):
+        """
+        Percorre as chaves com o autômato de Levenshtein de query, com
+        edits edições só a partir da posição thresholds[edits]
+        """
+        automaton = _Automaton(query, thresholds)
+        states = automaton.initial_states()
+        if states is not None:
+            self._visit(keys, postings, automaton, 0, len(keys), 0, states, found)
+
+    def _visit(self, keys, postings, automaton, low, high, depth, states, found):
+        """
+        Visita o bloco keys[low:high], cujas chaves partilham os depth
+        primeiros caracteres; states é o estado do autômato nesse prefixo
+        """
+        accepted, chars, exhausted = automaton.describe(states)
+        prefix = keys[low][:depth]
+        if exhausted:
+            # Todas as edições já foram gastas: a chave só casa se for o
+            # prefixo seguido do resto da consulta a partir de uma das
+            # posições vivas, o que se verifica com um bisect por posição
+            edits = len(states) - 1
+            for rest in exhausted:
+                target = prefix + rest
+                match = bisect_left(keys, target, low, high)
+                if match < high and keys[match] == target:
+                    self._found(postings[match], edits, found)
+            return
+
+        if len(keys[low]) == depth:
+            # A chave igual ao prefixo vem primeiro no bloco
+            if accepted is not None:
+                self._found(postings[low], accepted, found)
+            low += 1
+
+        position = low
+        next_char = 0
+        while position < high:
+            if chars is None:
+                char = keys[position][depth]
+            else:
+                if next_char == len(chars):
+                    return
+                char = chars[next_char]
+                next_char += 1
+                position = bisect_left(keys, prefix + char, position, high)
+                if position == high:
+                    return
+                if keys[position][depth] != char:
+                    continue
+            end = bisect_left(keys, prefix + char + _LAST, position + 1, high)
+
+            following = automaton.step(states, char)
+            if following is not None:
+                self._visit(keys, postings, automaton, position, end, depth + 1, following, found)
+            position = end
+
+    @staticmethod
+    def _found(indexes, edits, found):
+        for index in indexes:
+            if edits < found.get(index, edits + 1):
+                found[index] = edits
+
+
+class _Automaton:
+    """
+    Autômato de Levenshtein de uma consulta, determinizado sob demanda
+
+    Cada estado é uma tupla com um inteiro por número de edições: o bit i
+    do inteiro j indica que os i primeiros caracteres da consulta casam
+    com o texto lido usando até j edições (paralelo de bits). As posições
+    abaixo de thresholds[j] ficam desligadas no inteiro j (edições
+    proibidas no começo da consulta). Os mesmos estados se repetem em
+    muitos nós, por isso as transições e as descrições ficam em cache.
+    """
+
+    __slots__ = ("query", "masks", "allowed", "_transitions", "_descriptions")
+
+    def __init__(self, query, thresholds):
+        self.query = query
+        self.masks = {}
+        for position, char in enumerate(query):
+            self.masks[char] = self.masks.get(char, 0) | 1 << (position + 1)
+        full = (1 << (len(query) + 1)) - 1
+        self.allowed = [full & (-1 << threshold) for threshold in thresholds]
+        self._transitions = {}
+        self._descriptions = {}
+
+    def initial_states(self):
+        """Antes de ler o texto: j edições = remover até j caracteres da consulta"""
+        states = tuple(((1 << (edits + 1)) - 1) & allowed for edits, allowed in enumerate(self.allowed))
+        return states if any(states) else None
+
+    def describe(self, states):
+        """
+        Returns:
+            tuple: menor número de edições com a consulta inteira casada
+                   (ou None); caracteres que mantêm o estado vivo (None se
+                   qualquer um mantém); e, se só restam estados sem edições
+                   disponíveis, os restos da consulta que ainda casam
+        """
+        description = self._descriptions.get(states)
+        if description is None:
+            description = self._descriptions[states] = self._describe(states)
+        return description
+
+    def _describe(self, states):
+        query = self.query
+        accepted = None
+        for edits, state in enumerate(states):
+            if state >> len(query) & 1:
+                accepted = edits
+                break
+
+        if not any(states[:-1]):
+            last = states[-1]
+            return accepted, None, [query[position:] for position in range(len(query) + 1) if last >> position & 1]
+
+        for edits in range(1, len(states)):
+            previous = states[edits - 1]
+            if (previous | previous << 1) & self.allowed[edits]:
+                # Há uma edição disponível que não depende do caractere
+                return accepted, None, None
+
+        # Sem edições disponíveis, só avança quem casa com query[posição]
+        alive = 0
+        for state in states:
+            alive |= state
+        chars = sorted({query[position] for position in range(len(query)) if alive >> position & 1})
+        return accepted, chars, None
+
+    def step(self, states, char):
+        """Estado depois de ler char, ou None se nenhum caminho sobrevive"""
+        key = (states, char)
+        try:
+            return self._transitions[key]
+        except KeyError:
+            pass
+
+        match = self.masks.get(char, 0)
+        following = []
+        previous = following_previous = 0
+        for edits, state in enumerate(states):
+            value = (state << 1) & match
+            if edits:
+                # Inserção, substituição e remoção a partir de edits - 1
+                value |= previous | previous << 1 | following_previous << 1
+            value &= self.allowed[edits]
+            following.append(value)
+            previous, following_previous = state, value
+        following = tuple(following) if any(following) else None
+        self._transitions[key] = following
+        return following
+
+
+def grade_answer(expected, answer, max_edits=None):
+    """
+    Corrige a resposta de um aluno
+
+    Args:
+        expected (str): Resposta esperada (como está no deck)
+        answer (str): Resposta digitada
+        max_edits (int): Padrão: max_edits_for(resposta esperada normalizada)
+
+    Returns:
+        dict: correct, exact (igual à esperada depois de normalizar, sem
+              erros de digitação), distance (None se passou do limite)
+              e expected
+    """
+    spellings = answer_spellings(expected)
+    typed = normalize_answer(answer)
+    if max_edits is None:
+        max_edits = max_edits_for(spellings[0])
+
+    distance = None
+    for spelling in spellings:
+        candidate = bounded_distance(spelling, typed, max_edits)
+        if candidate is not None and (distance is None or candidate < distance):
+            distance = candidate
+
+    return {
+        "correct": distance is not None and bool(typed),
+        "exact": distance == 0 and bool(typed),
+        "distance": distance,
+        "expected": expected
+    }
+
+
+def check_answer(deck, answers, word, answer):
+    """
+    Corrige a resposta digitada para uma carta do deck
+
+    Args:
+        deck (CompiledDeck): Deck da carta
+        answers (AnswerIndex): Índice das respostas do mesmo deck
+        word (str): Palavra mostrada ao aluno
+        answer (str): Resposta digitada
+
+    Returns:
+        dict ou None: O resultado de grade_answer e, se a resposta está
+                      errada, confused_with (palavras do deck cuja
+                      resposta é a digitada); None se a palavra não está
+                      no deck
+    """
+    index = deck.index_of(word)
+    if index is None:
+        return None
+    entry = deck.entry(index)
+    result = grade_answer(entry["translation"] or entry["word"], answer)
+    if not result["correct"]:
+        # O aluno respondeu com a tradução de outra carta?
+        others = [other for other, _ in answers.search(answer) if other != index]
+        result["confused_with"] = [deck.word(other) for other in others[:CONFUSED_WITH_LIMIT]]
+    return result
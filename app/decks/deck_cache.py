@@ -0,0 +1,220 @@
+"""
+Cache de decks do processo, partilhado por todas as atividades
+
+Várias instâncias de atividade (/deploy) usam o mesmo deck_id; o cache
+garante que cada versão de um deck é aberta e decodificada uma única vez
+por processo. A chave é (deck_id, content_hash): recompilar a fonte gera
+um hash novo e a versão antiga deixa de ser servida.
+
+- Orçamento de memória em bytes (arquivo mapeado + palavras decodificadas
+  + índice das respostas) com despejo LRU
+- Carga single-flight: requisições simultâneas ao mesmo deck esperam a
+  carga em curso em vez de repeti-la
+- Contadores de acertos, faltas, cargas e despejos para monitoração
+
+Um deck despejado não é fechado explicitamente: quem ainda o usa mantém
+a referência e o mmap é liberado quando a última referência desaparece.
+"""
+
+import os
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from config.config import Config
+from .deck_store import DeckStore
+from .answer_matching import AnswerIndex, check_answer
+from .distractors import build_round
+
+
+class CachedDeck:
+    """Deck aberto com as palavras já decodificadas e o índice das respostas"""
+
+    __slots__ = ("deck", "deck_id", "content_hash", "words", "answers", "nbytes")
+
+    def __init__(self, deck):
+        self.deck = deck
+        self.deck_id = deck.deck_id
+        self.content_hash = deck.content_hash
+        self.words = [sys.intern(word) for word in deck.words()]
+        self.answers = AnswerIndex.from_deck(deck)
+        self.nbytes = deck.nbytes + sys.getsizeof(self.words) + sum(sys.getsizeof(word) for word in self.words)
+        self.nbytes += self.answers.nbytes
+
+    def __len__(self):
+        return len(self.words)
+
+    def get(self, word):
+        return self.deck.get(word)
+
+    def build_round(self, word, choices=4):
+        return build_round(self.deck, word, choices)
+
+    def check_answer(self, word, answer):
+        return check_answer(self.deck, self.answers, word, answer)
+
+
+class DeckCache:
+    """
+    Cache LRU de decks compilados, limitado por bytes
+
+    Args:
+        store (DeckStore): Origem dos decks
+        max_bytes (int): Orçamento de memória; um deck maior que o
+                         orçamento inteiro é servido sem ficar no cache
+    """
+
+    def __init__(self, store, max_bytes):
+        self.store = store
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.evictions = 0
+        # (deck_id, content_hash) -> CachedDeck, do menos ao mais recente
+        self._entries = OrderedDict()
+        # deck_id -> (assinatura do arquivo, content_hash) da última carga
+        self._fingerprints = {}
+        # deck_id -> Future das cargas em curso
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def _signature(self, deck_id):
+        stat = os.stat(self.store.compiled_path(deck_id))
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _current_signature(self, deck_id):
+        """Assinatura do compilado, ou None se ele precisa ser (re)gerado"""
+        if self.store.is_stale(deck_id):
+            return None
+        try:
+            return self._signature(deck_id)
+        except OSError:
+            return None
+
+    def _lookup(self, deck_id, signature):
+        """Entrada atual do deck, se o arquivo não mudou desde a carga (com o lock)"""
+        fingerprint = self._fingerprints.get(deck_id)
+        if signature is None or fingerprint is None or fingerprint[0] != signature:
+            return None
+        key = (deck_id, fingerprint[1])
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def get(self, deck_id):
+        """
+        Retorna o deck, carregando-o se necessário
+
+        Returns:
+            CachedDeck
+
+        Raises:
+            KeyError: Deck inexistente
+            DeckFormatError: Fonte ou arquivo compilado inválido
+        """
+        if not self.store.is_valid_id(deck_id):
+            raise KeyError(deck_id)
+
+        # Chamadas ao sistema de arquivos fora do lock
+        signature = self._current_signature(deck_id)
+        with self._lock:
+            entry = self._lookup(deck_id, signature)
+            if entry is not None:
+                self.hits += 1
+                return entry
+            self.misses += 1
+            future = self._loading.get(deck_id)
+            leader = future is None
+            if leader:
+                future = self._loading[deck_id] = Future()
+
+        if not leader:
+            # Outra thread já está carregando este deck
+            return future.result()
+
+        try:
+            entry = self._load(deck_id)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            with self._lock:
+                self._loading.pop(deck_id, None)
+        future.set_result(entry)
+        return entry
+
+    def _load(self, deck_id):
+        deck = self.store.open(deck_id)
+        signature = self._signature(deck_id)
+        key = (deck_id, deck.content_hash)
+
+        with self._lock:
+            self._fingerprints[deck_id] = (signature, deck.content_hash)
+            entry = self._entries.get(key)
+            if entry is not None:
+                # Arquivo recompilado com o mesmo conteúdo
+                self._entries.move_to_end(key)
+                deck.close()
+                return entry
+
+        entry = CachedDeck(deck)
+        with self._lock:
+            self.loads += 1
+            # Versões antigas do mesmo deck não voltam a ser servidas
+            for old_key in [old for old in self._entries if old[0] == deck_id]:
+                self.current_bytes -= self._entries.pop(old_key).nbytes
+            if entry.nbytes <= self.max_bytes:
+                self._entries[key] = entry
+                self.current_bytes += entry.nbytes
+                while self.current_bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self.current_bytes -= evicted.nbytes
+                    self.evictions += 1
+        return entry
+
+    def invalidate(self, deck_id):
+        """Remove todas as versões de um deck"""
+        with self._lock:
+            self._fingerprints.pop(deck_id, None)
+            for key in [key for key in self._entries if key[0] == deck_id]:
+                self.current_bytes -= self._entries.pop(key).nbytes
+
+    def stats(self):
+        """
+        Returns:
+            dict: decks em cache, bytes, hits, misses, loads e evictions
+        """
+        with self._lock:
+            return {
+                "decks": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "loads": self.loads,
+                "evictions": self.evictions
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_deck_cache():
+    """
+    Retorna o cache de decks compartilhado pelo processo (DECK_DIR e
+    DECK_CACHE_MAX_BYTES), criado na primeira chamada
+    """
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_lock:
+            if _shared_cache is None:
+                _shared_cache = DeckCache(DeckStore(Config.DECK_DIR), Config.DECK_CACHE_MAX_BYTES)
+    return _shared_cache
@@ -0,0 +1,234 @@
+"""
+Compilador de decks: listas de palavras (CSV ou JSON) -> arquivo .wmdeck
+
+Fontes aceitas:
+
+- CSV com as colunas word, translation e part_of_speech (cabeçalho
+  opcional; sem cabeçalho, as colunas seguem essa ordem)
+- JSON com uma lista de entradas ou um objeto
+  {"deck_id": ..., "title": ..., "words": [...]}, onde cada entrada é
+  um objeto com as mesmas chaves ou só a palavra (string)
+
+Palavras repetidas ficam com a primeira ocorrência. O índice de
+distratores (distractors.py) é calculado aqui, uma vez por compilação.
+O arquivo é escrito num temporário e renomeado, então leitores (outros
+workers) nunca veem um deck pela metade.
+"""
+
+import csv
+import hashlib
+import json
+import os
+import struct
+import tempfile
+
+from .distractors import build_distractor_index
+from .deck_format import (
+    ALIGNMENT,
+    DECK_SUFFIX,
+    ENTRY_FIELDS,
+    FORMAT_VERSION,
+    HEADER,
+    MAGIC,
+    SECTION,
+    DeckFormatError,
+    word_hash
+)
+
+SOURCE_SUFFIXES = (".csv", ".json")
+
+
+def _normalize_entry(raw, where):
+    if isinstance(raw, str):
+        raw = {"word": raw}
+    if not isinstance(raw, dict):
+        raise DeckFormatError(f"{where}: entrada deve ser um objeto ou uma string")
+    entry = {}
+    for field in ENTRY_FIELDS:
+        value = raw.get(field) or ""
+        if not isinstance(value, str):
+            raise DeckFormatError(f"{where}: {field} deve ser texto")
+        entry[field] = value.strip()
+    if not entry["word"]:
+        raise DeckFormatError(f"{where}: palavra vazia")
+    return entry
+
+
+def _read_csv(path):
+    with open(path, newline="", encoding="utf-8-sig") as source:
+        rows = list(csv.reader(source))
+    header = [column.strip().lower() for column in rows[0]] if rows else []
+    if "word" in header:
+        columns = header
+        rows = rows[1:]
+        start_line = 2
+    else:
+        columns = list(ENTRY_FIELDS)
+        start_line = 1
+    entries = []
+    for line, row in enumerate(rows, start=start_line):
+        if not any(cell.strip() for cell in row):
+            continue
+        entries.append(_normalize_entry(dict(zip(columns, row)), f"{path}:{line}"))
+    return {}, entries
+
+
+def _read_json(path):
+    with open(path, encoding="utf-8") as source:
+        try:
+            data = json.load(source)
+        except json.JSONDecodeError as exc:
+            raise DeckFormatError(f"{path}: JSON inválido ({exc})") from None
+    meta = {}
+    if isinstance(data, dict):
+        meta = {key: data[key] for key in ("deck_id", "title") if isinstance(data.get(key), str)}
+        data = data.get("words")
+    if not isinstance(data, list):
+        raise DeckFormatError(f"{path}: esperada uma lista de palavras")
+    return meta, [_normalize_entry(raw, f"{path}[{index}]") for index, raw in enumerate(data)]
+
+
+def load_source(path):
+    """
+    Lê uma fonte CSV ou JSON
+
+    Returns:
+        tuple: (metadados {"deck_id", "title"} presentes na fonte, entradas)
+
+    Raises:
+        DeckFormatError: Extensão desconhecida ou entrada inválida
+    """
+    suffix = os.path.splitext(path)[1].lower()
+    if suffix == ".csv":
+        return _read_csv(path)
+    if suffix == ".json":
+        return _read_json(path)
+    raise DeckFormatError(f"{path}: formato não suportado (use {' ou '.join(SOURCE_SUFFIXES)})")
+
+
+class _StringPool:
+    """Pool de strings internadas; o id 0 é a string vazia"""
+
+    def __init__(self):
+        self.ids = {"": 0}
+        # offsets[i] e offsets[i + 1] delimitam a string i
+        self.offsets = [0, 0]
+        self.data = bytearray()
+
+    def intern(self, value):
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = self.ids[value] = len(self.ids)
+            self.data += value.encode("utf-8")
+            self.offsets.append(len(self.data))
+        return string_id
+
+
+def _u32(values):
+    return struct.pack(f"<{len(values)}I", *values)
+
+
+def build_deck(entries, deck_id, title="", extra_sections=None):
+    """
+    Serializa as entradas no formato .wmdeck
+
+    Args:
+        entries (list): dicts com word, translation e part_of_speech
+        extra_sections (dict, optional): tag -> bytes de seções adicionais
+
+    Returns:
+        tuple: (conteúdo do arquivo, entradas mantidas sem repetição)
+    """
+    pool = _StringPool()
+    meta = _u32([pool.intern(deck_id), pool.intern(title)])
+
+    unique = []
+    seen = set()
+    table = []
+    for entry in entries:
+        if entry["word"] in seen:
+            continue
+        seen.add(entry["word"])
+        unique.append(entry)
+        table.extend(pool.intern(entry[field]) for field in ENTRY_FIELDS)
+
+    # Tabela hash com ocupação de no máximo 50%
+    capacity = 1
+    while capacity < 2 * len(unique):
+        capacity *= 2
+    slots = [0] * capacity
+    mask = capacity - 1
+    for index, entry in enumerate(unique):
+        position = word_hash(entry["word"].encode("utf-8")) & mask
+        while slots[position]:
+            position = (position + 1) & mask
+        slots[position] = index + 1
+
+    sections = [
+        (b"META", meta),
+        (b"SOFF", _u32(pool.offsets)),
+        (b"SPOL", bytes(pool.data)),
+        (b"ENTR", _u32(table)),
+        (b"HASH", _u32(slots)),
+        (b"DIST", build_distractor_index(unique).tobytes())
+    ]
+    for tag, payload in (extra_sections or {}).items():
+        sections.append((tag.encode("ascii"), payload))
+
+    # Tabela de seções com offsets absolutos e dados alinhados
+    offset = HEADER.size + SECTION.size * len(sections)
+    directory = bytearray()
+    body = bytearray()
+    for tag, payload in sections:
+        padding = -(offset + len(body)) % ALIGNMENT
+        body += b"\0" * padding
+        directory += SECTION.pack(tag, offset + len(body), len(payload))
+        body += payload
+
+    digest = hashlib.sha256(directory + body).digest()
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, len(sections), len(unique), digest)
+    return header + directory + body, unique
+
+
+def compile_deck(source_path, output_path=None, deck_id=None, title=None):
+    """
+    Compila uma fonte CSV/JSON num arquivo .wmdeck
+
+    O deck_id vem do argumento, da fonte (JSON) ou do nome do arquivo,
+    nesta ordem; o mesmo vale para o título.
+
+    Returns:
+        dict: deck_id, path, entries, content_hash e bytes escritos
+    """
+    meta, entries = load_source(source_path)
+    deck_id = deck_id or meta.get("deck_id") or os.path.splitext(os.path.basename(source_path))[0]
+    title = title or meta.get("title") or ""
+    if output_path is None:
+        output_path = os.path.join(os.path.dirname(source_path), deck_id + DECK_SUFFIX)
+
+    content, unique = build_deck(entries, deck_id, title)
+    write_atomic(output_path, content)
+    return {
+        "deck_id": deck_id,
+        "path": output_path,
+        "entries": len(unique),
+        "duplicates": len(entries) - len(unique),
+        "content_hash": hashlib.sha256(content[HEADER.size:]).hexdigest(),
+        "bytes": len(content)
+    }
+
+
+def write_atomic(path, content):
+    """Escreve num temporário do mesmo diretório e renomeia"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    handle, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(handle, "wb") as output:
+            output.write(content)
+        # mkstemp cria com 0600; os workers podem rodar com outro usuário
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
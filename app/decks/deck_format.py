@@ -0,0 +1,239 @@
+"""
+Formato binário dos decks compilados (.wmdeck) e leitor via mmap
+
+Layout (little-endian, seções alinhadas em 8 bytes):
+
+    cabeçalho   magic "WMDK", versão, nº de seções, nº de entradas,
+                sha256 do conteúdo (tudo após a tabela de seções)
+    seções      tabela de (tag, offset, tamanho) seguida dos dados:
+      META  u32 x 2     ids no pool do deck_id e do título
+      SOFF  u32 x (n+1) offset de cada string no pool (a última marca o fim)
+      SPOL  bytes       pool de strings UTF-8 internadas (cada string uma vez)
+      ENTR  u32 x 3 x e palavra, tradução e classe gramatical (ids no pool)
+      HASH  u32 x cap   tabela hash; cap é a menor potência de 2 >= 2*e
+                        (ocupação <= 50%). A busca começa na posição
+                        zlib.crc32(palavra em UTF-8) & (cap - 1) e avança
+                        de 1 em 1, voltando ao início no fim da tabela
+                        (sondagem linear), até achar a palavra ou uma
+                        posição vazia. Cada posição guarda o índice da
+                        entrada + 1; 0 = vazia
+      DIST  u32 x (1+k*e) k e os k distratores de cada entrada (opcional,
+                        ver distractors.py)
+
+A string de id 0 é sempre a vazia. Seções com tags desconhecidas são
+ignoradas pelo leitor, o que permite acrescentar índices ao formato sem
+mudar a versão.
+
+O CompiledDeck abre o arquivo com mmap somente leitura: as páginas vêm
+do cache do sistema operacional e são partilhadas por todos os workers,
+e abrir um deck lê o cabeçalho e confere a seção HASH, sem interpretar
+as entradas.
+"""
+
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+
+MAGIC = b"WMDK"
+FORMAT_VERSION = 1
+DECK_SUFFIX = ".wmdeck"
+
+HEADER = struct.Struct("<4sHHI32s")
+SECTION = struct.Struct("<4sQQ")
+ALIGNMENT = 8
+
+ENTRY_FIELDS = ("word", "translation", "part_of_speech")
+# Posição vazia na seção DIST
+NO_DISTRACTOR = 0xFFFFFFFF
+
+
+class DeckFormatError(ValueError):
+    """Fonte ou arquivo compilado inválido"""
+
+
+def word_hash(encoded):
+    """Hash estável (entre processos) usado na seção HASH"""
+    return zlib.crc32(encoded)
+
+
+def _u32_view(buffer, offset, length):
+    """Vista u32 sobre o mmap, sem cópia (cópia só em máquinas big-endian)"""
+    view = memoryview(buffer)[offset:offset + length]
+    if sys.byteorder == "little":
+        return view.cast("I")
+    values = array("I")
+    values.frombytes(view)
+    view.release()
+    values.byteswap()
+    return values
+
+
+class CompiledDeck:
+    """
+    Deck compilado aberto via mmap
+
+    Acesso às entradas por posição (entry, word) ou por palavra (get,
+    index_of, in). As strings são decodificadas só quando lidas.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as deck_file:
+            try:
+                self._mmap = mmap.mmap(deck_file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise DeckFormatError(f"{path}: arquivo vazio") from None
+        try:
+            self._load_header()
+        except Exception:
+            self.close()
+            raise
+
+    def _load_header(self):
+        mm = self._mmap
+        if len(mm) < HEADER.size:
+            raise DeckFormatError(f"{self.path}: arquivo truncado")
+        magic, version, section_count, entry_count, digest = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC:
+            raise DeckFormatError(f"{self.path}: não é um deck compilado")
+        if version != FORMAT_VERSION:
+            raise DeckFormatError(f"{self.path}: versão {version} não suportada")
+
+        self.entry_count = entry_count
+        self.content_hash = digest.hex()
+        self.sections = {}
+        for index in range(section_count):
+            tag, offset, length = SECTION.unpack_from(mm, HEADER.size + index * SECTION.size)
+            if offset + length > len(mm):
+                raise DeckFormatError(f"{self.path}: seção {tag.decode(errors='replace')} truncada")
+            self.sections[tag.decode("ascii")] = (offset, length)
+        missing = {"META", "SOFF", "SPOL", "ENTR", "HASH"} - self.sections.keys()
+        if missing:
+            raise DeckFormatError(f"{self.path}: seções ausentes: {', '.join(sorted(missing))}")
+
+        self._views = []
+        self._string_offsets = self._section_u32("SOFF")
+        self._pool_start = self.sections["SPOL"][0]
+        self._entries = self._section_u32("ENTR")
+        self._hash_slots = self._section_u32("HASH")
+        if len(self._entries) != 3 * entry_count:
+            raise DeckFormatError(f"{self.path}: tabela de entradas inconsistente")
+        # Tabela hash corrompida faria index_of sair da tabela de entradas
+        capacity = len(self._hash_slots)
+        if capacity == 0 or capacity & (capacity - 1) or max(self._hash_slots) > entry_count:
+            raise DeckFormatError(f"{self.path}: tabela hash inconsistente")
+
+        self._distractors = self._section_u32("DIST") if "DIST" in self.sections else None
+        self.distractors_per_word = self._distractors[0] if self._distractors else 0
+
+        meta = self._section_u32("META")
+        self.deck_id = self.string(meta[0])
+        self.title = self.string(meta[1])
+
+    def _section_u32(self, tag):
+        offset, length = self.sections[tag]
+        view = _u32_view(self._mmap, offset, length)
+        self._views.append(view)
+        return view
+
+    def section(self, tag):
+        """
+        Bytes de uma seção (memoryview sobre o mmap) ou None se ausente
+
+        O chamador deve liberar a vista (release) antes de close().
+        """
+        if tag not in self.sections:
+            return None
+        offset, length = self.sections[tag]
+        return memoryview(self._mmap)[offset:offset + length]
+
+    @property
+    def nbytes(self):
+        """Tamanho do arquivo mapeado"""
+        return len(self._mmap)
+
+    def close(self):
+        for view in getattr(self, "_views", ()):
+            if isinstance(view, memoryview):
+                view.release()
+        self._views = []
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # ========== STRINGS E ENTRADAS ==========
+
+    def _string_bytes(self, string_id):
+        offsets = self._string_offsets
+        start = self._pool_start
+        return self._mmap[start + offsets[string_id]:start + offsets[string_id + 1]]
+
+    def string(self, string_id):
+        return self._string_bytes(string_id).decode("utf-8")
+
+    def __len__(self):
+        return self.entry_count
+
+    def word(self, index):
+        return self.string(self._entries[3 * index])
+
+    def entry(self, index):
+        """
+        Returns:
+            dict: word, translation e part_of_speech da entrada
+        """
+        if not 0 <= index < self.entry_count:
+            raise IndexError(index)
+        base = 3 * index
+        return {field: self.string(self._entries[base + offset]) for offset, field in enumerate(ENTRY_FIELDS)}
+
+    def words(self):
+        """Todas as palavras, na ordem do deck"""
+        entries = self._entries
+        return [self.string(entries[base]) for base in range(0, 3 * self.entry_count, 3)]
+
+    def __iter__(self):
+        for index in range(self.entry_count):
+            yield self.entry(index)
+
+    def index_of(self, word):
+        """Posição da palavra no deck (O(1) pela seção HASH) ou None"""
+        encoded = word.encode("utf-8")
+        slots = self._hash_slots
+        mask = len(slots) - 1
+        position = word_hash(encoded) & mask
+        # No máximo uma volta: uma tabela sem posições vazias não prende a busca
+        for _ in range(len(slots)):
+            slot = slots[position]
+            if slot == 0:
+                return None
+            if self._string_bytes(self._entries[3 * (slot - 1)]) == encoded:
+                return slot - 1
+            position = (position + 1) & mask
+        return None
+
+    def distractors(self, index):
+        """
+        Distratores precalculados da entrada, do mais ao menos parecido
+
+        Returns:
+            list: Índices das entradas (vazia em decks sem a seção DIST)
+        """
+        per_word = self.distractors_per_word
+        if not per_word:
+            return []
+        start = 1 + index * per_word
+        return [other for other in self._distractors[start:start + per_word] if other != NO_DISTRACTOR]
+
+    def __contains__(self, word):
+        return self.index_of(word) is not None
+
+    def get(self, word):
+        index = self.index_of(word)
+        return self.entry(index) if index is not None else None
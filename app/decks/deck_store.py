@@ -0,0 +1,100 @@
+"""
+Diretório de decks: fontes (CSV/JSON) e versões compiladas lado a lado
+
+    decks/
+        deck_123_exemplo.csv       fonte editada pelo professor
+        deck_123_exemplo.wmdeck    gerado por compile_all ou open
+
+O deck_id é o nome do arquivo sem extensão.
+"""
+
+import os
+import re
+
+from .deck_compiler import SOURCE_SUFFIXES, compile_deck
+from .deck_format import DECK_SUFFIX, CompiledDeck
+
+# deck_id vira nome de arquivo: nada de separadores de diretório
+DECK_ID_PATTERN = re.compile(r"^[A-Za-z0-9_.-]{1,128}$")
+
+
+class DeckStore:
+    """
+    Localiza, compila e abre os decks de um diretório
+
+    open() recompila a fonte quando o .wmdeck não existe ou é mais antigo
+    que ela; em produção os decks são compilados antes (compile_all) e a
+    requisição só mapeia o arquivo.
+    """
+
+    def __init__(self, deck_dir):
+        self.deck_dir = deck_dir
+
+    def is_valid_id(self, deck_id):
+        return isinstance(deck_id, str) and bool(DECK_ID_PATTERN.match(deck_id)) and not deck_id.startswith(".")
+
+    def compiled_path(self, deck_id):
+        return os.path.join(self.deck_dir, deck_id + DECK_SUFFIX)
+
+    def source_path(self, deck_id):
+        """Fonte do deck, se existir"""
+        for suffix in SOURCE_SUFFIXES:
+            path = os.path.join(self.deck_dir, deck_id + suffix)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def deck_ids(self):
+        """IDs de todos os decks (fontes e compilados), ordenados"""
+        try:
+            names = os.listdir(self.deck_dir)
+        except FileNotFoundError:
+            return []
+        ids = set()
+        for name in names:
+            deck_id, suffix = os.path.splitext(name)
+            if suffix in (DECK_SUFFIX, *SOURCE_SUFFIXES) and self.is_valid_id(deck_id):
+                ids.add(deck_id)
+        return sorted(ids)
+
+    def is_stale(self, deck_id):
+        """Indica se a fonte é mais recente que o arquivo compilado"""
+        source = self.source_path(deck_id)
+        if source is None:
+            return False
+        compiled = self.compiled_path(deck_id)
+        return not os.path.exists(compiled) or os.path.getmtime(compiled) < os.path.getmtime(source)
+
+    def compile(self, deck_id):
+        """
+        Returns:
+            dict: Resumo da compilação (ver compile_deck)
+        """
+        source = self.source_path(deck_id)
+        if source is None:
+            raise FileNotFoundError(f"Fonte do deck {deck_id} não encontrada em {self.deck_dir}")
+        return compile_deck(source, self.compiled_path(deck_id), deck_id=deck_id)
+
+    def compile_all(self, force=False):
+        """Compila as fontes novas ou alteradas; retorna os resumos"""
+        return [
+            self.compile(deck_id) for deck_id in self.deck_ids()
+            if self.source_path(deck_id) and (force or self.is_stale(deck_id))
+        ]
+
+    def open(self, deck_id):
+        """
+        Abre o deck compilado (compilando antes, se preciso)
+
+        Raises:
+            KeyError: deck_id inválido ou deck inexistente
+            DeckFormatError: Fonte ou arquivo compilado inválido
+        """
+        if not self.is_valid_id(deck_id):
+            raise KeyError(deck_id)
+        if self.is_stale(deck_id):
+            self.compile(deck_id)
+        path = self.compiled_path(deck_id)
+        if not os.path.exists(path):
+            raise KeyError(deck_id)
+        return CompiledDeck(path)
@@ -0,0 +1,214 @@
+"""
+Índice de distratores para as rodadas de escolha múltipla
+
+Para cada palavra, o compilador guarda na seção DIST do .wmdeck as
+DISTRACTORS_PER_WORD palavras mais parecidas, por ordem de semelhança:
+mesma classe gramatical, comprimento próximo e prefixo ou sufixo em
+comum. Palavras com a mesma tradução da resposta (sinônimos) nunca são
+distratores, e cada tradução aparece uma só vez.
+
+Montar uma rodada é então uma leitura de DISTRACTORS_PER_WORD inteiros
+no mmap (CompiledDeck.distractors), sem percorrer o deck.
+
+A construção é O(n log n): os candidatos de cada palavra são os vizinhos
+numa janela de ordenações por comprimento (o deck inteiro, a classe
+gramatical, a classe com o mesmo prefixo e a classe com o mesmo sufixo).
+Pontuação (menor é melhor): 2 x diferença de comprimento, menos os
+caracteres iniciais e finais em comum, mais OTHER_CLASS_PENALTY se a
+classe gramatical é outra.
+"""
+
+import random
+
+import numpy as np
+
+from .deck_format import NO_DISTRACTOR
+
+DISTRACTORS_PER_WORD = 8
+
+# Vizinhos considerados de cada lado em cada lista ordenada
+WINDOW = 8
+# Prefixo/sufixo que define os grupos de candidatos
+AFFIX_LENGTH = 2
+# Caracteres em comum contados na pontuação, de cada lado
+AFFIX_SCORE_LIMIT = 3
+# Bits por caractere no empacotamento dos afixos (code points Unicode)
+CHAR_BITS = 21
+# Penalidade para candidatos de outra classe gramatical
+OTHER_CLASS_PENALTY = 10
+
+
+def _codes(values):
+    """Códigos inteiros (iguais para valores iguais)"""
+    codes = {}
+    return np.array([codes.setdefault(value, len(codes)) for value in values], dtype=np.int64)
+
+
+def _packed_affixes(words, suffix):
+    """
+    Os AFFIX_SCORE_LIMIT primeiros (ou últimos, do fim para o início)
+    caracteres de cada palavra, empacotados num int64 (21 bits cada)
+    """
+    chunks = [word[:-AFFIX_SCORE_LIMIT - 1:-1] if suffix else word[:AFFIX_SCORE_LIMIT] for word in words]
+    chars = np.array(chunks, dtype=f"U{AFFIX_SCORE_LIMIT}").view(np.uint32).reshape(-1, AFFIX_SCORE_LIMIT)
+    packed = np.zeros(len(words), dtype=np.int64)
+    for column in range(AFFIX_SCORE_LIMIT):
+        packed = (packed << CHAR_BITS) | chars[:, column]
+    return packed
+
+
+def _shared_count(packed, sources, targets):
+    """Caracteres em comum a partir do início do empacotamento"""
+    different = packed[sources] ^ packed[targets]
+    shared = np.zeros(len(sources), dtype=np.int64)
+    for skipped in range(AFFIX_SCORE_LIMIT):
+        shared += (different >> (CHAR_BITS * skipped)) == 0
+    return shared
+
+
+def shared_affix(first, second, limit=AFFIX_SCORE_LIMIT):
+    """Caracteres iniciais e finais em comum (até limit de cada lado)"""
+    prefix = 0
+    while prefix < min(limit, len(first), len(second)) and first[prefix] == second[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < min(limit, len(first), len(second)) and first[-1 - suffix] == second[-1 - suffix]:
+        suffix += 1
+    return prefix + suffix
+
+
+def _blocks(sorted_values):
+    """
+    Início de cada bloco de valores iguais num array ordenado e a
+    posição de cada elemento dentro do seu bloco
+    """
+    starts = np.flatnonzero(np.diff(sorted_values)) + 1
+    starts = np.concatenate(([0], starts))
+    sizes = np.diff(np.append(starts, len(sorted_values)))
+    return starts, np.arange(len(sorted_values)) - np.repeat(starts, sizes)
+
+
+def _answer_key(entry):
+    """Texto mostrado como opção: a tradução, ou a própria palavra se não houver"""
+    return (entry["translation"] or entry["word"]).casefold()
+
+
+def build_distractor_index(entries, per_word=DISTRACTORS_PER_WORD, window=WINDOW):
+    """
+    Calcula os distratores de cada entrada
+
+    Os pares (palavra, candidato) são gerados, pontuados e ordenados em
+    arrays numpy; só a codificação das strings percorre o deck em Python.
+
+    Args:
+        entries (list): dicts com word, translation e part_of_speech, na
+                        ordem do deck (sem palavras repetidas)
+
+    Returns:
+        numpy.ndarray: Valores u32 little-endian da seção DIST (per_word e
+                       depois per_word índices por entrada, completados
+                       com NO_DISTRACTOR)
+    """
+    count = len(entries)
+    table = np.full(1 + count * per_word, NO_DISTRACTOR, dtype="<u4")
+    table[0] = per_word
+    if count < 2 or per_word == 0:
+        return table
+
+    words = [entry["word"].casefold() for entry in entries]
+    lengths = np.array([len(word) for word in words], dtype=np.int64)
+    classes = _codes(entry["part_of_speech"].casefold() for entry in entries)
+    answers = _codes(_answer_key(entry) for entry in entries)
+    prefixes = _packed_affixes(words, suffix=False)
+    suffixes = _packed_affixes(words, suffix=True)
+    # Desempate determinístico pela ordem alfabética
+    alphabetical = np.empty(count, dtype=np.int64)
+    alphabetical[sorted(range(count), key=words.__getitem__)] = np.arange(count)
+
+    # Ordenações por comprimento: o deck inteiro e, dentro de cada classe,
+    # as palavras com o mesmo prefixo ou sufixo; os vizinhos na janela
+    # (do mesmo grupo) são os candidatos
+    dropped = CHAR_BITS * (AFFIX_SCORE_LIMIT - AFFIX_LENGTH)
+    class_shift = CHAR_BITS * AFFIX_LENGTH
+    groupings = [
+        None,
+        classes,
+        (classes << class_shift) | (prefixes >> dropped),
+        (classes << class_shift) | (suffixes >> dropped)
+    ]
+    sources, targets = [], []
+    for group in groupings:
+        keys = (alphabetical, lengths) if group is None else (alphabetical, lengths, group)
+        order = np.lexsort(keys)
+        for distance in range(1, min(window, count - 1) + 1):
+            first, second = order[:-distance], order[distance:]
+            if group is not None:
+                same = group[first] == group[second]
+                first, second = first[same], second[same]
+            sources += [first, second]
+            targets += [second, first]
+    sources = np.concatenate(sources)
+    targets = np.concatenate(targets)
+
+    # Sinônimos (mesma tradução) nunca são distratores
+    keep = answers[sources] != answers[targets]
+    sources, targets = sources[keep], targets[keep]
+    if len(sources) == 0:
+        return table
+
+    scores = 2 * np.abs(lengths[sources] - lengths[targets])
+    scores -= _shared_count(prefixes, sources, targets)
+    scores -= _shared_count(suffixes, sources, targets)
+    scores += OTHER_CLASS_PENALTY * (classes[sources] != classes[targets])
+
+    # Uma única chave inteira (palavra, pontuação, candidato): ordenar um
+    # array int64 é bem mais rápido que um lexsort de três colunas
+    scores -= scores.min()
+    span = int(scores.max()) + 1
+    keys = np.unique((sources * span + scores) * count + targets)
+    sources, targets = keys // (span * count), keys % count
+    # Primeira (melhor) ocorrência de cada tradução por palavra: a posição
+    # dentro do bloco da palavra entra na chave, e o primeiro de cada
+    # (palavra, tradução) após a ordenação é o de melhor pontuação
+    starts, ranks = _blocks(sources)
+    width = int(ranks.max()) + 1
+    answer_span = int(answers.max()) + 1
+    keys = np.sort((sources * answer_span + answers[targets]) * width + ranks)
+    groups = keys // width
+    first = np.ones(len(keys), dtype=bool)
+    first[1:] = groups[1:] != groups[:-1]
+    kept = keys[first]
+    block_start = np.empty(count, dtype=np.int64)
+    block_start[sources[starts]] = starts
+    positions = np.sort(block_start[kept // width // answer_span] + kept % width)
+    sources, targets = sources[positions], targets[positions]
+
+    _, ranks = _blocks(sources)
+    keep = ranks < per_word
+    table[1 + sources[keep] * per_word + ranks[keep]] = targets[keep]
+    return table
+
+
+def build_round(deck, word, choices=4, rng=random):
+    """
+    Monta uma pergunta de escolha múltipla para uma palavra
+
+    Args:
+        deck (CompiledDeck): Deck compilado com a seção DIST
+        choices (int): Número de opções, incluindo a correta
+
+    Returns:
+        dict ou None: prompt, answer e options (embaralhadas); None se a
+                      palavra não está no deck
+    """
+    index = deck.index_of(word)
+    if index is None:
+        return None
+    entry = deck.entry(index)
+    answer = entry["translation"] or entry["word"]
+    # Sorteia entre os mais parecidos para variar as rodadas
+    pool = deck.distractors(index)[:max(choices - 1, 0) * 2]
+    picked = rng.sample(pool, min(choices - 1, len(pool)))
+    options = [answer] + [deck.entry(other)["translation"] or deck.word(other) for other in picked]
+    rng.shuffle(options)
+    return {"prompt": entry["word"], "answer": answer, "options": options}
@@ -5,11 +5,19 @@ Este módulo implementa o padrão Facade para simplificar a interface
 com a plataforma Inven!RA, coordenando múltiplos subsistemas complexos.
 """
 
+import json
+
+from config.config import Config
 from app.services.analytics_subsystem import AnalyticsSubsystem
 from app.services.config_subsystem import ConfigSubsystem
+from app.services.response_cache import AnalyticsResponseCache, etag_matches
+from app.services.structured_logging import get_logger
 from app.services.validation_subsystem import ValidationSubsystem
 
 
+logger = get_logger("facade")
+
+
 class InveniraFacade:
     """
     FACADE - Ponto de entrada unificado para todas as operações relacionadas à Inven!RA
@@ -29,6 +37,7 @@ class InveniraFacade:
         self.analytics = AnalyticsSubsystem()
         self.config = ConfigSubsystem()
         self.validator = ValidationSubsystem()
+        self.response_cache = AnalyticsResponseCache(Config.ANALYTICS_CACHE_MAX_BYTES)
     
     # ========== OPERAÇÕES DE CONFIGURAÇÃO ==========
     
@@ -76,6 +85,45 @@ class InveniraFacade:
     
     # ========== OPERAÇÕES DE ANALYTICS ==========
     
+    def _validate_analytics_request(self, request_data):
+        """
+        Valida o corpo do /analytics-data (activityID, scope e since)
+        
+        Returns:
+            tuple: (error_message, activity_id, scope, since)
+        """
+        is_valid, error_msg, activity_id = self.validator.validate_analytics_request(request_data)
+        if not is_valid:
+            return error_msg, None, None, None
+        
+        is_valid, error_msg, scope = self.validator.validate_analytics_scope(request_data)
+        if not is_valid:
+            return error_msg, None, None, None
+        
+        is_valid, error_msg, since = self.validator.validate_analytics_since(request_data)
+        if not is_valid:
+            return error_msg, None, None, None
+        
+        return None, activity_id, scope, since
+    
+    def _log_analytics_request(self, activity_id, scope, since, **fields):
+        # Evento de alto volume: amostrado e com limite de taxa (LOG_SAMPLE_RATES)
+        logger.info("analytics_request", extra={"fields": {
+            "activity_id": activity_id, "scope": scope, "since": since, **fields
+        }})
+    
+    def _build_analytics(self, activity_id, scope, since):
+        # Agregados da turma ou feed de mudanças; a lista completa por
+        # aluno é serializada pelo AnalyticsService e guardada no
+        # response_cache (get_analytics_response)
+        if scope == "class":
+            return {
+                "activityID": activity_id,
+                "classAnalytics": self.analytics.get_class_analytics(activity_id)
+            }
+        changes = self.analytics.service.get_changes_for_activity(activity_id, since)
+        return {"activityID": activity_id, **changes}
+    
     def handle_analytics_request(self, request_data):
         """
         Processa uma requisição de analytics de forma completa
@@ -85,24 +133,113 @@ class InveniraFacade:
         2. Busca dos dados de analytics
         3. Formatação da resposta
         
+        Com "scope": "class" no corpo, retorna as métricas agregadas da
+        turma em vez da lista por aluno. Com "since": <cursor>, retorna
+        só os alunos alterados depois do cursor e os IDs removidos.
+        
         Args:
             request_data (dict): Dados recebidos no POST da Inven!RA
             
         Returns:
             tuple: (success, data_or_error, status_code)
                 - success (bool): Se a operação foi bem-sucedida
-                - data_or_error: Lista de analytics ou mensagem de erro
+                - data_or_error: Lista de analytics, agregados da turma,
+                  mudanças ou mensagem de erro
                 - status_code (int): Código HTTP apropriado
         """
         # 1. VALIDAÇÃO
-        is_valid, error_msg, activity_id = self.validator.validate_analytics_request(request_data)
+        error_msg, activity_id, scope, since = self._validate_analytics_request(request_data)
         
-        if not is_valid:
+        if error_msg:
+            logger.warning("analytics_request_rejected", extra={"fields": {"error": error_msg}})
             return False, {"error": error_msg}, 400
         
         # 2. BUSCA E PROCESSAMENTO
-        print(f"--> [FACADE] Processando analytics para: {activity_id}")
-        analytics_data = self.analytics.get_analytics_for_activity(activity_id)
+        self._log_analytics_request(activity_id, scope, since)
+        if scope == "class" or since is not None:
+            analytics_data = self._build_analytics(activity_id, scope, since)
+        else:
+            analytics_data = self.analytics.get_analytics_for_activity(activity_id)
         
         # 3. RESPOSTA FORMATADA
         return True, analytics_data, 200
+    
+    def get_analytics_response(self, request_data, if_none_match=None):
+        """
+        Versão serializada e cacheada de handle_analytics_request
+        
+        A resposta de cada atividade é guardada já serializada e reutilizada
+        enquanto a versão da atividade não muda. Se o cliente enviar o ETag
+        atual em If-None-Match, retorna 304 sem corpo. As respostas do
+        feed de mudanças ("since") não passam pelo cache.
+        
+        Args:
+            request_data (dict): Dados recebidos no POST da Inven!RA
+            if_none_match (str, optional): Cabeçalho If-None-Match bruto
+            
+        Returns:
+            tuple: (status_code, body, etag)
+                - status_code (int): 200, 304 ou 400
+                - body (bytes): JSON serializado (vazio no 304)
+                - etag (str ou None): ETag da resposta
+        """
+        error_msg, activity_id, scope, since = self._validate_analytics_request(request_data)
+        
+        if error_msg:
+            logger.warning("analytics_request_rejected", extra={"fields": {"error": error_msg}})
+            return 400, json.dumps({"error": error_msg}).encode(), None
+        
+        if since is not None and scope == "student":
+            # Custo proporcional às mudanças; nada a reaproveitar no cache
+            self._log_analytics_request(activity_id, scope, since)
+            body = json.dumps(self._build_analytics(activity_id, scope, since), separators=(",", ":")).encode()
+            return 200, body, None
+        
+        version = self.analytics.repository.get_version(activity_id)
+        cache_key = activity_id if scope == "student" else (activity_id, scope)
+        entry = self.response_cache.get(cache_key, version)
+        self._log_analytics_request(activity_id, scope, since, cache_hit=entry is not None)
+        
+        if entry is None:
+            if scope == "class":
+                body = json.dumps(self._build_analytics(activity_id, scope, since), separators=(",", ":")).encode()
+            else:
+                body = self.analytics.service.serialize_analytics_for_activity(activity_id)
+            entry = self.response_cache.put(cache_key, version, body)
+        
+        if etag_matches(if_none_match, entry.etag):
+            return 304, b"", entry.etag
+        
+        return 200, entry.body, entry.etag
+    
+    def stream_analytics_response(self, request_data, ndjson=False):
+        """
+        Versão em streaming de get_analytics_response
+        
+        O corpo é gerado à medida que é enviado (chunked), sem montar a
+        lista da turma em memória. Não passa pelo cache nem gera ETag,
+        pois o conteúdo só é conhecido ao final do envio. Os agregados
+        ("scope": "class") e o feed de mudanças ("since") são pequenos e
+        são enviados de uma vez.
+        
+        Args:
+            request_data (dict): Dados recebidos no POST da Inven!RA
+            ndjson (bool): Um aluno por linha (application/x-ndjson)
+            
+        Returns:
+            tuple: (status_code, body, mimetype)
+                - body: bytes ou iterador de bytes
+        """
+        error_msg, activity_id, scope, since = self._validate_analytics_request(request_data)
+        
+        if error_msg:
+            logger.warning("analytics_request_rejected", extra={"fields": {"error": error_msg}})
+            return 400, json.dumps({"error": error_msg}).encode(), "application/json"
+        
+        if scope == "class" or since is not None:
+            status, body, _ = self.get_analytics_response(request_data)
+            return status, body, "application/json"
+        
+        self._log_analytics_request(activity_id, scope, since, stream="ndjson" if ndjson else "json")
+        body = self.analytics.service.stream_analytics_for_activity(activity_id, ndjson=ndjson)
+        return 200, body, "application/x-ndjson" if ndjson else "application/json"
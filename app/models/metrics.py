@@ -1,18 +1,28 @@
 # ==========================================
 # PADRÃO DE CRIAÇÃO: FACTORY METHOD
 # ==========================================
+import json
 
 # 1. Interface (Produto Abstrato)
+# __slots__ elimina o __dict__ de cada métrica (uma turma de 5.000 alunos
+# cria 15.000 métricas por chamada de analytics)
 class Metric:
+    __slots__ = ("name", "value", "data_type")
+
+    def __init__(self, name, value, data_type):
+        self.name = name
+        self.value = value
+        self.data_type = data_type
+
     def to_json(self):
         raise NotImplementedError("Subclasses devem implementar to_json")
 
 # 2. Produtos Concretos
 class QuantitativeMetric(Metric):
+    __slots__ = ()
+
     def __init__(self, name, value, data_type="integer"):
-        self.name = name
-        self.value = value
-        self.data_type = data_type
+        super().__init__(name, value, data_type)
 
     def to_json(self):
         return {
@@ -22,10 +32,10 @@ class QuantitativeMetric(Metric):
         }
 
 class QualitativeMetric(Metric):
+    __slots__ = ()
+
     def __init__(self, name, value, data_type="text/plain"):
-        self.name = name
-        self.value = value
-        self.data_type = data_type
+        super().__init__(name, value, data_type)
 
     def to_json(self):
         return {
@@ -35,16 +45,113 @@ class QualitativeMetric(Metric):
         }
 
 # 3. A Fábrica (Creator, que tambem atua como creatorConcrete neste caso (Parameterized Factory Method))
+# O despacho usa um registro pré-calculado (categoria -> classe, tipo padrão)
+# em vez de uma cadeia de comparações de strings a cada chamada
 class MetricFactory:
-    @staticmethod
-    def create_metric(category, name, value, data_type=None):
-        if category == "quant":
-            dtype = data_type if data_type else "integer"
-            return QuantitativeMetric(name, value, dtype)
-        
-        elif category == "qual":
-            dtype = data_type if data_type else "text/plain"
-            return QualitativeMetric(name, value, dtype)
-            
-        else:
-            raise ValueError(f"Tipo de métrica desconhecido: {category}")
+    _registry = {
+        "quant": (QuantitativeMetric, "integer"),
+        "qual": (QualitativeMetric, "text/plain"),
+    }
+
+    @classmethod
+    def register(cls, category, metric_cls, default_type):
+        cls._registry[category] = (metric_cls, default_type)
+
+    @classmethod
+    def create_metric(cls, category, name, value, data_type=None):
+        try:
+            metric_cls, default_type = cls._registry[category]
+        except KeyError:
+            raise ValueError(f"Tipo de métrica desconhecido: {category}") from None
+        return metric_cls(name, value, data_type or default_type)
+
+# 4. Serialização em lote
+# Produz o mesmo JSON que to_json() + json.dumps, mas para a turma inteira,
+# sem criar objetos Metric nem dicts intermediários por aluno
+_encode_string = json.encoder.encode_basestring_ascii
+
+
+def _encode_value(value):
+    # Fast path para os tipos mais comuns dos registros
+    if type(value) is int:
+        return str(value)
+    if type(value) is str:
+        return _encode_string(value)
+    return json.dumps(value)
+
+
+class BulkMetricSerializer:
+    """
+    Serializa as métricas de uma turma diretamente para JSON
+
+    Args:
+        quant_fields (list): (nome_métrica, chave_no_registro) quantitativas
+        qual_fields (list): (nome_métrica, chave_no_registro) qualitativas
+    """
+
+    def __init__(self, quant_fields, qual_fields, id_field="student_id"):
+        self.id_field = id_field
+        self.fields = []
+        # Fragmentos constantes pré-calculados: só os valores variam por aluno
+        prefixes = []
+        for category, fields in (("quant", quant_fields), ("qual", qual_fields)):
+            _, data_type = MetricFactory._registry[category]
+            for index, (metric_name, record_key) in enumerate(fields):
+                opening = ('"quantAnalytics":[' if category == "quant" else '"qualAnalytics":[') if index == 0 else ","
+                prefixes.append(
+                    opening + '{"name":' + _encode_string(metric_name)
+                    + ',"type":' + _encode_string(data_type) + ',"value":'
+                )
+                self.fields.append(record_key)
+        self._prefixes = prefixes
+        self._quant_count = len(quant_fields)
+
+    def serialize_student(self, record):
+        """Retorna o JSON (str) de um aluno"""
+        parts = ['{"inveniraStdID":', _encode_value(record[self.id_field]), ","]
+        prefixes = self._prefixes
+        for index, record_key in enumerate(self.fields):
+            if index == self._quant_count and index:
+                parts.append("],")
+            parts.append(prefixes[index])
+            parts.append(_encode_value(record[record_key]))
+            parts.append("}")
+        parts.append("]}")
+        return "".join(parts)
+
+    def serialize_class(self, records):
+        """Retorna o JSON (bytes) da turma inteira como uma lista"""
+        return ("[" + ",".join(map(self.serialize_student, records)) + "]").encode()
+
+    def iter_class(self, records, chunk_size=500):
+        """
+        Gera o mesmo JSON de serialize_class em pedaços (bytes)
+
+        Cada pedaço contém até chunk_size alunos; records pode ser um
+        gerador, então só um pedaço fica em memória de cada vez.
+        """
+        separator = "["
+        chunk = []
+        for record in records:
+            chunk.append(separator)
+            chunk.append(self.serialize_student(record))
+            separator = ","
+            if len(chunk) >= 2 * chunk_size:
+                yield "".join(chunk).encode()
+                chunk = []
+        if separator == "[":
+            chunk.append("[")
+        chunk.append("]")
+        yield "".join(chunk).encode()
+
+    def iter_ndjson(self, records, chunk_size=500):
+        """Gera um aluno por linha (NDJSON), em pedaços de até chunk_size alunos"""
+        chunk = []
+        for record in records:
+            chunk.append(self.serialize_student(record))
+            chunk.append("\n")
+            if len(chunk) >= 2 * chunk_size:
+                yield "".join(chunk).encode()
+                chunk = []
+        if chunk:
+            yield "".join(chunk).encode()
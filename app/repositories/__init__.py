@@ -0,0 +1,22 @@
+"""
+Módulo de repositórios - Camada de acesso aos dados dos estudantes
+"""
+from .base_repository import StudentRepository
+from .student_progress_repository import ActivityRecords, StudentProgressRepository
+from .sqlite_repository import SQLiteStudentRepository
+from .columnar_repository import ColumnarActivityTable, ColumnarStudentRepository
+from .student_query import StudentQuery, SortedStudentIndex
+from .repository_factory import create_repository, get_shared_repository
+
+__all__ = [
+    'StudentRepository',
+    'ActivityRecords',
+    'StudentProgressRepository',
+    'SQLiteStudentRepository',
+    'ColumnarActivityTable',
+    'ColumnarStudentRepository',
+    'StudentQuery',
+    'SortedStudentIndex',
+    'create_repository',
+    'get_shared_repository'
+]
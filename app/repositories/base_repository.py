@@ -0,0 +1,254 @@
+"""
+Interface base dos motores de armazenamento do progresso dos estudantes
+
+Os comandos do jogo e a Facade dependem apenas desta interface, o que
+permite trocar o armazenamento em memória pelo SQLite (ou outro motor)
+sem alterar a lógica de negócio.
+"""
+
+import threading
+from abc import ABC, abstractmethod
+
+from .change_feed import ChangeLog
+from .student_query import SortedStudentIndex
+
+
+class StudentRepository(ABC):
+    """
+    Interface dos motores de armazenamento
+
+    Além das operações abstratas, oferece a interface de mapeamento do
+    antigo fake_database (activity_id in repo, repo[activity_id],
+    del repo[activity_id]) implementada sobre essas operações.
+
+    Rastreamento de mudanças:
+    - get_version(activity_id) retorna um contador incrementado a cada
+      escrita na atividade, usado para invalidar caches
+    - add_change_listener(listener) registra um callback chamado com
+      (activity_id, student_id) após cada escrita (student_id é None
+      quando a atividade inteira é removida)
+    - changes_since(activity_id, cursor) retorna só o que mudou depois
+      do cursor (ver change_feed)
+    """
+
+    # Motores que não registram as mudanças no próprio armazenamento
+    # usam o ChangeLog em memória para responder changes_since
+    uses_change_log = True
+
+    # Motores que fazem E/S bloqueante (disco) são chamados numa thread
+    # pelos handlers assíncronos do modo ASGI
+    blocking_io = False
+
+    # Motores cujas escritas sobrevivem ao reinício do processo: o journal
+    # de comandos não as reexecuta na recuperação
+    durable = False
+
+    def __init__(self):
+        self._change_listeners = []
+        self._student_index = None
+        self._student_index_lock = threading.Lock()
+        self._change_log = ChangeLog(self) if self.uses_change_log else None
+
+    # ========== RASTREAMENTO DE MUDANÇAS ==========
+
+    def add_change_listener(self, listener):
+        """Registra um callback notificado após cada escrita"""
+        self._change_listeners.append(listener)
+
+    def remove_change_listener(self, listener):
+        """Remove um callback registrado"""
+        self._change_listeners.remove(listener)
+
+    def _notify_change(self, activity_id, student_id):
+        for listener in self._change_listeners:
+            listener(activity_id, student_id)
+
+    @abstractmethod
+    def get_version(self, activity_id):
+        """
+        Retorna a versão atual da atividade
+
+        A versão nunca volta atrás, nem quando a atividade é removida,
+        portanto (activity_id, versão) identifica um estado de forma única.
+
+        Returns:
+            int: Versão (0 se a atividade nunca foi escrita)
+        """
+        pass
+
+    # ========== INTERFACE DE MAPEAMENTO (COMPATIBILIDADE) ==========
+
+    def __contains__(self, activity_id):
+        return self.has_activity(activity_id)
+
+    def __getitem__(self, activity_id):
+        if not self.has_activity(activity_id):
+            raise KeyError(activity_id)
+        return self.list_students(activity_id)
+
+    def __delitem__(self, activity_id):
+        if not self.delete_activity(activity_id):
+            raise KeyError(activity_id)
+
+    def get(self, activity_id, default=None):
+        return self[activity_id] if self.has_activity(activity_id) else default
+
+    # ========== OPERAÇÕES DO MOTOR ==========
+
+    @abstractmethod
+    def has_activity(self, activity_id):
+        """Indica se a atividade já possui registros"""
+        pass
+
+    @abstractmethod
+    def list_activities(self):
+        """
+        Retorna os IDs de todas as atividades existentes
+
+        Returns:
+            list: IDs das atividades
+        """
+        pass
+
+    @abstractmethod
+    def list_students(self, activity_id):
+        """
+        Retorna os registros da atividade em ordem de inserção
+
+        Returns:
+            list: Registros dos alunos (lista vazia se a atividade não existe)
+        """
+        pass
+
+    def iter_students(self, activity_id, batch_size=500):
+        """
+        Percorre os registros da atividade em ordem de inserção, lendo o
+        armazenamento em lotes de batch_size
+
+        Usado pelas respostas em streaming: os motores que guardam os
+        dados fora de objetos Python (SQLite, colunar) não montam a turma
+        inteira em memória. A implementação padrão recorre a list_students.
+
+        Yields:
+            dict: Registros dos alunos
+        """
+        yield from self.list_students(activity_id)
+
+    def query_students(self, activity_id, query):
+        """
+        Retorna uma página de alunos filtrada e ordenada
+
+        A implementação padrão usa índices secundários ordenados em
+        memória (SortedStudentIndex), criados na primeira consulta e
+        mantidos pelos listeners de mudança.
+
+        Args:
+            query (StudentQuery): Cursor, limite, filtros e ordenação
+
+        Returns:
+            tuple: (registros da página, próximo cursor ou None)
+        """
+        if self._student_index is None:
+            with self._student_index_lock:
+                if self._student_index is None:
+                    self._student_index = SortedStudentIndex(self)
+        return self._student_index.query(activity_id, query)
+
+    def changes_since(self, activity_id, since):
+        """
+        Retorna o que mudou na atividade depois do cursor informado
+
+        Args:
+            since (int): Cursor de uma resposta anterior (0: tudo)
+
+        Returns:
+            ChangeSet: Alunos alterados, IDs removidos e o novo cursor
+        """
+        return self._change_log.changes_since(activity_id, since)
+
+    @abstractmethod
+    def get_student(self, activity_id, student_id):
+        """Retorna o registro do aluno ou None"""
+        pass
+
+    @abstractmethod
+    def save_student(self, activity_id, student_id, time_played, words_learned, feedback):
+        """
+        Cria ou substitui o progresso de um aluno
+
+        Returns:
+            dict: Registro salvo
+        """
+        pass
+
+    @abstractmethod
+    def increment_student(self, activity_id, student_id, additional_time, additional_words):
+        """
+        Soma tempo e palavras ao progresso existente
+
+        Returns:
+            dict ou None: Registro atualizado ou None se o aluno não existe
+        """
+        pass
+
+    @abstractmethod
+    def remove_student(self, activity_id, student_id):
+        """
+        Remove o aluno da atividade
+
+        Returns:
+            dict ou None: Registro removido ou None se o aluno não existe
+        """
+        pass
+
+    @abstractmethod
+    def restore_student(self, activity_id, record):
+        """
+        Reinsere um registro previamente removido (usado pelo undo)
+
+        Returns:
+            bool: False se a atividade não existe mais
+        """
+        pass
+
+    @abstractmethod
+    def delete_activity(self, activity_id):
+        """
+        Remove a atividade e todos os seus registros
+
+        Returns:
+            bool: False se a atividade não existia
+        """
+        pass
+
+    @abstractmethod
+    def transaction(self):
+        """
+        Context manager que agrupa várias escritas numa única transação
+
+        Exemplo:
+            with repository.transaction():
+                repository.save_student(...)
+                repository.save_student(...)
+        """
+        pass
+
+    def seed(self, initial_data):
+        """
+        Carrega dados iniciais apenas nas atividades que ainda não existem
+
+        Args:
+            initial_data (dict): activity_id -> lista de registros
+        """
+        with self.transaction():
+            for activity_id, records in initial_data.items():
+                if self.has_activity(activity_id):
+                    continue
+                for record in records:
+                    self.save_student(
+                        activity_id,
+                        record["student_id"],
+                        record["time"],
+                        record["words"],
+                        record["note"]
+                    )
@@ -0,0 +1,121 @@
+"""
+Feed de mudanças por atividade ("o que mudou desde o cursor N")
+
+O cursor é a versão da atividade (get_version), incrementada a cada
+escrita. Um consumidor guarda o cursor da última resposta e, na
+consulta seguinte, recebe apenas os alunos alterados depois dele e os
+IDs removidos (tombstones), com custo proporcional às mudanças.
+
+Quando o cursor é anterior ao histórico disponível (atividade removida,
+tombstones descartados, ou um cursor de outra instância), a resposta é
+completa (full=True) e o consumidor deve substituir o que tem.
+"""
+
+import threading
+from collections import OrderedDict, deque
+
+
+class ChangeSet:
+    """
+    Resultado de changes_since
+
+    Atributos:
+        records (list): Registros alterados (ou a turma inteira se full)
+        deleted (list): IDs removidos depois do cursor
+        cursor (int): Cursor a usar na próxima consulta
+        full (bool): True se records é a turma inteira
+    """
+
+    __slots__ = ("records", "deleted", "cursor", "full")
+
+    def __init__(self, records, deleted, cursor, full):
+        self.records = records
+        self.deleted = deleted
+        self.cursor = cursor
+        self.full = full
+
+
+class ChangeLog:
+    """
+    Registro em memória das mudanças, alimentado pelos listeners
+
+    Guarda, por atividade, a versão da última mudança de cada aluno em
+    ordem crescente (OrderedDict), então uma consulta percorre só o final
+    do registro. Os tombstones são limitados a max_tombstones por
+    atividade; ao descartar o mais antigo, o horizonte avança e cursores
+    anteriores passam a receber a turma inteira.
+    """
+
+    MAX_TOMBSTONES = 10000
+
+    def __init__(self, repository, max_tombstones=MAX_TOMBSTONES):
+        self.repository = repository
+        self.max_tombstones = max_tombstones
+        # activity_id -> OrderedDict(student_id -> (versão, removido))
+        self._entries = {}
+        # activity_id -> deque[(versão, student_id)] dos tombstones
+        self._tombstones = {}
+        # activity_id -> versão a partir da qual o registro é completo
+        self._horizons = {}
+        self._lock = threading.Lock()
+        repository.add_change_listener(self._on_change)
+
+    def _on_change(self, activity_id, student_id):
+        # Chamado com o lock do repositório: as versões chegam em ordem
+        version = self.repository.get_version(activity_id)
+        if student_id is None:
+            with self._lock:
+                self._entries.pop(activity_id, None)
+                self._tombstones.pop(activity_id, None)
+                self._horizons[activity_id] = version
+            return
+
+        deleted = self.repository.get_student(activity_id, student_id) is None
+        with self._lock:
+            entries = self._entries.get(activity_id)
+            if entries is None:
+                entries = self._entries[activity_id] = OrderedDict()
+                self._tombstones[activity_id] = deque()
+                # Mudanças anteriores a esta não foram observadas
+                self._horizons.setdefault(activity_id, version - 1)
+
+            entries.pop(student_id, None)
+            entries[student_id] = (version, deleted)
+            if deleted:
+                self._add_tombstone(activity_id, entries, version, student_id)
+
+    def _add_tombstone(self, activity_id, entries, version, student_id):
+        tombstones = self._tombstones[activity_id]
+        tombstones.append((version, student_id))
+        while len(tombstones) > self.max_tombstones:
+            old_version, old_student = tombstones.popleft()
+            # Ignora tombstones de alunos que voltaram a ser salvos
+            if entries.get(old_student) == (old_version, True):
+                del entries[old_student]
+                self._horizons[activity_id] = max(self._horizons[activity_id], old_version)
+
+    def changes_since(self, activity_id, since):
+        version = self.repository.get_version(activity_id)
+        with self._lock:
+            horizon = self._horizons.get(activity_id, version)
+            if since <= 0 or since < horizon or since > version:
+                changed = None
+            else:
+                changed = []
+                for student_id, (changed_at, deleted) in reversed(self._entries.get(activity_id, {}).items()):
+                    if changed_at <= since:
+                        break
+                    changed.append((student_id, deleted))
+
+        if changed is None:
+            return ChangeSet(self.repository.list_students(activity_id), [], version, True)
+
+        records = []
+        deleted_ids = []
+        for student_id, deleted in reversed(changed):
+            record = None if deleted else self.repository.get_student(activity_id, student_id)
+            if record is None:
+                deleted_ids.append(student_id)
+            else:
+                records.append(record)
+        return ChangeSet(records, deleted_ids, version, False)
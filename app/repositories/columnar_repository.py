@@ -0,0 +1,367 @@
+"""
+Motor de armazenamento colunar (NumPy) do progresso dos estudantes
+
+Cada atividade é uma tabela colunar:
+- time e words em arrays NumPy int64 (8 bytes por aluno por coluna)
+- student_id numa tabela de strings internadas (sys.intern) + índice hash
+- note num buffer único de bytes UTF-8, endereçado por offset/tamanho
+
+Remoções marcam a linha como morta e a tabela é compactada quando
+metade das linhas está morta, preservando a ordem de inserção.
+
+As consultas agregadas (média, mediana, percentis, top-N, histogramas)
+são vetorizadas sobre as colunas, sem materializar os registros.
+"""
+
+import sys
+import threading
+
+import numpy as np
+
+from .base_repository import StudentRepository
+
+COLUMNS = ("time", "words")
+
+
+class ColumnarActivityTable:
+    """
+    Tabela colunar dos alunos de uma atividade
+    """
+
+    INITIAL_CAPACITY = 64
+
+    def __init__(self, capacity=INITIAL_CAPACITY):
+        capacity = max(capacity, 1)
+        self._size = 0
+        self._live = 0
+        self._time = np.zeros(capacity, dtype=np.int64)
+        self._words = np.zeros(capacity, dtype=np.int64)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._note_offsets = np.zeros(capacity, dtype=np.int64)
+        # -1 representa note = None
+        self._note_lengths = np.zeros(capacity, dtype=np.int64)
+        self._notes = bytearray()
+        self._note_garbage = 0
+        self._ids = []
+        self._rows = {}
+
+    @classmethod
+    def from_records(cls, records):
+        """Monta uma tabela a partir de registros no formato de dict"""
+        records = list(records)
+        table = cls(capacity=len(records))
+        for record in records:
+            table.upsert(record["student_id"], record["time"], record["words"], record["note"])
+        return table
+
+    def __len__(self):
+        return self._live
+
+    def __contains__(self, student_id):
+        return student_id in self._rows
+
+    def student_ids(self):
+        """IDs dos alunos vivos, em ordem"""
+        ids = self._ids
+        return [ids[row] for row in np.flatnonzero(self._alive[:self._size])]
+
+    def __iter__(self):
+        for row in range(self._size):
+            if self._alive[row]:
+                yield self._record(row)
+
+    # ========== ARMAZENAMENTO ==========
+
+    def _grow(self):
+        capacity = len(self._time) * 2
+        for name in ("_time", "_words", "_alive", "_note_offsets", "_note_lengths"):
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:len(column)] = column
+            setattr(self, name, grown)
+
+    def _store_note(self, row, note):
+        if self._note_lengths[row] > 0:
+            self._note_garbage += int(self._note_lengths[row])
+        if note is None:
+            self._note_lengths[row] = -1
+            return
+        encoded = str(note).encode("utf-8")
+        self._note_offsets[row] = len(self._notes)
+        self._note_lengths[row] = len(encoded)
+        self._notes += encoded
+
+    def _load_note(self, row):
+        length = int(self._note_lengths[row])
+        if length < 0:
+            return None
+        offset = int(self._note_offsets[row])
+        return self._notes[offset:offset + length].decode("utf-8")
+
+    def _record(self, row):
+        return {
+            "student_id": self._ids[row],
+            "time": int(self._time[row]),
+            "words": int(self._words[row]),
+            "note": self._load_note(row)
+        }
+
+    def _compact(self):
+        rows = np.flatnonzero(self._alive[:self._size])
+        capacity = max(len(rows) * 2, self.INITIAL_CAPACITY)
+
+        notes = bytearray()
+        offsets = np.zeros(capacity, dtype=np.int64)
+        lengths = np.zeros(capacity, dtype=np.int64)
+        for new_row, row in enumerate(rows):
+            length = int(self._note_lengths[row])
+            lengths[new_row] = length
+            if length > 0:
+                offset = int(self._note_offsets[row])
+                offsets[new_row] = len(notes)
+                notes += self._notes[offset:offset + length]
+
+        for name in ("_time", "_words"):
+            column = np.zeros(capacity, dtype=np.int64)
+            column[:len(rows)] = getattr(self, name)[rows]
+            setattr(self, name, column)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._alive[:len(rows)] = True
+        self._note_offsets = offsets
+        self._note_lengths = lengths
+        self._notes = notes
+        self._note_garbage = 0
+
+        self._ids = [self._ids[row] for row in rows]
+        self._rows = {student_id: row for row, student_id in enumerate(self._ids)}
+        self._size = len(rows)
+
+    def get(self, student_id):
+        row = self._rows.get(student_id)
+        return self._record(row) if row is not None else None
+
+    def upsert(self, student_id, time_played, words_learned, feedback):
+        """Cria ou substitui o registro do aluno, preservando sua posição"""
+        row = self._rows.get(student_id)
+        if row is None:
+            if self._size == len(self._time):
+                self._grow()
+            row = self._size
+            self._size += 1
+            self._live += 1
+            self._ids.append(sys.intern(student_id))
+            self._rows[self._ids[row]] = row
+            self._alive[row] = True
+            self._note_lengths[row] = 0
+
+        self._time[row] = int(time_played)
+        self._words[row] = int(words_learned)
+        self._store_note(row, feedback)
+        return self._record(row)
+
+    def increment(self, student_id, additional_time, additional_words):
+        row = self._rows.get(student_id)
+        if row is None:
+            return None
+        self._time[row] += int(additional_time)
+        self._words[row] += int(additional_words)
+        return self._record(row)
+
+    def remove(self, student_id):
+        row = self._rows.pop(student_id, None)
+        if row is None:
+            return None
+
+        record = self._record(row)
+        self._alive[row] = False
+        if self._note_lengths[row] > 0:
+            self._note_garbage += int(self._note_lengths[row])
+        self._live -= 1
+
+        # Compacta quando metade das linhas (ou do buffer de notas) é lixo
+        if self._size - self._live > max(self._live, self.INITIAL_CAPACITY // 2) or \
+                self._note_garbage > max(len(self._notes) // 2, 4096):
+            self._compact()
+        return record
+
+    # ========== CONSULTAS VETORIZADAS ==========
+
+    def column(self, name):
+        """Valores vivos de uma coluna numérica (time ou words), em ordem"""
+        if name not in COLUMNS:
+            raise ValueError(f"Coluna desconhecida: {name}")
+        values = getattr(self, "_" + name)[:self._size]
+        return values[self._alive[:self._size]]
+
+    def describe(self, name, percentiles=(25, 50, 75, 90, 95, 99)):
+        """
+        Estatísticas descritivas de uma coluna
+
+        Returns:
+            dict: count, mean, median, min, max, std e percentis (p25, p50, ...)
+        """
+        values = self.column(name)
+        if len(values) == 0:
+            return {"count": 0}
+
+        computed = np.percentile(values, percentiles)
+        stats = {
+            "count": int(len(values)),
+            "mean": float(values.mean()),
+            "median": float(np.median(values)),
+            "min": int(values.min()),
+            "max": int(values.max()),
+            "std": float(values.std())
+        }
+        for percentile, value in zip(percentiles, computed):
+            stats[f"p{percentile:g}"] = float(value)
+        return stats
+
+    def top_n(self, name, n=10):
+        """
+        Os n alunos com maior valor na coluna (ordem decrescente)
+
+        Usa argpartition: O(len) em vez de ordenar a turma inteira.
+        """
+        alive_rows = np.flatnonzero(self._alive[:self._size])
+        values = getattr(self, "_" + name)[alive_rows]
+        n = min(n, len(values))
+        if n <= 0:
+            return []
+
+        candidates = np.argpartition(-values, n - 1)[:n]
+        ordered = candidates[np.argsort(-values[candidates], kind="stable")]
+        return [
+            {"student_id": self._ids[alive_rows[index]], name: int(values[index])}
+            for index in ordered
+        ]
+
+    def histogram(self, name, bins=10):
+        """
+        Histograma de uma coluna
+
+        Returns:
+            dict: counts (lista) e edges (limites das faixas)
+        """
+        values = self.column(name)
+        if len(values) == 0:
+            return {"counts": [], "edges": []}
+        counts, edges = np.histogram(values, bins=bins)
+        return {"counts": counts.tolist(), "edges": edges.tolist()}
+
+
+class ColumnarStudentRepository(StudentRepository):
+    """
+    Motor de armazenamento em memória com tabelas colunares por atividade
+
+    Mesma semântica do StudentProgressRepository (RLock, versões,
+    listeners), mas os registros retornados são cópias montadas a partir
+    das colunas.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.RLock()
+        self._tables = {}
+        self._versions = {}
+
+    def _touch(self, activity_id, student_id):
+        self._versions[activity_id] = self._versions.get(activity_id, 0) + 1
+        self._notify_change(activity_id, student_id)
+
+    def query_table(self, activity_id, query):
+        """
+        Executa uma consulta sobre a tabela da atividade sob o lock
+
+        Args:
+            query (callable): Recebe a ColumnarActivityTable (vazia se a
+                              atividade não existe) e retorna o resultado
+        """
+        with self._lock:
+            table = self._tables.get(activity_id)
+            return query(table if table is not None else ColumnarActivityTable())
+
+    def get_version(self, activity_id):
+        with self._lock:
+            return self._versions.get(activity_id, 0)
+
+    def has_activity(self, activity_id):
+        with self._lock:
+            return activity_id in self._tables
+
+    def list_activities(self):
+        with self._lock:
+            return list(self._tables)
+
+    def list_students(self, activity_id):
+        with self._lock:
+            table = self._tables.get(activity_id)
+            return list(table) if table is not None else []
+
+    def iter_students(self, activity_id, batch_size=500):
+        # Copia só a lista de IDs (referências); os registros são montados
+        # lote a lote. Alunos removidos no meio do caminho são ignorados.
+        with self._lock:
+            table = self._tables.get(activity_id)
+            if table is None:
+                return
+            student_ids = table.student_ids()
+
+        for start in range(0, len(student_ids), batch_size):
+            with self._lock:
+                table = self._tables.get(activity_id)
+                if table is None:
+                    return
+                batch = [table.get(student_id) for student_id in student_ids[start:start + batch_size]]
+            for record in batch:
+                if record is not None:
+                    yield record
+
+    def get_student(self, activity_id, student_id):
+        with self._lock:
+            table = self._tables.get(activity_id)
+            return table.get(student_id) if table is not None else None
+
+    def save_student(self, activity_id, student_id, time_played, words_learned, feedback):
+        with self._lock:
+            table = self._tables.get(activity_id)
+            if table is None:
+                table = self._tables[activity_id] = ColumnarActivityTable()
+            record = table.upsert(student_id, time_played, words_learned, feedback)
+            self._touch(activity_id, student_id)
+            return record
+
+    def increment_student(self, activity_id, student_id, additional_time, additional_words):
+        with self._lock:
+            table = self._tables.get(activity_id)
+            record = table.increment(student_id, additional_time, additional_words) if table is not None else None
+            if record is not None:
+                self._touch(activity_id, student_id)
+            return record
+
+    def remove_student(self, activity_id, student_id):
+        with self._lock:
+            table = self._tables.get(activity_id)
+            removed = table.remove(student_id) if table is not None else None
+            if removed is not None:
+                self._touch(activity_id, student_id)
+            return removed
+
+    def restore_student(self, activity_id, record):
+        with self._lock:
+            table = self._tables.get(activity_id)
+            if table is None:
+                return False
+            table.upsert(record["student_id"], record["time"], record["words"], record["note"])
+            self._touch(activity_id, record["student_id"])
+            return True
+
+    def delete_activity(self, activity_id):
+        with self._lock:
+            if self._tables.pop(activity_id, None) is None:
+                return False
+            self._touch(activity_id, None)
+            return True
+
+    def transaction(self):
+        return self._lock
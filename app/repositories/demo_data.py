@@ -0,0 +1,14 @@
+"""
+Dados de demonstração (simulação de banco de dados multi-turma)
+"""
+
+DEMO_DATA = {
+    "instancia_turma_A": [
+        {"student_id": "Student_Joao", "time": 120, "words": 15, "note": "Bom começo"},
+        {"student_id": "Student_Maria", "time": 300, "words": 50, "note": "Excelente"}
+    ],
+    "instancia_turma_B": [
+        {"student_id": "Student_Pedro", "time": 10, "words": 0, "note": "Desistiu"},
+        {"student_id": "Student_Ana", "time": 400, "words": 45, "note": "Muito dedicada"}
+    ]
+}
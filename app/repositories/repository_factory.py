@@ -0,0 +1,67 @@
+"""
+Fábrica dos motores de armazenamento
+
+O motor é escolhido pela configuração (variáveis de ambiente
+STORAGE_ENGINE e SQLITE_PATH), permitindo trocar de motor sem
+alterar os comandos ou a Facade.
+"""
+
+import threading
+
+from config.config import Config
+from .demo_data import DEMO_DATA
+from .sqlite_repository import SQLiteStudentRepository
+from .columnar_repository import ColumnarStudentRepository
+from .student_progress_repository import StudentProgressRepository
+
+
+def create_repository(engine=None, seed_demo_data=True, **options):
+    """
+    Cria um motor de armazenamento
+
+    Args:
+        engine (str, optional): "memory", "columnar" ou "sqlite" (padrão: Config.STORAGE_ENGINE)
+        seed_demo_data (bool): Carrega as turmas de demonstração se ainda não existem
+        **options: Parâmetros específicos do motor (ex.: db_path para o SQLite)
+
+    Returns:
+        StudentRepository: Motor de armazenamento configurado
+    """
+    engine = engine or Config.STORAGE_ENGINE
+
+    if engine == "memory":
+        repository = StudentProgressRepository()
+    elif engine == "columnar":
+        repository = ColumnarStudentRepository()
+    elif engine == "sqlite":
+        repository = SQLiteStudentRepository(options.get("db_path", Config.SQLITE_PATH))
+    else:
+        raise ValueError(f"Motor de armazenamento desconhecido: {engine}")
+
+    if seed_demo_data:
+        repository.seed(DEMO_DATA)
+
+    return repository
+
+
+_shared_repository = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_repository():
+    """
+    Retorna o motor de armazenamento compartilhado pelo processo
+
+    É a fonte única de dados lida pelo caminho Command (AnalyticsService)
+    e pelo caminho Facade (AnalyticsSubsystem), de modo que o progresso
+    salvo em /game/save-progress aparece em /analytics-data.
+
+    Returns:
+        StudentRepository: Instância única, criada na primeira chamada
+    """
+    global _shared_repository
+    if _shared_repository is None:
+        with _shared_lock:
+            if _shared_repository is None:
+                _shared_repository = create_repository()
+    return _shared_repository
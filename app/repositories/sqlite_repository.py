@@ -0,0 +1,379 @@
+"""
+Motor de armazenamento SQLite do progresso dos estudantes
+
+Persiste os dados em disco, de modo que o progresso sobrevive a
+reinícios do gunicorn e é compartilhado entre os workers.
+
+Otimizações:
+- journal_mode=WAL: leitores não bloqueiam o escritor (e vice-versa)
+- synchronous=NORMAL: seguro em WAL e evita um fsync por commit
+- SQL constante: o sqlite3 reaproveita as instruções preparadas
+  através do cache de statements de cada conexão
+- Índice único em (activity_id, student_id) para buscas O(log n) e
+  índice em (activity_id, id) para listar a turma sem ordenação extra
+- Índices em (activity_id, time, id) e (activity_id, words, id) para
+  as consultas paginadas ordenadas (query_students)
+- transaction() agrupa várias escritas num único commit
+"""
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from .base_repository import StudentRepository
+from .change_feed import ChangeSet
+from .student_query import encode_cursor
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS activities (
+    activity_id TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS students (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    activity_id TEXT NOT NULL,
+    student_id TEXT NOT NULL,
+    time INTEGER NOT NULL,
+    words INTEGER NOT NULL,
+    note TEXT NOT NULL,
+    changed_version INTEGER NOT NULL DEFAULT 0
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_students_activity_student
+    ON students (activity_id, student_id);
+CREATE INDEX IF NOT EXISTS idx_students_activity_order
+    ON students (activity_id, id);
+CREATE INDEX IF NOT EXISTS idx_students_activity_time
+    ON students (activity_id, time, id);
+CREATE INDEX IF NOT EXISTS idx_students_activity_words
+    ON students (activity_id, words, id);
+CREATE TABLE IF NOT EXISTS activity_versions (
+    activity_id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    horizon INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS tombstones (
+    activity_id TEXT NOT NULL,
+    student_id TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    PRIMARY KEY (activity_id, student_id)
+);
+"""
+
+# Colunas do feed de mudanças adicionadas a bancos criados antes dele
+MIGRATIONS = (
+    ("students", "changed_version", "INTEGER NOT NULL DEFAULT 0"),
+    ("activity_versions", "horizon", "INTEGER NOT NULL DEFAULT 0"),
+)
+
+# Criados depois das migrações, pois dependem das colunas novas
+SCHEMA_CHANGE_FEED = """
+CREATE INDEX IF NOT EXISTS idx_students_activity_changed
+    ON students (activity_id, changed_version);
+CREATE INDEX IF NOT EXISTS idx_tombstones_activity_version
+    ON tombstones (activity_id, version);
+"""
+
+SQL_LIST_ACTIVITIES = "SELECT activity_id FROM activities ORDER BY activity_id"
+SQL_HAS_ACTIVITY = "SELECT 1 FROM activities WHERE activity_id = ?"
+SQL_INSERT_ACTIVITY = "INSERT OR IGNORE INTO activities (activity_id) VALUES (?)"
+SQL_DELETE_ACTIVITY = "DELETE FROM activities WHERE activity_id = ?"
+SQL_DELETE_ACTIVITY_STUDENTS = "DELETE FROM students WHERE activity_id = ?"
+# A ordenação por id reproduz a ordem de inserção do motor em memória
+SQL_LIST_STUDENTS = (
+    "SELECT student_id, time, words, note FROM students "
+    "WHERE activity_id = ? ORDER BY id"
+)
+# Paginação por chave (id > último visto): cada lote é uma busca no índice
+SQL_LIST_STUDENTS_AFTER = (
+    "SELECT id, student_id, time, words, note FROM students "
+    "WHERE activity_id = ? AND id > ? ORDER BY id LIMIT ?"
+)
+SQL_GET_STUDENT = (
+    "SELECT student_id, time, words, note FROM students "
+    "WHERE activity_id = ? AND student_id = ?"
+)
+# O upsert preserva o id (e portanto a posição) de um aluno já existente
+SQL_UPSERT_STUDENT = (
+    "INSERT INTO students (activity_id, student_id, time, words, note) "
+    "VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT (activity_id, student_id) DO UPDATE SET "
+    "time = excluded.time, words = excluded.words, note = excluded.note"
+)
+SQL_INCREMENT_STUDENT = (
+    "UPDATE students SET time = time + ?, words = words + ? "
+    "WHERE activity_id = ? AND student_id = ?"
+)
+SQL_DELETE_STUDENT = "DELETE FROM students WHERE activity_id = ? AND student_id = ?"
+# Versões ficam numa tabela própria, que não é apagada junto com a atividade
+SQL_GET_VERSION = "SELECT version FROM activity_versions WHERE activity_id = ?"
+SQL_BUMP_VERSION = (
+    "INSERT INTO activity_versions (activity_id, version) VALUES (?, 1) "
+    "ON CONFLICT (activity_id) DO UPDATE SET version = version + 1"
+)
+# Feed de mudanças: cada aluno guarda a versão da sua última escrita e
+# as remoções ficam como tombstones até a atividade ser apagada
+SQL_GET_VERSION_AND_HORIZON = "SELECT version, horizon FROM activity_versions WHERE activity_id = ?"
+SQL_CURRENT_VERSION = "(SELECT version FROM activity_versions WHERE activity_id = ?)"
+SQL_MARK_STUDENT_CHANGED = (
+    f"UPDATE students SET changed_version = {SQL_CURRENT_VERSION} "
+    "WHERE activity_id = ? AND student_id = ?"
+)
+SQL_UPSERT_TOMBSTONE = (
+    f"INSERT INTO tombstones (activity_id, student_id, version) VALUES (?, ?, {SQL_CURRENT_VERSION}) "
+    "ON CONFLICT (activity_id, student_id) DO UPDATE SET version = excluded.version"
+)
+SQL_DELETE_ACTIVITY_TOMBSTONES = "DELETE FROM tombstones WHERE activity_id = ?"
+SQL_RESET_HORIZON = "UPDATE activity_versions SET horizon = version WHERE activity_id = ?"
+SQL_LIST_CHANGED_STUDENTS = (
+    "SELECT student_id, time, words, note FROM students "
+    "WHERE activity_id = ? AND changed_version > ? ORDER BY changed_version"
+)
+SQL_LIST_TOMBSTONES = (
+    "SELECT student_id FROM tombstones "
+    "WHERE activity_id = ? AND version > ? ORDER BY version"
+)
+
+
+def _row_to_record(row):
+    return {"student_id": row[0], "time": row[1], "words": row[2], "note": row[3]}
+
+
+class SQLiteStudentRepository(StudentRepository):
+    """
+    Motor de armazenamento persistente baseado em SQLite
+
+    Cada thread usa a sua própria conexão (o módulo sqlite3 não permite
+    compartilhar conexões entre threads por padrão).
+
+    As versões das atividades ficam no próprio banco, então um cache
+    invalidado por versão continua correto entre workers. Os listeners
+    de mudança, porém, só enxergam as escritas do processo atual.
+
+    O feed de mudanças (changes_since) também fica no banco: a coluna
+    changed_version e a tabela tombstones valem para todos os workers.
+    """
+
+    uses_change_log = False
+    blocking_io = True
+    durable = True
+
+    def __init__(self, db_path, busy_timeout_ms=5000, statement_cache_size=64):
+        super().__init__()
+        self.db_path = db_path
+        self.busy_timeout_ms = busy_timeout_ms
+        self.statement_cache_size = statement_cache_size
+        self._local = threading.local()
+
+        # Cria o esquema uma única vez usando a conexão da thread atual
+        conn = self._connection()
+        conn.executescript(SCHEMA)
+        for table, column, definition in MIGRATIONS:
+            columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+            if column not in columns:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        conn.executescript(SCHEMA_CHANGE_FEED)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None: controlamos BEGIN/COMMIT manualmente
+            conn = sqlite3.connect(
+                self.db_path,
+                isolation_level=None,
+                cached_statements=self.statement_cache_size
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+            self._local.conn = conn
+            self._local.depth = 0
+            self._local.pending_changes = []
+        return conn
+
+    def close(self):
+        """Fecha a conexão da thread atual"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    @contextmanager
+    def transaction(self):
+        conn = self._connection()
+        # Transações aninhadas são absorvidas pela mais externa
+        if self._local.depth == 0:
+            conn.execute("BEGIN IMMEDIATE")
+        self._local.depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                # Escritas desfeitas: os listeners nunca as veem
+                self._local.pending_changes.clear()
+                conn.execute("ROLLBACK")
+            raise
+        else:
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                pending, self._local.pending_changes = self._local.pending_changes, []
+                conn.execute("COMMIT")
+                # Só depois do COMMIT: um listener que relê o banco (por
+                # outra conexão) já enxerga a escrita
+                for activity_id, student_id in pending:
+                    self._notify_change(activity_id, student_id)
+
+    def _touch(self, activity_id, student_id):
+        # Chamado dentro de uma transação: incrementa a versão, registra a
+        # mudança para o feed e agenda a notificação para o COMMIT
+        conn = self._connection()
+        conn.execute(SQL_BUMP_VERSION, (activity_id,))
+        if student_id is None:
+            conn.execute(SQL_DELETE_ACTIVITY_TOMBSTONES, (activity_id,))
+            conn.execute(SQL_RESET_HORIZON, (activity_id,))
+        elif conn.execute(SQL_MARK_STUDENT_CHANGED, (activity_id, activity_id, student_id)).rowcount == 0:
+            # O aluno não existe mais: a escrita foi uma remoção
+            conn.execute(SQL_UPSERT_TOMBSTONE, (activity_id, student_id, activity_id))
+        self._local.pending_changes.append((activity_id, student_id))
+
+    # ========== OPERAÇÕES DO MOTOR ==========
+
+    def get_version(self, activity_id):
+        row = self._connection().execute(SQL_GET_VERSION, (activity_id,)).fetchone()
+        return row[0] if row is not None else 0
+
+    def has_activity(self, activity_id):
+        return self._connection().execute(SQL_HAS_ACTIVITY, (activity_id,)).fetchone() is not None
+
+    def list_activities(self):
+        return [row[0] for row in self._connection().execute(SQL_LIST_ACTIVITIES)]
+
+    def list_students(self, activity_id):
+        rows = self._connection().execute(SQL_LIST_STUDENTS, (activity_id,)).fetchall()
+        return [_row_to_record(row) for row in rows]
+
+    def iter_students(self, activity_id, batch_size=500):
+        # Conexão obtida a cada lote: o consumidor pode avançar o gerador
+        # a partir de threads diferentes
+        last_id = 0
+        while True:
+            rows = self._connection().execute(SQL_LIST_STUDENTS_AFTER, (activity_id, last_id, batch_size)).fetchall()
+            for row in rows:
+                yield _row_to_record(row[1:])
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1][0]
+
+    def query_students(self, activity_id, query):
+        # Paginação por chave sobre os índices: (coluna, id) > cursor
+        order_column = query.sort or "id"
+        direction = "DESC" if query.descending else "ASC"
+        clauses = ["activity_id = ?"]
+        params = [activity_id]
+
+        for column, (minimum, maximum) in query.ranges.items():
+            if minimum is not None:
+                clauses.append(f"{column} >= ?")
+                params.append(minimum)
+            if maximum is not None:
+                clauses.append(f"{column} <= ?")
+                params.append(maximum)
+        if query.student_ids is not None:
+            clauses.append(f"student_id IN ({','.join('?' * len(query.student_ids))})")
+            params.extend(query.student_ids)
+        if query.cursor is not None:
+            comparison = "<" if query.descending else ">"
+            if query.sort is None:
+                clauses.append(f"id {comparison} ?")
+            else:
+                clauses.append(f"({query.sort}, id) {comparison} (?, ?)")
+            params.extend(query.cursor)
+
+        sql = (
+            f"SELECT id, student_id, time, words, note FROM students "
+            f"WHERE {' AND '.join(clauses)} "
+            f"ORDER BY {order_column} {direction}"
+            + (f", id {direction}" if query.sort is not None else "")
+            + " LIMIT ?"
+        )
+        params.append(query.limit + 1)
+        rows = self._connection().execute(sql, params).fetchall()
+
+        next_cursor = None
+        if len(rows) > query.limit:
+            rows = rows[:query.limit]
+            last = rows[-1]
+            position = (last[0],) if query.sort is None else (last[2 if query.sort == "time" else 3], last[0])
+            next_cursor = encode_cursor(position)
+        return [_row_to_record(row[1:]) for row in rows], next_cursor
+
+    def changes_since(self, activity_id, since):
+        conn = self._connection()
+        row = conn.execute(SQL_GET_VERSION_AND_HORIZON, (activity_id,)).fetchone()
+        version, horizon = row if row is not None else (0, 0)
+
+        if since <= 0 or since < horizon or since > version:
+            return ChangeSet(self.list_students(activity_id), [], version, True)
+
+        records = [
+            _row_to_record(row)
+            for row in conn.execute(SQL_LIST_CHANGED_STUDENTS, (activity_id, since))
+        ]
+        deleted = [row[0] for row in conn.execute(SQL_LIST_TOMBSTONES, (activity_id, since))]
+        return ChangeSet(records, deleted, version, False)
+
+    def get_student(self, activity_id, student_id):
+        row = self._connection().execute(SQL_GET_STUDENT, (activity_id, student_id)).fetchone()
+        return _row_to_record(row) if row is not None else None
+
+    def save_student(self, activity_id, student_id, time_played, words_learned, feedback):
+        with self.transaction():
+            conn = self._connection()
+            conn.execute(SQL_INSERT_ACTIVITY, (activity_id,))
+            conn.execute(
+                SQL_UPSERT_STUDENT,
+                (activity_id, student_id, time_played, words_learned, feedback)
+            )
+            self._touch(activity_id, student_id)
+        return {"student_id": student_id, "time": time_played, "words": words_learned, "note": feedback}
+
+    def increment_student(self, activity_id, student_id, additional_time, additional_words):
+        with self.transaction():
+            conn = self._connection()
+            cursor = conn.execute(
+                SQL_INCREMENT_STUDENT,
+                (additional_time, additional_words, activity_id, student_id)
+            )
+            if cursor.rowcount == 0:
+                return None
+            self._touch(activity_id, student_id)
+            return self.get_student(activity_id, student_id)
+
+    def remove_student(self, activity_id, student_id):
+        with self.transaction():
+            record = self.get_student(activity_id, student_id)
+            if record is not None:
+                self._connection().execute(SQL_DELETE_STUDENT, (activity_id, student_id))
+                self._touch(activity_id, student_id)
+            return record
+
+    def restore_student(self, activity_id, record):
+        with self.transaction():
+            if not self.has_activity(activity_id):
+                return False
+            self._connection().execute(
+                SQL_UPSERT_STUDENT,
+                (activity_id, record["student_id"], record["time"], record["words"], record["note"])
+            )
+            self._touch(activity_id, record["student_id"])
+            return True
+
+    def delete_activity(self, activity_id):
+        with self.transaction():
+            conn = self._connection()
+            deleted = conn.execute(SQL_DELETE_ACTIVITY, (activity_id,)).rowcount
+            conn.execute(SQL_DELETE_ACTIVITY_STUDENTS, (activity_id,))
+            if deleted == 0:
+                return False
+            self._touch(activity_id, None)
+            return True
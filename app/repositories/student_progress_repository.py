@@ -0,0 +1,163 @@
+"""
+Repositório de progresso dos estudantes
+
+Substitui a varredura linear das listas do banco simulado por um
+índice hash (student_id -> registro) por atividade. Como o dict do
+Python preserva a ordem de inserção, a saída de analytics continua
+na mesma ordem em que os alunos foram registrados.
+"""
+
+import threading
+
+from .base_repository import StudentRepository
+
+
+class ActivityRecords:
+    """
+    Registros de uma atividade/turma indexados por student_id
+
+    Salvar, buscar e remover um aluno custam O(1).
+    """
+
+    __slots__ = ("_by_student",)
+
+    def __init__(self, records=None):
+        self._by_student = {}
+        for record in records or []:
+            self._by_student[record["student_id"]] = record
+
+    def __len__(self):
+        return len(self._by_student)
+
+    def __iter__(self):
+        return iter(self._by_student.values())
+
+    def __contains__(self, student_id):
+        return student_id in self._by_student
+
+    def __getitem__(self, index):
+        """
+        Acesso posicional mantido por compatibilidade com o antigo formato
+        em lista (custa O(n); não deve ser usado em caminhos críticos)
+        """
+        return list(self._by_student.values())[index]
+
+    def get(self, student_id):
+        return self._by_student.get(student_id)
+
+    def put(self, record):
+        self._by_student[record["student_id"]] = record
+
+    def remove(self, student_id):
+        return self._by_student.pop(student_id, None)
+
+
+class StudentProgressRepository(StudentRepository):
+    """
+    Motor de armazenamento em memória do progresso dos estudantes
+
+    Os dados vivem apenas no processo atual e são perdidos ao reiniciar.
+    Todas as operações são protegidas por um RLock, o que torna o motor
+    seguro para as threads do gunicorn; transaction() mantém o lock
+    durante todo o bloco para aplicar várias escritas de forma atômica.
+    """
+
+    def __init__(self, initial_data=None):
+        super().__init__()
+        self._lock = threading.RLock()
+        self._activities = {}
+        self._versions = {}
+        for activity_id, records in (initial_data or {}).items():
+            self._activities[activity_id] = ActivityRecords(records)
+            self._versions[activity_id] = 1
+
+    def __getitem__(self, activity_id):
+        # Retorna a coleção viva (e não uma cópia) como o antigo dicionário
+        with self._lock:
+            return self._activities[activity_id]
+
+    def _touch(self, activity_id, student_id):
+        # Chamado com o lock adquirido: incrementa a versão e notifica
+        self._versions[activity_id] = self._versions.get(activity_id, 0) + 1
+        self._notify_change(activity_id, student_id)
+
+    # ========== OPERAÇÕES DO REPOSITÓRIO ==========
+
+    def get_version(self, activity_id):
+        with self._lock:
+            return self._versions.get(activity_id, 0)
+
+    def has_activity(self, activity_id):
+        with self._lock:
+            return activity_id in self._activities
+
+    def list_activities(self):
+        with self._lock:
+            return list(self._activities)
+
+    def list_students(self, activity_id):
+        with self._lock:
+            records = self._activities.get(activity_id)
+            return list(records) if records is not None else []
+
+    def get_student(self, activity_id, student_id):
+        with self._lock:
+            records = self._activities.get(activity_id)
+            return records.get(student_id) if records is not None else None
+
+    def save_student(self, activity_id, student_id, time_played, words_learned, feedback):
+        with self._lock:
+            records = self._activities.get(activity_id)
+            if records is None:
+                records = self._activities[activity_id] = ActivityRecords()
+
+            record = records.get(student_id)
+            if record is None:
+                record = {"student_id": student_id}
+                records.put(record)
+
+            # Atualiza no próprio registro para preservar a posição do aluno
+            record["time"] = time_played
+            record["words"] = words_learned
+            record["note"] = feedback
+            self._touch(activity_id, student_id)
+            return record
+
+    def increment_student(self, activity_id, student_id, additional_time, additional_words):
+        with self._lock:
+            record = self.get_student(activity_id, student_id)
+            if record is None:
+                return None
+
+            record["time"] += additional_time
+            record["words"] += additional_words
+            self._touch(activity_id, student_id)
+            return record
+
+    def remove_student(self, activity_id, student_id):
+        with self._lock:
+            records = self._activities.get(activity_id)
+            removed = records.remove(student_id) if records is not None else None
+            if removed is not None:
+                self._touch(activity_id, student_id)
+            return removed
+
+    def restore_student(self, activity_id, record):
+        with self._lock:
+            records = self._activities.get(activity_id)
+            if records is None:
+                return False
+
+            records.put(record)
+            self._touch(activity_id, record["student_id"])
+            return True
+
+    def delete_activity(self, activity_id):
+        with self._lock:
+            if self._activities.pop(activity_id, None) is None:
+                return False
+            self._touch(activity_id, None)
+            return True
+
+    def transaction(self):
+        return self._lock
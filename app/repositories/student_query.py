@@ -0,0 +1,311 @@
+"""
+Consultas paginadas sobre os alunos de uma atividade
+
+StudentQuery descreve a página pedida (cursor, limite, filtros por
+conjunto de IDs e por faixas de time/words, ordenação). Os motores em
+memória respondem usando SortedStudentIndex, um índice secundário
+ordenado por atividade mantido pelos listeners de mudança; o SQLite
+usa índices B-tree equivalentes.
+
+Em ambos os casos só os alunos da página são materializados.
+"""
+
+import base64
+import binascii
+import json
+import threading
+from bisect import bisect_left, bisect_right, insort
+
+SORT_FIELDS = ("time", "words")
+
+
+def encode_cursor(position):
+    """Codifica a posição do último aluno da página num token opaco"""
+    raw = json.dumps(list(position), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """
+    Decodifica um token gerado por encode_cursor
+
+    Raises:
+        ValueError: Token malformado
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        position = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid cursor") from None
+    if not isinstance(position, list) or not position or \
+            not all(isinstance(value, (int, float)) for value in position):
+        raise ValueError("Invalid cursor")
+    return tuple(position)
+
+
+def _parse_number(args, name):
+    value = args.get(name)
+    if value is None or value == "":
+        return None
+    try:
+        return float(value) if "." in value else int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a number") from None
+
+
+class StudentQuery:
+    """
+    Parâmetros de uma página de alunos
+
+    Args:
+        limit (int): Máximo de alunos na página
+        cursor (tuple, optional): Posição retornada na página anterior
+        student_ids (iterable, optional): Restringe a estes alunos
+        ranges (dict, optional): coluna -> (mínimo, máximo), limites
+                                 inclusivos; None deixa o lado aberto
+        sort (str, optional): "time" ou "words" (None: ordem de inserção)
+        descending (bool): Ordem decrescente
+    """
+
+    def __init__(self, limit=100, cursor=None, student_ids=None, ranges=None,
+                 sort=None, descending=False):
+        if sort is not None and sort not in SORT_FIELDS:
+            raise ValueError(f"sort must be one of {', '.join(SORT_FIELDS)}")
+        for column in ranges or {}:
+            if column not in SORT_FIELDS:
+                raise ValueError(f"Unknown range column: {column}")
+        if limit < 1:
+            raise ValueError("limit must be >= 1")
+        # Ordem de inserção: cursor (seq,); por coluna: (valor, seq)
+        if cursor is not None and len(cursor) != (1 if sort is None else 2):
+            raise ValueError("Invalid cursor")
+
+        self.limit = limit
+        self.cursor = cursor
+        self.student_ids = frozenset(student_ids) if student_ids is not None else None
+        self.ranges = {
+            column: bounds for column, bounds in (ranges or {}).items()
+            if bounds != (None, None)
+        }
+        self.sort = sort
+        self.descending = descending
+
+    @classmethod
+    def from_args(cls, args, default_limit=100, max_limit=1000):
+        """
+        Monta a consulta a partir dos parâmetros da URL
+
+        Parâmetros: limit, cursor, student_ids (separados por vírgula),
+        min_time, max_time, min_words, max_words, sort (time, -time,
+        words, -words)
+
+        Raises:
+            ValueError: Parâmetro inválido
+        """
+        try:
+            limit = int(args.get("limit", default_limit))
+        except ValueError:
+            raise ValueError("limit must be an integer") from None
+
+        cursor = args.get("cursor")
+        student_ids = args.get("student_ids")
+        sort = args.get("sort") or None
+        descending = sort is not None and sort.startswith("-")
+
+        return cls(
+            limit=min(limit, max_limit),
+            cursor=decode_cursor(cursor) if cursor else None,
+            student_ids=[s for s in student_ids.split(",") if s] if student_ids is not None else None,
+            ranges={
+                column: (_parse_number(args, f"min_{column}"), _parse_number(args, f"max_{column}"))
+                for column in SORT_FIELDS
+            },
+            sort=sort[1:] if descending else sort,
+            descending=descending
+        )
+
+    def matches(self, student_id, values):
+        """Verifica os filtros que não são resolvidos pelo índice"""
+        if self.student_ids is not None and student_id not in self.student_ids:
+            return False
+        for column, (minimum, maximum) in self.ranges.items():
+            value = values[column]
+            if minimum is not None and value < minimum:
+                return False
+            if maximum is not None and value > maximum:
+                return False
+        return True
+
+
+class _ActivityIndex:
+    """
+    Índices ordenados de uma atividade
+
+    - by_order: (seq, student_id), seq = ordem de inserção
+    - by_time / by_words: (valor, seq, student_id)
+
+    O seq desempata valores iguais e torna cada posição única, o que
+    permite usar (valor, seq) como cursor.
+    """
+
+    __slots__ = ("values", "next_seq", "by_order", "by_time", "by_words")
+
+    def __init__(self):
+        self.values = {}
+        self.next_seq = 0
+        self.by_order = []
+        self.by_time = []
+        self.by_words = []
+
+    def _remove_entry(self, entries, key):
+        index = bisect_left(entries, key)
+        del entries[index]
+
+    def update(self, student_id, record):
+        previous = self.values.pop(student_id, None)
+        if previous is not None:
+            seq = previous["seq"]
+            self._remove_entry(self.by_order, (seq, student_id))
+            self._remove_entry(self.by_time, (previous["time"], seq, student_id))
+            self._remove_entry(self.by_words, (previous["words"], seq, student_id))
+        if record is None:
+            return
+
+        # Atualizações mantêm a posição do aluno, como nos motores
+        if previous is not None:
+            seq = previous["seq"]
+        else:
+            seq = self.next_seq
+            self.next_seq += 1
+        self.values[student_id] = {"time": record["time"], "words": record["words"], "seq": seq}
+        insort(self.by_order, (seq, student_id))
+        insort(self.by_time, (record["time"], seq, student_id))
+        insort(self.by_words, (record["words"], seq, student_id))
+
+    def select(self, query):
+        """
+        Percorre o índice da ordenação pedida a partir do cursor
+
+        Returns:
+            tuple: (student_ids da página, próximo cursor ou None)
+        """
+        if query.sort is None:
+            entries = self.by_order
+        else:
+            entries = self.by_time if query.sort == "time" else self.by_words
+
+        if query.student_ids is not None and len(query.student_ids) < len(entries):
+            # Poucos IDs: ordena só os candidatos em vez de percorrer a turma
+            entries = sorted(
+                (values["seq"], student_id) if query.sort is None
+                else (values[query.sort], values["seq"], student_id)
+                for student_id, values in
+                ((student_id, self.values.get(student_id)) for student_id in query.student_ids)
+                if values is not None
+            )
+
+        # Faixa da coluna ordenada: resolvida por busca binária
+        lo, hi = 0, len(entries)
+        if query.sort is not None and query.sort in query.ranges:
+            minimum, maximum = query.ranges[query.sort]
+            if minimum is not None:
+                lo = bisect_left(entries, (minimum,))
+            if maximum is not None:
+                hi = bisect_right(entries, (maximum, float("inf")))
+
+        # Cursor: (valor, seq) ou (seq,) do último aluno já enviado
+        if query.cursor is not None:
+            following = query.cursor[:-1] + (query.cursor[-1] + 1,)
+            if query.descending:
+                hi = min(hi, bisect_left(entries, query.cursor))
+            else:
+                lo = max(lo, bisect_left(entries, following))
+
+        indexes = range(hi - 1, lo - 1, -1) if query.descending else range(lo, hi)
+        page = []
+        last_position = None
+        for index in indexes:
+            entry = entries[index]
+            student_id = entry[-1]
+            if not query.matches(student_id, self.values[student_id]):
+                continue
+            if len(page) == query.limit:
+                # Existe pelo menos mais um aluno: a página tem continuação
+                return page, encode_cursor(last_position)
+            page.append(student_id)
+            last_position = entry[:-1]
+        return page, None
+
+
+class SortedStudentIndex:
+    """
+    Índices secundários ordenados por atividade, mantidos incrementalmente
+
+    A atividade é indexada na primeira consulta (uma leitura da turma
+    inteira); depois disso cada escrita notificada pelo repositório
+    atualiza só o aluno alterado (O(log n) de busca por índice).
+
+    Locks: o listener roda com o lock do repositório adquirido e depois
+    adquire _lock; as consultas nunca leem o repositório segurando _lock.
+    """
+
+    def __init__(self, repository):
+        self.repository = repository
+        self._activities = {}
+        self._lock = threading.Lock()
+        repository.add_change_listener(self._on_change)
+
+    def close(self):
+        """Deixa de observar o repositório"""
+        self.repository.remove_change_listener(self._on_change)
+
+    def _on_change(self, activity_id, student_id):
+        with self._lock:
+            if activity_id not in self._activities:
+                return
+            if student_id is None:
+                del self._activities[activity_id]
+                return
+        record = self.repository.get_student(activity_id, student_id)
+        with self._lock:
+            index = self._activities.get(activity_id)
+            if index is not None:
+                index.update(student_id, record)
+
+    def _activity_index(self, activity_id):
+        with self._lock:
+            index = self._activities.get(activity_id)
+        if index is not None:
+            return index
+
+        # Construção sob a transação: nenhuma escrita entre a leitura e o registro
+        with self.repository.transaction():
+            with self._lock:
+                index = self._activities.get(activity_id)
+                if index is not None:
+                    return index
+            index = _ActivityIndex()
+            for record in self.repository.list_students(activity_id):
+                index.update(record["student_id"], record)
+            with self._lock:
+                self._activities[activity_id] = index
+        return index
+
+    def query(self, activity_id, query):
+        """
+        Returns:
+            tuple: (registros da página, próximo cursor ou None)
+        """
+        if not self.repository.has_activity(activity_id):
+            return [], None
+        index = self._activity_index(activity_id)
+        with self._lock:
+            student_ids, next_cursor = index.select(query)
+
+        records = []
+        for student_id in student_ids:
+            record = self.repository.get_student(activity_id, student_id)
+            # Removido entre a seleção e a leitura
+            if record is not None:
+                records.append(record)
+        return records, next_cursor
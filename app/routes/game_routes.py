@@ -4,29 +4,328 @@ Rotas relacionadas ao jogo em si
 PADRÃO DE COMPORTAMENTO: COMMAND
 Este módulo demonstra o uso do padrão Command para operações do jogo.
 """
-from flask import Blueprint, request, jsonify
-from app.services.analytics_service import AnalyticsService
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from config.config import Config
+from app.decks import DISTRACTORS_PER_WORD, DeckFormatError, get_shared_deck_cache
+from app.repositories import StudentQuery
+from app.services.analytics_service import AnalyticsService, STUDENT_METRIC_FIELDS
+from app.services.instrumentation import METRICS, instrument_repository
+from app.services.review_scheduler import ReviewScheduler
+from app.services.progress_events import (
+    ProgressEventBus,
+    format_poll_response,
+    iter_sse,
+    parse_cursor
+)
 from app.commands import (
     SaveStudentProgressCommand,
+    BatchSaveProgressCommand,
     RetrieveAnalyticsCommand,
+    RetrieveClassStatisticsCommand,
     UpdateStudentScoreCommand,
     ResetStudentProgressCommand,
-    CommandInvoker
+    RecordReviewCommand,
+    CommandInvoker,
+    AsyncCommandQueue,
+    QueueFullError,
+    ScoreUpdateCoalescer,
+    CommandJournal
 )
 
 bp = Blueprint('game', __name__, url_prefix='/game')
 
-# Instancia global do invoker para manter histórico durante a sessão
-game_invoker = CommandInvoker()
 analytics_service = AnalyticsService()
 
+# Instrumentação opcional (METRICS_ENABLED): latências servidas em /metrics
+metrics = METRICS if Config.METRICS_ENABLED else None
+if metrics is not None:
+    instrument_repository(analytics_service.repository, metrics)
+
+# Journal opcional: reconstrói o estado (snapshot + cauda) antes de atender
+command_journal = None
+if Config.JOURNAL_DIR:
+    command_journal = CommandJournal(
+        Config.JOURNAL_DIR,
+        analytics_service,
+        fsync_interval=Config.JOURNAL_FSYNC_INTERVAL_MS / 1000,
+        fsync_batch=Config.JOURNAL_FSYNC_BATCH,
+        snapshot_every=Config.JOURNAL_SNAPSHOT_EVERY
+    )
+    command_journal.recover()
+    command_journal.open()
+
+# Instancia global do invoker para manter histórico durante a sessão
+game_invoker = CommandInvoker(journal=command_journal, metrics=metrics)
+
+# Fila para execução assíncrona dos comandos de escrita
+command_queue = AsyncCommandQueue(
+    game_invoker,
+    num_workers=Config.COMMAND_QUEUE_WORKERS,
+    max_pending=Config.COMMAND_QUEUE_MAX_PENDING,
+    max_tickets=Config.COMMAND_QUEUE_MAX_TICKETS
+)
+
+# Agregador dos deltas de pontuação (ativo com COALESCE_SCORE_UPDATES)
+score_coalescer = ScoreUpdateCoalescer(
+    analytics_service,
+    game_invoker,
+    window_seconds=Config.COALESCE_WINDOW_MS / 1000,
+    max_pending_updates=Config.COALESCE_MAX_UPDATES
+)
+# Barramento de eventos para os dashboards (SSE e long-poll)
+progress_events = ProgressEventBus(analytics_service.repository, buffer_size=Config.EVENT_BUFFER_SIZE)
+
+# Agendamento das revisões espaçadas (SM-2) servido em /entry e /review
+review_scheduler = ReviewScheduler()
+# Decks compilados que alimentam o agendador (deck_id da Inven!RA),
+# abertos uma vez por processo e partilhados entre as atividades
+deck_cache = get_shared_deck_cache()
+
+if metrics is not None:
+    metrics.add_gauge("command_queue_pending", "Comandos aguardando na fila assíncrona", command_queue.pending_count)
+    metrics.add_gauge("score_updates_pending", "Deltas de pontuação aguardando no coalescer", score_coalescer.pending_count)
+    metrics.add_gauge("progress_event_subscribers", "Conexões SSE/long-poll abertas", progress_events.total_subscribers)
+    metrics.add_gauge("review_cards", "Cartas já revistas no agendador SM-2", review_scheduler.card_count)
+
+    def deck_cache_stat(key):
+        return lambda: deck_cache.stats()[key]
+
+    metrics.add_gauge("deck_cache_bytes", "Memória ocupada pelo cache de decks", deck_cache_stat("bytes"))
+    metrics.add_gauge("deck_cache_decks", "Decks no cache", deck_cache_stat("decks"))
+    metrics.add_gauge(
+        "deck_cache_requests_total", "Consultas ao cache de decks por resultado",
+        lambda: {(("result", result),): deck_cache.stats()[key] for result, key in (("hit", "hits"), ("miss", "misses"))},
+        kind="counter"
+    )
+    metrics.add_gauge("deck_cache_loads_total", "Decks abertos e decodificados", deck_cache_stat("loads"), kind="counter")
+    metrics.add_gauge("deck_cache_evictions_total", "Decks despejados do cache", deck_cache_stat("evictions"), kind="counter")
+
+# Parâmetros que ativam a consulta paginada em /get-progress
+PAGINATION_PARAMS = (
+    'limit', 'cursor', 'student_ids', 'sort', 'fields',
+    'min_time', 'max_time', 'min_words', 'max_words'
+)
+METRIC_NAMES = {name for fields in STUDENT_METRIC_FIELDS.values() for name, _ in fields}
+
+
+def wants_async():
+    """Indica se a requisição deve ser enfileirada (?async=true ou ASYNC_WRITES)"""
+    flag = request.args.get('async')
+    if flag is None:
+        return Config.ASYNC_WRITES
+    return flag.lower() in ('1', 'true', 'yes')
+
+
+def dispatch_write(command, success_status=200, failure_status=400):
+    """
+    Executa um comando de escrita de forma síncrona ou assíncrona
+    
+    No modo assíncrono o comando é enfileirado e a resposta (202) traz
+    apenas o ticket, sem esperar pelo armazenamento.
+    """
+    result, status = submit_write(command, success_status, failure_status)
+    return jsonify(result), status
+
+
+def submit_write(command, success_status=200, failure_status=400):
+    """
+    Mesmo que dispatch_write, mas retorna (resultado, status HTTP) para
+    rotas que incluem o resultado na sua própria resposta
+    """
+    # Deltas de pontuação pendentes precisam ser gravados antes de outra
+    # escrita na mesma atividade para preservar a ordem das operações
+    if score_coalescer.has_pending():
+        for activity_id in command.get_lock_keys():
+            score_coalescer.flush_activity(activity_id)
+    
+    if wants_async():
+        try:
+            ticket = command_queue.submit(command)
+        except QueueFullError as exc:
+            return {"success": False, "message": str(exc)}, 503
+        
+        return {
+            "success": True,
+            "ticket_id": ticket.ticket_id,
+            "status": ticket.status
+        }, 202
+    
+    # Executa o comando através do invoker
+    result = game_invoker.execute_command(command)
+    
+    return result, success_status if result['success'] else failure_status
+
 @bp.route('/entry', methods=['GET', 'POST'])
 def game_entry():
     """
     Ponto de entrada do jogo
     Aqui a Inven!RA envia o aluno para jogar
+    
+    Retorna as próximas cartas do aluno: revisões vencidas primeiro e
+    depois palavras novas do deck. Parâmetros na query string ou no body:
+    {
+        "activity_id": "instancia_turma_A",
+        "student_id": "Student_Joao",
+        "deck_id": "deck_123_exemplo",   (opcional: deck compilado da atividade)
+        "words": ["Hund", "Katze"],   (opcional, só POST: acrescenta ao deck)
+        "limit": 20,
+        "choices": 4   (opcional, com deck_id: opções de escolha múltipla)
+    }
+    """
+    data = (request.get_json(silent=True) if request.method == 'POST' else None) or {}
+    activity_id = data.get('activity_id') or request.args.get('activity_id')
+    student_id = data.get('student_id') or request.args.get('student_id')
+    
+    if not activity_id or not student_id:
+        return jsonify({"success": False, "message": "activity_id and student_id are required"}), 400
+    
+    try:
+        limit = int(data.get('limit') or request.args.get('limit', 20))
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "message": "limit must be an integer"}), 400
+    limit = max(1, min(limit, Config.PAGE_MAX_LIMIT))
+    
+    try:
+        choices = int(data.get('choices') or request.args.get('choices', 0))
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "message": "choices must be an integer"}), 400
+    if choices and not 2 <= choices <= DISTRACTORS_PER_WORD + 1:
+        return jsonify({
+            "success": False,
+            "message": f"choices must be between 2 and {DISTRACTORS_PER_WORD + 1}"
+        }), 400
+    
+    deck = None
+    deck_id = data.get('deck_id') or request.args.get('deck_id')
+    if deck_id:
+        try:
+            deck = deck_cache.get(deck_id)
+            # Cada versão do deck é carregada uma vez; um deck recompilado
+            # acrescenta as palavras novas
+            review_scheduler.load_deck(activity_id, deck.content_hash, deck.words)
+        except KeyError:
+            return jsonify({"success": False, "message": "Deck not found"}), 404
+        except (DeckFormatError, ValueError) as exc:
+            return jsonify({"success": False, "message": str(exc)}), 400
+    
+    words = data.get('words')
+    if words:
+        if not isinstance(words, list) or not all(isinstance(word, str) and word for word in words):
+            return jsonify({"success": False, "message": "words must be a list of non-empty strings"}), 400
+        try:
+            review_scheduler.add_words(activity_id, words)
+        except ValueError as exc:
+            return jsonify({"success": False, "message": str(exc)}), 400
+    
+    cards = review_scheduler.due_cards(activity_id, student_id, limit=limit)
+    if deck is not None:
+        # Tradução e classe gramatical vindas do deck (busca O(1) no mmap)
+        for card in cards:
+            entry = deck.get(card["word"])
+            if entry is not None:
+                card["translation"] = entry["translation"]
+                card["part_of_speech"] = entry["part_of_speech"]
+                if choices:
+                    # Distratores precalculados na compilação do deck
+                    card["options"] = deck.build_round(card["word"], choices)["options"]
+    return jsonify({
+        "success": True,
+        "activity_id": activity_id,
+        "student_id": student_id,
+        "cards": cards,
+        "count": len(cards)
+    }), 200
+
+
+@bp.route('/review', methods=['POST'])
+def record_review():
+    """
+    Registra a resposta do aluno a uma carta e reagenda a palavra (SM-2)
+    
+    Esperado no body:
+    {
+        "activity_id": "instancia_turma_A",
+        "student_id": "Student_Joao",
+        "word": "Hund",
+        "quality": 4   (0 = esqueceu ... 5 = resposta perfeita)
+    }
+    """
+    data = request.get_json()
+    
+    command = RecordReviewCommand(
+        scheduler=review_scheduler,
+        activity_id=data.get('activity_id'),
+        student_id=data.get('student_id'),
+        word=data.get('word'),
+        quality=data.get('quality')
+    )
+    
+    return dispatch_write(command, failure_status=404)
+
+
+@bp.route('/answer', methods=['POST'])
+def submit_answer():
+    """
+    Corrige a resposta digitada pelo aluno para uma carta do deck
+    
+    A comparação ignora maiúsculas, acentos e tremas ("gruen" vale por
+    "grün") e tolera erros de digitação. Uma resposta correta soma uma
+    palavra (e o tempo gasto) à pontuação do aluno através do
+    UpdateStudentScoreCommand; uma errada soma só o tempo.
+    
+    Esperado no body:
+    {
+        "activity_id": "instancia_turma_A",
+        "student_id": "Student_Joao",
+        "deck_id": "deck_123_exemplo",
+        "word": "grün",
+        "answer": "verde",
+        "time_spent": 12   (opcional, em segundos)
+    }
     """
-    return "Aqui será o início do jogo - Implementar na próxima fase."
+    data = request.get_json(silent=True) or {}
+    activity_id = data.get('activity_id')
+    student_id = data.get('student_id')
+    word = data.get('word')
+    answer = data.get('answer')
+    time_spent = data.get('time_spent', 0)
+    
+    if not activity_id or not student_id or not data.get('deck_id') or not word:
+        return jsonify({
+            "success": False,
+            "message": "activity_id, student_id, deck_id and word are required"
+        }), 400
+    if not isinstance(answer, str):
+        return jsonify({"success": False, "message": "answer must be a string"}), 400
+    if isinstance(time_spent, bool) or not isinstance(time_spent, int) or time_spent < 0:
+        return jsonify({"success": False, "message": "time_spent must be a non-negative integer"}), 400
+    
+    try:
+        deck = deck_cache.get(data['deck_id'])
+    except KeyError:
+        return jsonify({"success": False, "message": "Deck not found"}), 404
+    except (DeckFormatError, ValueError) as exc:
+        return jsonify({"success": False, "message": str(exc)}), 400
+    
+    grade = deck.check_answer(word, answer)
+    if grade is None:
+        return jsonify({"success": False, "message": "Word not found in deck"}), 404
+    
+    additional_words = 1 if grade["correct"] else 0
+    score = None
+    if additional_words or time_spent:
+        if Config.COALESCE_SCORE_UPDATES:
+            score = score_coalescer.submit(activity_id, student_id, additional_words, time_spent)
+        else:
+            score, _ = submit_write(UpdateStudentScoreCommand(
+                analytics_service=analytics_service,
+                activity_id=activity_id,
+                student_id=student_id,
+                additional_words=additional_words,
+                additional_time=time_spent
+            ))
+    
+    return jsonify({"success": True, "grade": grade, "score": score}), 200
 
 
 # ========== ENDPOINTS DEMONSTRANDO O PADRÃO COMMAND ==========
@@ -57,10 +356,49 @@ def save_progress():
         feedback=data.get('feedback', '')
     )
     
-    # Executa o comando através do invoker
-    result = game_invoker.execute_command(command)
+    return dispatch_write(command, failure_status=400)
+
+
+@bp.route('/save-progress/batch', methods=['POST'])
+def save_progress_batch():
+    """
+    Salva o progresso de vários estudantes numa única requisição
+    
+    Os registros podem ser de atividades diferentes e são gravados numa
+    única transação. O corpo pode ser a lista diretamente ou um objeto:
+    {
+        "records": [
+            {
+                "activity_id": "instancia_turma_A",
+                "student_id": "Student_Carlos",
+                "time_played": 180,
+                "words_learned": 25,
+                "feedback": "Progredindo bem"
+            },
+            ...
+        ]
+    }
+    """
+    data = request.get_json()
+    records = data.get('records') if isinstance(data, dict) else data
     
-    return jsonify(result), 200 if result['success'] else 400
+    if not isinstance(records, list):
+        return jsonify({"success": False, "message": "Expected a list of records"}), 400
+    
+    if len(records) > Config.BATCH_MAX_RECORDS:
+        return jsonify({
+            "success": False,
+            "message": f"Batch exceeds {Config.BATCH_MAX_RECORDS} records"
+        }), 413
+    
+    # Um único comando para o lote inteiro
+    command = BatchSaveProgressCommand(
+        analytics_service=analytics_service,
+        records=records
+    )
+    
+    # Falhas de itens individuais vêm detalhadas em "results"
+    return dispatch_write(command, failure_status=200)
 
 
 @bp.route('/get-progress/<activity_id>', methods=['GET'])
@@ -69,11 +407,56 @@ def get_progress(activity_id):
     Recupera o progresso de uma turma usando o padrão Command
     
     URL: /game/get-progress/instancia_turma_A
+    
+    Sem parâmetros retorna a turma inteira. Com qualquer um dos
+    parâmetros abaixo retorna uma página e o "next_cursor":
+    - limit, cursor
+    - student_ids=S1,S2
+    - min_time, max_time, min_words, max_words
+    - sort=time|-time|words|-words
+    - fields=tempo_jogado,palavras_aprendidas,feedback_professor
+    
+    Com ?since=<cursor> retorna só os alunos alterados depois do cursor,
+    os IDs removidos ("deleted") e o "cursor" da próxima consulta.
     """
+    query = None
+    fields = None
+    since = None
+    if 'since' in request.args:
+        try:
+            since = int(request.args['since'])
+        except ValueError:
+            since = -1
+        if since < 0:
+            return jsonify({"success": False, "message": "since must be a non-negative integer"}), 400
+        if any(name in request.args for name in PAGINATION_PARAMS):
+            return jsonify({"success": False, "message": "since cannot be combined with pagination"}), 400
+    elif any(name in request.args for name in PAGINATION_PARAMS):
+        try:
+            query = StudentQuery.from_args(
+                request.args,
+                default_limit=Config.PAGE_DEFAULT_LIMIT,
+                max_limit=Config.PAGE_MAX_LIMIT
+            )
+        except ValueError as exc:
+            return jsonify({"success": False, "message": str(exc)}), 400
+        
+        if 'fields' in request.args:
+            fields = {name for name in request.args['fields'].split(',') if name}
+            unknown = fields - METRIC_NAMES
+            if unknown:
+                return jsonify({"success": False, "message": f"Unknown fields: {', '.join(sorted(unknown))}"}), 400
+    
+    # Garante que a leitura enxerga as atualizações ainda agregadas
+    score_coalescer.flush_activity(activity_id)
+    
     # Cria o comando de recuperação
     command = RetrieveAnalyticsCommand(
         analytics_service=analytics_service,
-        activity_id=activity_id
+        activity_id=activity_id,
+        query=query,
+        fields=fields,
+        since=since
     )
     
     # Executa através do invoker
@@ -82,11 +465,44 @@ def get_progress(activity_id):
     return jsonify(result), 200
 
 
+@bp.route('/class-stats/<activity_id>', methods=['GET'])
+def class_stats(activity_id):
+    """
+    Estatísticas agregadas da turma (média, mediana, percentis, top-N e
+    histograma de tempo_jogado e palavras_aprendidas)
+    
+    URL: /game/class-stats/instancia_turma_A?top=10&bins=10
+    """
+    try:
+        top = int(request.args.get('top', 10))
+        bins = int(request.args.get('bins', 10))
+    except ValueError:
+        return jsonify({"success": False, "message": "top and bins must be integers"}), 400
+    if top < 0 or bins < 1:
+        return jsonify({"success": False, "message": "top must be >= 0 and bins >= 1"}), 400
+    
+    score_coalescer.flush_activity(activity_id)
+    
+    command = RetrieveClassStatisticsCommand(
+        analytics_service=analytics_service,
+        activity_id=activity_id,
+        top=top,
+        bins=bins
+    )
+    result = game_invoker.execute_command(command)
+    
+    return jsonify(result), 200
+
+
 @bp.route('/update-score', methods=['POST'])
 def update_score():
     """
     Atualiza incrementalmente a pontuação de um estudante
     
+    Com ?async=true (ou ASYNC_WRITES) responde 202 com um ticket
+    consultável em /game/tickets/<ticket_id>. Com COALESCE_SCORE_UPDATES
+    os deltas do mesmo aluno são agregados e gravados numa única escrita.
+    
     Esperado no body:
     {
         "activity_id": "instancia_turma_A",
@@ -96,18 +512,32 @@ def update_score():
     }
     """
     data = request.get_json()
+    additional_words = data.get('additional_words', 0)
+    additional_time = data.get('additional_time', 0)
+    
+    error = UpdateStudentScoreCommand.validate_deltas(additional_words, additional_time)
+    if error is not None:
+        return jsonify({"success": False, "message": error}), 400
+    
+    if Config.COALESCE_SCORE_UPDATES:
+        # Agrega o delta em memória; a escrita ocorre em lote
+        result = score_coalescer.submit(
+            data.get('activity_id'),
+            data.get('student_id'),
+            additional_words,
+            additional_time
+        )
+        return jsonify(result), 200 if result['success'] else 404
     
     command = UpdateStudentScoreCommand(
         analytics_service=analytics_service,
         activity_id=data.get('activity_id'),
         student_id=data.get('student_id'),
-        additional_words=data.get('additional_words', 0),
-        additional_time=data.get('additional_time', 0)
+        additional_words=additional_words,
+        additional_time=additional_time
     )
     
-    result = game_invoker.execute_command(command)
-    
-    return jsonify(result), 200 if result['success'] else 404
+    return dispatch_write(command, failure_status=404)
 
 
 @bp.route('/reset-progress', methods=['POST'])
@@ -129,9 +559,7 @@ def reset_progress():
         student_id=data.get('student_id')
     )
     
-    result = game_invoker.execute_command(command)
-    
-    return jsonify(result), 200 if result['success'] else 404
+    return dispatch_write(command, failure_status=404)
 
 
 @bp.route('/command-history', methods=['GET'])
@@ -149,3 +577,74 @@ def command_history():
         "history": history,
         "count": len(history)
     }), 200
+
+
+@bp.route('/tickets/<ticket_id>', methods=['GET'])
+def ticket_status(ticket_id):
+    """
+    Consulta o estado de um comando enfileirado no modo assíncrono
+    
+    URL: /game/tickets/<ticket_id>
+    """
+    ticket = command_queue.get_ticket(ticket_id)
+    
+    if ticket is None:
+        return jsonify({"success": False, "message": "Ticket not found"}), 404
+    
+    return jsonify(ticket.to_dict()), 200
+
+
+def parse_event_cursor():
+    """Cursor de retomada: ?after=<cursor> ou cabeçalho Last-Event-ID"""
+    return parse_cursor(request.args.get('after') or request.headers.get('Last-Event-ID'))
+
+
+@bp.route('/events/<activity_id>', methods=['GET'])
+def progress_event_stream(activity_id):
+    """
+    Server-Sent Events com as mudanças de progresso da turma
+    
+    URL: /game/events/instancia_turma_A
+    
+    Cada evento tem como id o cursor da atividade: o EventSource do
+    navegador reconecta com Last-Event-ID e continua de onde parou.
+    Um evento "resync" indica que o histórico do cursor já não existe e
+    o cliente deve recarregar a turma (/game/get-progress/<activity_id>).
+    """
+    try:
+        after = parse_event_cursor()
+    except ValueError:
+        return jsonify({"success": False, "message": "after must be a non-negative integer"}), 400
+    
+    subscription = progress_events.subscribe(activity_id, after=after)
+    response = Response(
+        stream_with_context(iter_sse(subscription, Config.SSE_HEARTBEAT_SECONDS)),
+        mimetype='text/event-stream'
+    )
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@bp.route('/poll/<activity_id>', methods=['GET'])
+def progress_long_poll(activity_id):
+    """
+    Long-poll (alternativa ao SSE): aguarda até haver mudanças ou até o timeout
+    
+    URL: /game/poll/instancia_turma_A?after=<cursor>&timeout=25
+    
+    Retorna {"success", "cursor", "events"}; envie o cursor retornado
+    como after na próxima chamada.
+    """
+    try:
+        after = parse_event_cursor()
+        timeout = min(float(request.args.get('timeout', Config.LONG_POLL_TIMEOUT_SECONDS)),
+                      Config.LONG_POLL_TIMEOUT_SECONDS)
+    except ValueError:
+        return jsonify({"success": False, "message": "after and timeout must be numbers"}), 400
+    
+    with progress_events.subscribe(activity_id, after=after) as subscription:
+        events = subscription.next_events(timeout=max(timeout, 0))
+        cursor = subscription.position
+    
+    return Response(format_poll_response(cursor, events), mimetype='application/json')
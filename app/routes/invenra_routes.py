@@ -2,7 +2,7 @@
 Rotas relacionadas à integração com Inven!RA
 Utiliza o padrão FACADE para simplificar a interface
 """
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request
 from app.facades.invenira_facade import InveniraFacade
 
 bp = Blueprint('invenra', __name__)
@@ -56,7 +56,20 @@ def analytics_data():
     # Captura os dados enviados pela Inven!RA
     data = request.get_json()
     
-    # A Facade coordena: validação + busca + processamento
-    success, result, status_code = invenira_facade.handle_analytics_request(data)
+    # Streaming opt-in: ?stream=true (lista JSON) ou NDJSON
+    # (?format=ndjson ou Accept: application/x-ndjson)
+    ndjson = (request.args.get('format') == 'ndjson'
+              or request.accept_mimetypes.best == 'application/x-ndjson')
+    if ndjson or request.args.get('stream', '').lower() in ('1', 'true', 'yes'):
+        status_code, body, mimetype = invenira_facade.stream_analytics_response(data, ndjson=ndjson)
+        return Response(body, status=status_code, mimetype=mimetype)
     
-    return jsonify(result), status_code
+    # A Facade coordena: validação + busca + cache da resposta serializada
+    status_code, body, etag = invenira_facade.get_analytics_response(
+        data, request.headers.get('If-None-Match')
+    )
+    
+    response = Response(body, status=status_code, mimetype='application/json')
+    if etag:
+        response.headers['ETag'] = etag
+    return response
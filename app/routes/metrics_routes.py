@@ -0,0 +1,16 @@
+"""
+Rota de observabilidade: métricas no formato de texto do Prometheus
+"""
+from flask import Blueprint, Response
+from app.services.instrumentation import METRICS
+
+bp = Blueprint('metrics', __name__)
+
+
+@bp.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Latências e contagens por rota, comando e operação de armazenamento,
+    além da profundidade das filas (ver app/services/instrumentation.py)
+    """
+    return Response(METRICS.render(), mimetype='text/plain; version=0.0.4')
@@ -1,50 +1,158 @@
 """
 Serviço responsável pela lógica de analytics
-Simula um banco de dados e processa os dados dos alunos
+Lê os dados dos alunos do repositório compartilhado e os processa
 """
-from app.models.metrics import MetricFactory
+from app.models.metrics import MetricFactory, BulkMetricSerializer
+from app.repositories import get_shared_repository
+from app.repositories.columnar_repository import ColumnarActivityTable
+
+# Métricas por aluno: (nome_métrica, chave_no_registro) por categoria
+STUDENT_METRIC_FIELDS = {
+    "quant": [("tempo_jogado", "time"), ("palavras_aprendidas", "words")],
+    "qual": [("feedback_professor", "note")]
+}
+
+# Serializador em lote com as mesmas métricas montadas em get_analytics_for_activity
+STUDENT_ANALYTICS_SERIALIZER = BulkMetricSerializer(
+    quant_fields=STUDENT_METRIC_FIELDS["quant"],
+    qual_fields=STUDENT_METRIC_FIELDS["qual"]
+)
+
+# Colunas numéricas usadas nas estatísticas da turma
+CLASS_STATISTICS_COLUMNS = (("tempo_jogado", "time"), ("palavras_aprendidas", "words"))
 
 class AnalyticsService:
-    def __init__(self):
-        # Simulação de Banco de Dados Multi-Turma
-        self.fake_database = {
-            "instancia_turma_A": [
-                {"student_id": "Student_Joao", "time": 120, "words": 15, "note": "Bom começo"},
-                {"student_id": "Student_Maria", "time": 300, "words": 50, "note": "Excelente"}
-            ],
-            "instancia_turma_B": [
-                {"student_id": "Student_Pedro", "time": 10, "words": 0, "note": "Desistiu"},
-                {"student_id": "Student_Ana", "time": 400, "words": 45, "note": "Muito dedicada"}
-            ]
-        }
+    def __init__(self, repository=None):
+        # Fonte de dados única, compartilhada com a Facade
+        self.repository = repository if repository is not None else get_shared_repository()
+
+        # Alias mantido para o código que ainda acessa o antigo dicionário
+        self.fake_database = self.repository
 
     def get_analytics_for_activity(self, activity_id):
         """
         Busca e processa os dados de analytics para uma atividade específica
         """
         # Busca os dados brutos baseados no ID recebido
-        class_raw_data = self.fake_database.get(activity_id, [])
-        
-        response_list = []
+        class_raw_data = self.repository.list_students(activity_id)
         
         # Processamento com Factory Method
-        for student in class_raw_data:
-            # Criação das métricas usando a Fábrica
-            metric_time = MetricFactory.create_metric("quant", "tempo_jogado", student["time"])
-            metric_words = MetricFactory.create_metric("quant", "palavras_aprendidas", student["words"])
-            metric_feedback = MetricFactory.create_metric("qual", "feedback_professor", student["note"])
-
-            # Montagem do objeto do aluno
-            student_response = {
-                "inveniraStdID": student["student_id"],
-                "quantAnalytics": [
-                    metric_time.to_json(),
-                    metric_words.to_json()
-                ],
-                "qualAnalytics": [
-                    metric_feedback.to_json()
+        return [self.build_student_analytics(student) for student in class_raw_data]
+
+    def build_student_analytics(self, student, fields=None):
+        """
+        Monta o objeto de analytics de um aluno
+        
+        Args:
+            student (dict): Registro do aluno
+            fields (iterable, optional): Métricas a incluir (projeção);
+                                         None inclui todas
+        """
+        response = {"inveniraStdID": student["student_id"]}
+        for group, category in (("quantAnalytics", "quant"), ("qualAnalytics", "qual")):
+            metrics = []
+            for metric_name, record_key in STUDENT_METRIC_FIELDS[category]:
+                if fields is None or metric_name in fields:
+                    # Criação das métricas usando a Fábrica
+                    metric = MetricFactory.create_metric(category, metric_name, student[record_key])
+                    metrics.append(metric.to_json())
+            if fields is None or metrics:
+                response[group] = metrics
+        return response
+
+    def query_analytics_for_activity(self, activity_id, query, fields=None):
+        """
+        Busca uma página de analytics da atividade
+        
+        A filtragem, a ordenação e a paginação são resolvidas pelos
+        índices do repositório; só os alunos da página são montados.
+        
+        Args:
+            query (StudentQuery): Cursor, limite, filtros e ordenação
+            fields (iterable, optional): Métricas a incluir (projeção)
+            
+        Returns:
+            tuple: (lista de analytics da página, próximo cursor ou None)
+        """
+        records, next_cursor = self.repository.query_students(activity_id, query)
+        return [self.build_student_analytics(record, fields) for record in records], next_cursor
+
+    def serialize_analytics_for_activity(self, activity_id):
+        """
+        Gera diretamente o JSON de analytics da atividade
+        
+        Equivale a json.dumps(get_analytics_for_activity(...)) compacto,
+        mas sem criar métricas nem dicts intermediários por aluno.
+        
+        Returns:
+            bytes: Lista de analytics serializada
+        """
+        class_raw_data = self.repository.list_students(activity_id)
+        return STUDENT_ANALYTICS_SERIALIZER.serialize_class(class_raw_data)
+
+    def get_class_statistics(self, activity_id, top=10, bins=10):
+        """
+        Estatísticas agregadas da turma (média, mediana, percentis,
+        top-N e histograma) calculadas de forma vetorizada
+        
+        Com o motor colunar a consulta roda direto sobre as colunas; nos
+        demais motores a tabela colunar é montada a partir dos registros.
+        
+        Returns:
+            dict: {"activity_id", "count", "metrics": {nome_métrica: {...}}}
+        """
+        def query(table):
+            metrics = {}
+            for metric_name, column in CLASS_STATISTICS_COLUMNS:
+                stats = table.describe(column)
+                stats["histogram"] = table.histogram(column, bins=bins)
+                stats["top"] = [
+                    {"inveniraStdID": entry["student_id"], "value": entry[column]}
+                    for entry in table.top_n(column, top)
                 ]
-            }
-            response_list.append(student_response)
+                metrics[metric_name] = stats
+            return {"activity_id": activity_id, "count": len(table), "metrics": metrics}
+
+        query_table = getattr(self.repository, "query_table", None)
+        if query_table is not None:
+            return query_table(activity_id, query)
+        return query(ColumnarActivityTable.from_records(self.repository.list_students(activity_id)))
+
+    def get_changes_for_activity(self, activity_id, since):
+        """
+        Analytics apenas dos alunos alterados depois do cursor
+        
+        Args:
+            since (int): Cursor retornado na consulta anterior (0: tudo)
+            
+        Returns:
+            dict: {"data": analytics alterados, "deleted": IDs removidos,
+                   "cursor": próximo cursor, "full": se data é a turma inteira}
+        """
+        changes = self.repository.changes_since(activity_id, since)
+        return {
+            "data": [self.build_student_analytics(record) for record in changes.records],
+            "deleted": changes.deleted,
+            "cursor": changes.cursor,
+            "full": changes.full
+        }
+
+    def stream_analytics_for_activity(self, activity_id, ndjson=False, chunk_size=500):
+        """
+        Gera o JSON de analytics da atividade em pedaços
         
-        return response_list
+        Os alunos são lidos do repositório em lotes (iter_students) e
+        serializados à medida que a resposta é enviada, então a memória
+        usada não cresce com o tamanho da turma.
+        
+        Args:
+            ndjson (bool): Um aluno por linha em vez de uma lista JSON
+            chunk_size (int): Alunos por pedaço enviado
+            
+        Returns:
+            iterator: Pedaços (bytes) do corpo da resposta
+        """
+        records = self.repository.iter_students(activity_id, batch_size=chunk_size)
+        if ndjson:
+            return STUDENT_ANALYTICS_SERIALIZER.iter_ndjson(records, chunk_size)
+        return STUDENT_ANALYTICS_SERIALIZER.iter_class(records, chunk_size)
@@ -3,26 +3,28 @@ Subsistema de Analytics
 Responsável pela lógica de analytics e processamento de dados dos alunos
 Parte do padrão FACADE
 """
-from app.models.metrics import MetricFactory
+from config.config import Config
+from app.repositories import get_shared_repository
+from app.services.analytics_service import AnalyticsService
+from app.services.class_aggregates import get_class_aggregate_tracker
 
 class AnalyticsSubsystem:
     """
     Subsistema que encapsula toda a lógica de busca e processamento
     de dados de analytics dos alunos
+
+    Lê do mesmo repositório usado pelos comandos do jogo. As respostas
+    serializadas são cacheadas na Facade (AnalyticsResponseCache), com
+    limite de bytes e invalidadas pela versão de cada atividade.
     """
     
-    def __init__(self):
-        # Simulação de Banco de Dados Multi-Turma
-        self.fake_database = {
-            "instancia_turma_A": [
-                {"student_id": "Student_Joao", "time": 120, "words": 15, "note": "Bom começo"},
-                {"student_id": "Student_Maria", "time": 300, "words": 50, "note": "Excelente"}
-            ],
-            "instancia_turma_B": [
-                {"student_id": "Student_Pedro", "time": 10, "words": 0, "note": "Desistiu"},
-                {"student_id": "Student_Ana", "time": 400, "words": 45, "note": "Muito dedicada"}
-            ]
-        }
+    def __init__(self, repository=None):
+        # Fonte de dados única, compartilhada com o caminho Command
+        self.repository = repository if repository is not None else get_shared_repository()
+        self.service = AnalyticsService(self.repository)
+        
+        # Agregados da turma, atualizados a cada escrita (um por repositório)
+        self.class_aggregates = get_class_aggregate_tracker(self.repository, Config.COMPLETION_TARGET_WORDS)
 
     def get_analytics_for_activity(self, activity_id):
         """
@@ -34,29 +36,17 @@ class AnalyticsSubsystem:
         Returns:
             list: Lista de objetos com analytics de cada aluno
         """
-        # Busca os dados brutos baseados no ID recebido
-        class_raw_data = self.fake_database.get(activity_id, [])
-        
-        response_list = []
-        
-        # Processamento com Factory Method
-        for student in class_raw_data:
-            # Criação das métricas usando a Fábrica
-            metric_time = MetricFactory.create_metric("quant", "tempo_jogado", student["time"])
-            metric_words = MetricFactory.create_metric("quant", "palavras_aprendidas", student["words"])
-            metric_feedback = MetricFactory.create_metric("qual", "feedback_professor", student["note"])
+        return self.service.get_analytics_for_activity(activity_id)
 
-            # Montagem do objeto do aluno
-            student_response = {
-                "inveniraStdID": student["student_id"],
-                "quantAnalytics": [
-                    metric_time.to_json(),
-                    metric_words.to_json()
-                ],
-                "qualAnalytics": [
-                    metric_feedback.to_json()
-                ]
-            }
-            response_list.append(student_response)
+    def get_class_analytics(self, activity_id):
+        """
+        Métricas agregadas da turma (palavras por minuto, taxa de
+        conclusão, desistências, médias)
         
-        return response_list
+        Args:
+            activity_id (str): ID da atividade/turma
+            
+        Returns:
+            list: Lista de métricas {"name", "type", "value"}
+        """
+        return self.class_aggregates.get_class_analytics(activity_id)
@@ -0,0 +1,263 @@
+"""
+Métricas agregadas da turma, mantidas de forma incremental
+
+Para cada atividade acompanhada são mantidos somas, contagens e um
+sketch de quantis de palavras por minuto. Cada escrita no repositório
+(save, update-score, batch, reset, replay do journal) apenas marca o
+aluno como alterado; na leitura seguinte só os alunos marcados são
+relidos e a contribuição antiga de cada um é trocada pela nova. A turma
+inteira é lida uma única vez, quando a atividade passa a ser acompanhada.
+
+Como as escritas são observadas pelos listeners do repositório, o
+acompanhamento pressupõe que todas as escritas passam por este processo
+(motores memory/columnar, ou SQLite com um único worker).
+"""
+
+import math
+import threading
+
+from app.models.metrics import MetricFactory
+
+
+class QuantileSketch:
+    """
+    Sketch de quantis com buckets logarítmicos (estilo DDSketch)
+
+    Cada valor positivo cai no bucket ceil(log_gamma(v)); o quantil é
+    estimado com erro relativo de no máximo relative_accuracy. Como só
+    guarda contagens por bucket, aceita remoções e usa memória
+    proporcional ao intervalo de valores, não ao número de alunos.
+    """
+
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._buckets = {}
+        self._zero_count = 0
+        self.count = 0
+
+    def _index(self, value):
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def add(self, value):
+        if value <= 0:
+            self._zero_count += 1
+        else:
+            index = self._index(value)
+            self._buckets[index] = self._buckets.get(index, 0) + 1
+        self.count += 1
+
+    def remove(self, value):
+        if value <= 0:
+            self._zero_count -= 1
+        else:
+            index = self._index(value)
+            remaining = self._buckets[index] - 1
+            if remaining:
+                self._buckets[index] = remaining
+            else:
+                del self._buckets[index]
+        self.count -= 1
+
+    def quantile(self, q):
+        """Estimativa do quantil q (0 a 1), ou None se o sketch está vazio"""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        if rank < self._zero_count:
+            return 0.0
+        seen = self._zero_count
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen > rank:
+                # Ponto médio do bucket: garante o erro relativo anunciado
+                return 2 * self._gamma ** index / (self._gamma + 1)
+        return 2 * self._gamma ** max(self._buckets) / (self._gamma + 1)
+
+
+class ActivityAggregate:
+    """Somas, contagens e sketch de uma atividade"""
+
+    def __init__(self, completion_target):
+        self.completion_target = completion_target
+        self.contributions = {}
+        self.count = 0
+        self.total_time = 0
+        self.total_words = 0
+        self.wpm_sum = 0.0
+        self.completed = 0
+        self.dropouts = 0
+        self.wpm_sketch = QuantileSketch()
+
+    @staticmethod
+    def words_per_minute(time_played, words_learned):
+        return words_learned * 60 / time_played if time_played > 0 else 0.0
+
+    def _apply(self, time_played, words_learned, sign):
+        wpm = self.words_per_minute(time_played, words_learned)
+        self.count += sign
+        self.total_time += sign * time_played
+        self.total_words += sign * words_learned
+        self.wpm_sum += sign * wpm
+        if words_learned >= self.completion_target:
+            self.completed += sign
+        if words_learned == 0:
+            self.dropouts += sign
+        if sign > 0:
+            self.wpm_sketch.add(wpm)
+        else:
+            self.wpm_sketch.remove(wpm)
+
+    def update(self, student_id, record):
+        """Troca a contribuição antiga do aluno pela do registro atual (ou remove)"""
+        previous = self.contributions.pop(student_id, None)
+        if previous is not None:
+            self._apply(previous[0], previous[1], -1)
+        if record is not None:
+            contribution = (record["time"], record["words"])
+            self.contributions[student_id] = contribution
+            self._apply(contribution[0], contribution[1], 1)
+
+    def summary(self):
+        """Valores atuais das métricas agregadas"""
+        count = self.count
+        return {
+            "alunos": count,
+            "palavras_por_minuto": {
+                "mean": self.wpm_sum / count if count else 0.0,
+                "p25": self.wpm_sketch.quantile(0.25),
+                "p50": self.wpm_sketch.quantile(0.5),
+                "p75": self.wpm_sketch.quantile(0.75),
+                "p90": self.wpm_sketch.quantile(0.9)
+            },
+            "taxa_conclusao": 100 * self.completed / count if count else 0.0,
+            "desistencias": self.dropouts,
+            "media_tempo_jogado": self.total_time / count if count else 0.0,
+            "media_palavras_aprendidas": self.total_words / count if count else 0.0
+        }
+
+
+# Definições anunciadas no /analytics-list (mesma ordem de summary())
+CLASS_ANALYTICS_DEFINITIONS = [
+    {"name": "alunos", "type": "integer"},
+    {"name": "palavras_por_minuto", "type": "distribution"},
+    {"name": "taxa_conclusao", "type": "percentage"},
+    {"name": "desistencias", "type": "integer"},
+    {"name": "media_tempo_jogado", "type": "number"},
+    {"name": "media_palavras_aprendidas", "type": "number"}
+]
+
+
+class ClassAggregateTracker:
+    """
+    Mantém os agregados das atividades consultadas
+
+    Locks:
+    - _lock protege os agregados e os conjuntos de alunos alterados; o
+      listener só o segura para marcar o aluno (sem ler o repositório)
+    - _refresh_lock serializa a aplicação das alterações, para que duas
+      leituras nunca apliquem estados do mesmo aluno fora de ordem
+    """
+
+    def __init__(self, repository, completion_target=50):
+        self.repository = repository
+        self.completion_target = completion_target
+        self._aggregates = {}
+        self._dirty = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        repository.add_change_listener(self._on_change)
+
+    def close(self):
+        """Deixa de observar o repositório"""
+        self.repository.remove_change_listener(self._on_change)
+
+    def _on_change(self, activity_id, student_id):
+        with self._lock:
+            dirty = self._dirty.get(activity_id)
+            if dirty is None:
+                # Atividade ainda não acompanhada: será lida por inteiro
+                return
+            if student_id is None:
+                # Atividade removida: recomeça do zero na próxima leitura
+                del self._dirty[activity_id]
+                del self._aggregates[activity_id]
+                return
+            dirty.add(student_id)
+
+    def get_summary(self, activity_id):
+        """
+        Aplica as alterações pendentes e retorna as métricas agregadas
+
+        Returns:
+            dict: Ver ActivityAggregate.summary()
+        """
+        with self._refresh_lock:
+            with self._lock:
+                aggregate = self._aggregates.get(activity_id)
+                if aggregate is None:
+                    aggregate = ActivityAggregate(self.completion_target)
+                    self._aggregates[activity_id] = aggregate
+                    self._dirty[activity_id] = set()
+                    bootstrap = True
+                else:
+                    changed = self._dirty[activity_id]
+                    self._dirty[activity_id] = set()
+                    bootstrap = False
+
+            # Leituras fora de _lock: o listener roda sob o lock do repositório
+            if bootstrap:
+                updates = [
+                    (record["student_id"], record)
+                    for record in self.repository.list_students(activity_id)
+                ]
+            else:
+                updates = [
+                    (student_id, self.repository.get_student(activity_id, student_id))
+                    for student_id in changed
+                ]
+
+            with self._lock:
+                # Removida durante a leitura: os dados lidos já não valem
+                if self._aggregates.get(activity_id) is not aggregate:
+                    return ActivityAggregate(self.completion_target).summary()
+                for student_id, record in updates:
+                    aggregate.update(student_id, record)
+                return aggregate.summary()
+
+    def get_class_analytics(self, activity_id):
+        """
+        Métricas agregadas no formato de métricas da Inven!RA
+
+        Returns:
+            list: [{"name", "type", "value"}, ...]
+        """
+        summary = self.get_summary(activity_id)
+        return [
+            MetricFactory.create_metric(
+                "quant", definition["name"], summary[definition["name"]], definition["type"]
+            ).to_json()
+            for definition in CLASS_ANALYTICS_DEFINITIONS
+        ]
+
+
+_trackers = {}
+_trackers_lock = threading.Lock()
+
+
+def get_class_aggregate_tracker(repository, completion_target=50):
+    """
+    Retorna o acompanhamento de agregados do repositório, criado (e
+    registrado como listener) apenas na primeira chamada
+
+    Vários subsistemas sobre o mesmo repositório partilham assim um
+    único listener em vez de acumular um por instância.
+    """
+    key = id(repository)
+    with _trackers_lock:
+        tracker = _trackers.get(key)
+        if tracker is None or tracker.repository is not repository:
+            tracker = ClassAggregateTracker(repository, completion_target)
+            _trackers[key] = tracker
+    return tracker
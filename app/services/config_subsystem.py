@@ -3,6 +3,11 @@ Subsistema de Configuração
 Responsável por gerenciar configurações e metadados da atividade
 Parte do padrão FACADE
 """
+from html import escape
+
+from config.config import Config
+from app.decks import DeckStore
+from app.services.class_aggregates import CLASS_ANALYTICS_DEFINITIONS
 
 class ConfigSubsystem:
     """
@@ -10,9 +15,19 @@ class ConfigSubsystem:
     da atividade e seus metadados
     """
     
-    def __init__(self):
+    def __init__(self, deck_store=None):
         self.activity_name = "WordMemorizer Game"
-        self.default_deck = "deck_123_exemplo"
+        self.default_deck = Config.DEFAULT_DECK_ID
+        self.deck_store = deck_store or DeckStore(Config.DECK_DIR)
+    
+    def _deck_options_html(self):
+        """Opções do seletor de deck (os decks disponíveis em DECK_DIR)"""
+        deck_ids = self.deck_store.deck_ids() or [self.default_deck]
+        return "".join(
+            f'<option value="{escape(deck_id)}"{" selected" if deck_id == self.default_deck else ""}>'
+            f'{escape(deck_id)}</option>'
+            for deck_id in deck_ids
+        )
         
     def get_config_page_html(self):
         """
@@ -29,9 +44,10 @@ class ConfigSubsystem:
             <label>Tema do Deck:</label><br>
             <input type="text" id="tema" name="tema" value="Cores em Alemão"><br><br>
             
-            <input type="hidden" name="deck_id" value="{self.default_deck}">
+            <label>Deck:</label><br>
+            <select name="deck_id">{self._deck_options_html()}</select>
             
-            <p><em>(Ao salvar, o ID '{self.default_deck}' será enviado à Inven!RA)</em></p>
+            <p><em>(Ao salvar, o ID do deck escolhido será enviado à Inven!RA)</em></p>
         </form>
         </body></html>
         """
@@ -52,7 +68,8 @@ class ConfigSubsystem:
         Define as métricas disponíveis para analytics
         
         Returns:
-            dict: Definição das métricas quantitativas e qualitativas
+            dict: Definição das métricas quantitativas e qualitativas por
+                  aluno e das métricas agregadas da turma (classAnalytics)
         """
         return {
             "quantAnalytics": [
@@ -61,7 +78,8 @@ class ConfigSubsystem:
             ],
             "qualAnalytics": [
                 {"name": "feedback_professor", "type": "text/plain"}
-            ]
+            ],
+            "classAnalytics": [dict(definition) for definition in CLASS_ANALYTICS_DEFINITIONS]
         }
     
     def get_game_entry_url(self, base_url):
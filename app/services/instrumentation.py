@@ -0,0 +1,246 @@
+"""
+Instrumentação do caminho quente (latências, contagens e profundidade de filas)
+
+As medições são gravadas em contadores por thread (um shard por thread,
+acessado via threading.local), então registrar uma latência não adquire
+nenhum lock nem disputa cache com outras threads. Os shards só são
+somados quando o endpoint /metrics é lido, no formato de texto do
+Prometheus.
+
+Métricas coletadas:
+- http_request_duration_seconds / http_requests_total: por rota, método e status
+- command_duration_seconds / commands_total: por classe de comando e resultado
+- storage_operation_duration_seconds: por operação do repositório
+- gauges lidos no scrape (fila de comandos, coalescer, assinantes de eventos,
+  cache de decks)
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+# Limites superiores dos buckets dos histogramas (segundos)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Operações do repositório cronometradas por instrument_repository
+STORAGE_OPERATIONS = (
+    "get_student", "list_students", "save_student", "increment_student",
+    "remove_student", "restore_student", "delete_activity", "query_students",
+    "changes_since"
+)
+
+
+class _Shard:
+    """Contadores e histogramas gravados por uma única thread"""
+
+    __slots__ = ("thread", "counters", "histograms")
+
+    def __init__(self, thread):
+        self.thread = thread
+        # (nome, labels) -> valor
+        self.counters = {}
+        # (nome, labels) -> [contagem por bucket..., +Inf, soma]
+        self.histograms = {}
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels, extra=()):
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class MetricsRegistry:
+    """
+    Registro de métricas com shards por thread
+
+    Os labels são tuplas de pares (nome, valor), por exemplo
+    (("route", "/analytics-data"), ("method", "POST")).
+    """
+
+    # A cada N shards criados, os de threads encerradas são consolidados
+    PRUNE_EVERY = 256
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._local = threading.local()
+        self._shards = []
+        # Valores de threads encerradas, já consolidados
+        self._retired = _Shard(None)
+        self._lock = threading.Lock()
+        self._created = 0
+        self._descriptions = {}
+        self._gauges = []
+
+    def describe(self, name, kind, help_text):
+        """Registra o tipo (counter, histogram, gauge) e a descrição de uma métrica"""
+        self._descriptions[name] = (kind, help_text)
+
+    def add_gauge(self, name, help_text, callback, kind="gauge"):
+        """
+        Registra um gauge lido no scrape
+
+        Args:
+            callback (callable): Retorna um número ou um dict labels -> número
+            kind (str): "counter" para contadores mantidos fora do registro
+        """
+        self.describe(name, kind, help_text)
+        self._gauges.append((name, callback))
+
+    # ========== GRAVAÇÃO (THREAD ATUAL, SEM LOCK) ==========
+
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard(threading.current_thread())
+            with self._lock:
+                self._shards.append(shard)
+                self._created += 1
+                if self._created % self.PRUNE_EVERY == 0:
+                    self._retire_dead_shards()
+        return shard
+
+    def inc(self, name, labels=(), amount=1):
+        counters = self._shard().counters
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + amount
+
+    def observe(self, name, value, labels=()):
+        histograms = self._shard().histograms
+        key = (name, labels)
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = [0] * (len(self.buckets) + 2)
+        histogram[bisect_left(self.buckets, value)] += 1
+        histogram[-1] += value
+
+    # ========== CONSOLIDAÇÃO (SCRAPE) ==========
+
+    def _merge_into(self, target, shard):
+        # list(dict.items()) é atômico no CPython: a thread dona do shard
+        # pode continuar gravando durante a cópia
+        for key, value in list(shard.counters.items()):
+            target.counters[key] = target.counters.get(key, 0) + value
+        for key, histogram in list(shard.histograms.items()):
+            merged = target.histograms.get(key)
+            if merged is None:
+                target.histograms[key] = list(histogram)
+            else:
+                for index, value in enumerate(list(histogram)):
+                    merged[index] += value
+
+    def _retire_dead_shards(self):
+        alive = []
+        for shard in self._shards:
+            if shard.thread.is_alive():
+                alive.append(shard)
+            else:
+                self._merge_into(self._retired, shard)
+        self._shards = alive
+
+    def snapshot(self):
+        """
+        Soma os shards de todas as threads
+
+        Returns:
+            _Shard: Contadores e histogramas consolidados
+        """
+        total = _Shard(None)
+        with self._lock:
+            self._retire_dead_shards()
+            self._merge_into(total, self._retired)
+            shards = list(self._shards)
+        for shard in shards:
+            self._merge_into(total, shard)
+        return total
+
+    def render(self):
+        """Todas as métricas no formato de texto do Prometheus (0.0.4)"""
+        snapshot = self.snapshot()
+        series = {}
+        for (name, labels), value in sorted(snapshot.counters.items(), key=repr):
+            series.setdefault(name, []).append(f"{name}{_format_labels(labels)} {value:g}")
+
+        for (name, labels), histogram in sorted(snapshot.histograms.items(), key=repr):
+            lines = series.setdefault(name, [])
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), histogram):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels, (('le', bound),))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {histogram[-1]:.9g}")
+            lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+
+        for name, callback in self._gauges:
+            value = callback()
+            values = value.items() if isinstance(value, dict) else [((), value)]
+            series.setdefault(name, []).extend(
+                f"{name}{_format_labels(labels)} {gauge:g}" for labels, gauge in values
+            )
+
+        output = []
+        for name in sorted(series):
+            kind, help_text = self._descriptions.get(name, ("untyped", ""))
+            output.append(f"# HELP {name} {help_text}")
+            output.append(f"# TYPE {name} {kind}")
+            output.extend(series[name])
+        return "\n".join(output) + "\n"
+
+
+METRICS = MetricsRegistry()
+METRICS.describe("http_request_duration_seconds", "histogram", "Latência das requisições HTTP por rota")
+METRICS.describe("http_requests_total", "counter", "Requisições HTTP por rota, método e status")
+METRICS.describe("command_duration_seconds", "histogram", "Latência de execução dos comandos (inclui espera pelos locks)")
+METRICS.describe("commands_total", "counter", "Comandos executados por classe e resultado")
+METRICS.describe("storage_operation_duration_seconds", "histogram", "Latência das operações do repositório")
+
+
+def init_app(app, registry=METRICS):
+    """Registra a medição de latência por rota numa aplicação Flask"""
+    from flask import g, request
+
+    @app.before_request
+    def _start_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        started = g.pop("request_started", None)
+        if started is not None:
+            route = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+            labels = (("route", route), ("method", request.method))
+            registry.observe("http_request_duration_seconds", time.perf_counter() - started, labels)
+            registry.inc("http_requests_total", labels + (("status", response.status_code),))
+        return response
+
+
+def instrument_repository(repository, registry=METRICS):
+    """
+    Cronometra as operações do repositório (STORAGE_OPERATIONS)
+
+    Os métodos são substituídos só nesta instância; chamar de novo não
+    instrumenta duas vezes.
+    """
+    if getattr(repository, "_instrumented", False):
+        return repository
+
+    def timed(operation, method):
+        labels = (("operation", operation),)
+
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                registry.observe("storage_operation_duration_seconds", time.perf_counter() - started, labels)
+        return wrapper
+
+    for operation in STORAGE_OPERATIONS:
+        setattr(repository, operation, timed(operation, getattr(repository, operation)))
+    repository._instrumented = True
+    return repository
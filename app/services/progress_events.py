@@ -0,0 +1,297 @@
+"""
+Barramento de eventos de progresso (push para os dashboards)
+
+Cada escrita no repositório (qualquer comando de game_commands, o
+coalescer ou o replay do journal) gera um evento para a atividade
+alterada, publicado uma única vez num canal por atividade:
+
+- update: o aluno foi salvo/atualizado (analytics já serializado)
+- delete: o aluno foi removido
+- reset: a atividade inteira foi removida
+
+O canal guarda os últimos buffer_size eventos num buffer circular
+compartilhado; cada assinante guarda apenas a sua posição (o cursor,
+que é a versão da atividade). Um assinante que fica para trás do
+buffer (lento, ou reconectando com um cursor antigo) é atualizado pelo
+feed de mudanças do repositório (changes_since); se nem o feed tem o
+histórico, recebe um evento resync e deve recarregar a turma. A memória
+não cresce com o número de assinantes nem com a lentidão deles.
+
+Atividades sem assinantes não têm canal, e as escritas nelas não pagam
+nada além de uma consulta a um dict.
+"""
+
+import asyncio
+import json
+import threading
+from collections import deque
+
+from app.services.analytics_service import STUDENT_ANALYTICS_SERIALIZER
+
+
+class ActivityChannel:
+    """Buffer circular de eventos de uma atividade"""
+
+    def __init__(self, buffer_size):
+        self.events = deque(maxlen=buffer_size)
+        self.last_seq = 0
+        # Posições >= floor ainda têm todos os eventos seguintes no buffer
+        # (-1 até o primeiro assinante ler a versão da atividade)
+        self.floor = -1
+        self.subscribers = 0
+        self.condition = threading.Condition()
+        # Assinantes assíncronos (ASGI) aguardando: (loop, future)
+        self.waiters = set()
+
+    def start_at(self, version):
+        """Marca a versão a partir da qual o canal tem todos os eventos"""
+        with self.condition:
+            if self.floor < 0:
+                self.floor = version
+            self.last_seq = max(self.last_seq, version)
+
+    def publish(self, seq, payload):
+        with self.condition:
+            if len(self.events) == self.events.maxlen:
+                self.floor = self.events[0][0]
+            self.events.append((seq, payload))
+            self.last_seq = max(self.last_seq, seq)
+            self.condition.notify_all()
+            for loop, future in self.waiters:
+                loop.call_soon_threadsafe(_wake, future)
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class Subscription:
+    """
+    Posição de um assinante num canal
+
+    Use como context manager (ou chame close()) para liberar o canal.
+    """
+
+    def __init__(self, bus, activity_id, channel, position):
+        self.bus = bus
+        self.activity_id = activity_id
+        self.channel = channel
+        self.position = position
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.bus._release(self.activity_id, self.channel)
+
+    def next_events(self, timeout=None):
+        """
+        Aguarda e retorna os eventos posteriores à posição do assinante
+
+        Returns:
+            list: Pares (cursor, payload JSON); vazia se o timeout expirou
+        """
+        channel = self.channel
+        with channel.condition:
+            if channel.last_seq <= self.position:
+                channel.condition.wait(timeout)
+
+            if self.position >= channel.floor:
+                events = [event for event in channel.events if event[0] > self.position]
+                self.position = max(self.position, channel.last_seq)
+                return events
+            since = self.position
+
+        # Atrás do buffer: lê o feed fora do lock do canal (o listener
+        # publica com o lock do repositório adquirido)
+        return self._catch_up(since)
+
+    async def next_events_async(self, timeout=None):
+        """
+        Versão assíncrona de next_events: aguarda sem ocupar uma thread
+
+        Usada pelo modo ASGI, onde cada conexão aberta é só uma corrotina.
+        """
+        channel = self.channel
+        waiter = None
+        with channel.condition:
+            if channel.last_seq <= self.position:
+                loop = asyncio.get_running_loop()
+                waiter = (loop, loop.create_future())
+                channel.waiters.add(waiter)
+
+        if waiter is not None:
+            try:
+                await asyncio.wait_for(waiter[1], timeout)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                with channel.condition:
+                    channel.waiters.discard(waiter)
+
+        if self.bus.repository.blocking_io:
+            # O feed de mudanças pode consultar o disco
+            return await asyncio.get_running_loop().run_in_executor(None, self.next_events, 0)
+        return self.next_events(timeout=0)
+
+    def _catch_up(self, since):
+        changes = self.bus.repository.changes_since(self.activity_id, since)
+        cursor = changes.cursor
+        self.position = max(self.position, cursor)
+        if changes.full:
+            return [(cursor, json.dumps({"type": "resync", "since": since, "cursor": cursor}))]
+
+        events = [
+            (cursor, '{"type":"update","cursor":%d,"student":%s}' % (
+                cursor, STUDENT_ANALYTICS_SERIALIZER.serialize_student(record)
+            ))
+            for record in changes.records
+        ]
+        events.extend(
+            (cursor, json.dumps({"type": "delete", "cursor": cursor, "student_id": student_id}))
+            for student_id in changes.deleted
+        )
+        return events
+
+
+class ProgressEventBus:
+    """
+    Distribui as mudanças do repositório para os assinantes de cada atividade
+    """
+
+    def __init__(self, repository, buffer_size=256):
+        self.repository = repository
+        self.buffer_size = buffer_size
+        self._channels = {}
+        self._lock = threading.Lock()
+        repository.add_change_listener(self._on_change)
+
+    def close(self):
+        """Deixa de observar o repositório"""
+        self.repository.remove_change_listener(self._on_change)
+
+    def subscribe(self, activity_id, after=None):
+        """
+        Assina os eventos de uma atividade
+
+        Args:
+            after (int, optional): Último cursor já recebido pelo cliente
+                                   (ex.: Last-Event-ID); padrão: agora
+
+        Returns:
+            Subscription
+        """
+        with self._lock:
+            channel = self._channels.get(activity_id)
+            if channel is None:
+                channel = self._channels[activity_id] = ActivityChannel(self.buffer_size)
+            channel.subscribers += 1
+
+        # Lida depois de o canal existir: nenhuma escrita fica sem evento
+        version = self.repository.get_version(activity_id)
+        channel.start_at(version)
+        position = version if after is None else after
+        return Subscription(self, activity_id, channel, position)
+
+    def subscriber_count(self, activity_id):
+        with self._lock:
+            channel = self._channels.get(activity_id)
+            return channel.subscribers if channel is not None else 0
+
+    def total_subscribers(self):
+        with self._lock:
+            return sum(channel.subscribers for channel in self._channels.values())
+
+    def _release(self, activity_id, channel):
+        with self._lock:
+            channel.subscribers -= 1
+            if channel.subscribers == 0 and self._channels.get(activity_id) is channel:
+                del self._channels[activity_id]
+
+    def _on_change(self, activity_id, student_id):
+        # Chamado com o lock do repositório: só trabalha se houver assinantes
+        with self._lock:
+            channel = self._channels.get(activity_id)
+        if channel is None:
+            return
+
+        version = self.repository.get_version(activity_id)
+        if student_id is None:
+            payload = '{"type":"reset","cursor":%d}' % version
+        else:
+            record = self.repository.get_student(activity_id, student_id)
+            if record is None:
+                payload = json.dumps({"type": "delete", "cursor": version, "student_id": student_id})
+            else:
+                # Serializado uma vez e compartilhado por todos os assinantes
+                payload = '{"type":"update","cursor":%d,"student":%s}' % (
+                    version, STUDENT_ANALYTICS_SERIALIZER.serialize_student(record)
+                )
+        channel.publish(version, payload)
+
+
+def parse_cursor(value):
+    """
+    Converte o cursor enviado pelo cliente (?after= ou Last-Event-ID)
+
+    Returns:
+        int ou None (ausente)
+
+    Raises:
+        ValueError: Cursor não é um inteiro não negativo
+    """
+    if value is None or value == "":
+        return None
+    after = int(value)
+    if after < 0:
+        raise ValueError(value)
+    return after
+
+
+def format_poll_response(cursor, events):
+    """Corpo da resposta do long-poll; os eventos já estão serializados"""
+    return '{"success":true,"cursor":%d,"events":[%s]}' % (
+        cursor, ",".join(payload for _, payload in events)
+    )
+
+
+def format_sse(events):
+    return "".join(f"id: {cursor}\ndata: {payload}\n\n" for cursor, payload in events)
+
+
+def iter_sse(subscription, heartbeat_seconds=15):
+    """
+    Gera o fluxo text/event-stream de uma assinatura
+
+    O id de cada evento é o cursor, então o navegador reconecta com
+    Last-Event-ID e continua de onde parou. Comentários periódicos
+    mantêm a conexão viva através de proxies.
+    """
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            events = subscription.next_events(timeout=heartbeat_seconds)
+            if not events:
+                yield ": keepalive\n\n"
+                continue
+            yield format_sse(events)
+    finally:
+        subscription.close()
+
+
+async def aiter_sse(subscription, heartbeat_seconds=15):
+    """Versão assíncrona de iter_sse (modo ASGI)"""
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            events = await subscription.next_events_async(timeout=heartbeat_seconds)
+            yield format_sse(events) if events else ": keepalive\n\n"
+    finally:
+        subscription.close()
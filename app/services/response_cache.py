@@ -0,0 +1,122 @@
+"""
+Cache de respostas serializadas do /analytics-data
+
+Guarda, por atividade, o corpo JSON já serializado junto com a versão
+da atividade no repositório. Enquanto a versão não muda (nenhum comando
+de escrita tocou a atividade), a resposta é servida sem reconstruir as
+métricas e, se o cliente enviar o ETag atual, sem corpo (304).
+
+A memória é limitada por um orçamento em bytes com despejo LRU.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+def compute_etag(body):
+    """Gera um ETag forte a partir do conteúdo serializado"""
+    return '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+
+
+def etag_matches(if_none_match, etag):
+    """
+    Verifica se o cabeçalho If-None-Match contém o ETag informado
+
+    Args:
+        if_none_match (str): Valor bruto do cabeçalho (pode ser None)
+        etag (str): ETag atual da resposta
+
+    Returns:
+        bool: True se o cliente já possui esta versão
+    """
+    if not if_none_match or etag is None:
+        return False
+
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        # Comparação fraca, como exige a RFC 9110 para If-None-Match
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+class CacheEntry:
+    __slots__ = ("version", "body", "etag")
+
+    def __init__(self, version, body, etag):
+        self.version = version
+        self.body = body
+        self.etag = etag
+
+
+class AnalyticsResponseCache:
+    """
+    Cache LRU de respostas serializadas, limitado por bytes
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, activity_id, version):
+        """
+        Retorna a entrada se ela corresponde à versão atual da atividade
+
+        Returns:
+            CacheEntry ou None
+        """
+        with self._lock:
+            entry = self._entries.get(activity_id)
+            if entry is None or entry.version != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(activity_id)
+            self.hits += 1
+            return entry
+
+    def put(self, activity_id, version, body):
+        """
+        Armazena o corpo serializado de uma atividade
+
+        Respostas maiores que o orçamento inteiro não são armazenadas.
+
+        Returns:
+            CacheEntry: Entrada criada (armazenada ou não)
+        """
+        entry = CacheEntry(version, body, compute_etag(body))
+
+        with self._lock:
+            previous = self._entries.pop(activity_id, None)
+            if previous is not None:
+                self.current_bytes -= len(previous.body)
+
+            if len(body) > self.max_bytes:
+                return entry
+
+            self._entries[activity_id] = entry
+            self.current_bytes += len(body)
+
+            # Despeja as entradas menos usadas até caber no orçamento
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= len(evicted.body)
+
+        return entry
+
+    def invalidate(self, activity_id):
+        """Remove a entrada de uma atividade"""
+        with self._lock:
+            entry = self._entries.pop(activity_id, None)
+            if entry is not None:
+                self.current_bytes -= len(entry.body)
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,289 @@
+"""
+Agendador de revisões espaçadas (SM-2) por aluno e palavra
+
+Cada atividade tem uma lista de palavras (o deck) e, para cada aluno,
+o estado de revisão de cada palavra guardado em colunas compactas
+(array), indexadas pela posição da palavra no deck:
+
+- due: instante da próxima revisão (epoch em segundos; 0 = palavra nova)
+- interval: intervalo atual em dias
+- ease: fator de facilidade do SM-2
+- reps / lapses: acertos seguidos e esquecimentos
+
+As revisões pendentes ficam num heap por aluno ordenado pelo instante
+da revisão, então "as próximas N cartas" custa O(N log n) em vez de
+percorrer o deck inteiro. Cada entrada do heap é um único inteiro
+(segundo da revisão * SLOT_LIMIT + posição); entradas antigas de uma
+carta revista (com outro segundo, ou cópias do mesmo) são descartadas
+preguiçosamente e o heap é reconstruído quando metade dele é lixo.
+
+O custo por carta é de cerca de 20 bytes nas colunas mais uma entrada
+de heap, o que permite milhões de cartas por processo.
+"""
+
+import heapq
+import sys
+import threading
+import time
+from array import array
+
+SECONDS_PER_DAY = 86400
+# Número máximo de palavras por deck (posição codificada no heap)
+SLOT_LIMIT = 1 << 20
+
+MIN_EASE = 1.3
+INITIAL_EASE = 2.5
+# Teto do intervalo (dias): sem ele, acertos seguidos estouram o float
+MAX_INTERVAL_DAYS = 36500
+
+
+def sm2(quality, interval, ease, reps):
+    """
+    Um passo do algoritmo SM-2
+
+    Args:
+        quality (int): Nota da resposta, de 0 (esqueceu) a 5 (perfeita)
+
+    Returns:
+        tuple: (intervalo em dias, fator de facilidade, acertos seguidos)
+    """
+    if quality < 3:
+        # Esqueceu: recomeça a sequência e revê amanhã
+        return 1.0, ease, 0
+    if reps == 0:
+        interval = 1.0
+    elif reps == 1:
+        interval = 6.0
+    else:
+        interval = min(round(interval * ease), MAX_INTERVAL_DAYS)
+    ease = max(MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    return interval, ease, reps + 1
+
+
+class _StudentCards:
+    """Estado de revisão de um aluno, em colunas indexadas pela posição da palavra"""
+
+    __slots__ = ("due", "interval", "ease", "reps", "lapses", "heap", "introduced", "new_cursor")
+
+    def __init__(self):
+        self.due = array("d")
+        self.interval = array("f")
+        self.ease = array("f")
+        self.reps = array("H")
+        self.lapses = array("H")
+        self.heap = []
+        self.introduced = 0
+        # Palavras antes desta posição já foram todas introduzidas
+        self.new_cursor = 0
+
+    def ensure(self, size):
+        missing = size - len(self.due)
+        if missing > 0:
+            self.due.extend(array("d", [0.0]) * missing)
+            self.interval.extend(array("f", [0.0]) * missing)
+            self.ease.extend(array("f", [INITIAL_EASE]) * missing)
+            self.reps.extend(array("H", [0]) * missing)
+            self.lapses.extend(array("H", [0]) * missing)
+
+    def push(self, slot):
+        heapq.heappush(self.heap, int(self.due[slot]) * SLOT_LIMIT + slot)
+        # Heap com mais da metade de entradas antigas: reconstrói
+        if len(self.heap) > 2 * self.introduced + 64:
+            self.heap = [int(self.due[s]) * SLOT_LIMIT + s for s in range(len(self.due)) if self.due[s]]
+            heapq.heapify(self.heap)
+
+    def is_current(self, key):
+        slot = key % SLOT_LIMIT
+        return int(self.due[slot]) == key // SLOT_LIMIT, slot
+
+
+class _ActivityDeck:
+    """Palavras de uma atividade e os cartões dos seus alunos"""
+
+    __slots__ = ("words", "slots", "students", "loaded", "lock")
+
+    def __init__(self):
+        self.words = []
+        self.slots = {}
+        self.students = {}
+        # Versões de decks (content_hash) cujas palavras já foram acrescentadas
+        self.loaded = set()
+        self.lock = threading.Lock()
+
+
+class ReviewScheduler:
+    """
+    Agendador SM-2 com estado em memória por (atividade, aluno, palavra)
+
+    Locks: um por atividade, como no CommandInvoker; listar as cartas
+    pendentes também o adquire, pois reorganiza o heap do aluno.
+    """
+
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self._activities = {}
+        self._lock = threading.Lock()
+
+    def _deck(self, activity_id, create=False):
+        deck = self._activities.get(activity_id)
+        if deck is None and create:
+            with self._lock:
+                deck = self._activities.setdefault(activity_id, _ActivityDeck())
+        return deck
+
+    def add_words(self, activity_id, words):
+        """
+        Acrescenta palavras ao deck da atividade (as repetidas são ignoradas)
+
+        Returns:
+            int: Número de palavras novas
+
+        Raises:
+            ValueError: O deck excederia SLOT_LIMIT palavras
+        """
+        deck = self._deck(activity_id, create=True)
+        with deck.lock:
+            return self._add_words(deck, words)
+
+    def _add_words(self, deck, words):
+        added = 0
+        for word in words:
+            if word in deck.slots:
+                continue
+            if len(deck.words) >= SLOT_LIMIT:
+                raise ValueError(f"Deck exceeds {SLOT_LIMIT} words")
+            word = sys.intern(word)
+            deck.slots[word] = len(deck.words)
+            deck.words.append(word)
+            added += 1
+        return added
+
+    def load_deck(self, activity_id, content_hash, words):
+        """
+        Acrescenta as palavras de uma versão de deck, uma única vez
+
+        Um deck recompilado (outro content_hash) acrescenta só as palavras
+        que faltam; as posições existentes, e o estado dos alunos, não mudam.
+
+        Returns:
+            int: Número de palavras novas (0 se a versão já foi carregada)
+
+        Raises:
+            ValueError: O deck excederia SLOT_LIMIT palavras
+        """
+        deck = self._deck(activity_id, create=True)
+        with deck.lock:
+            if content_hash in deck.loaded:
+                return 0
+            added = self._add_words(deck, words)
+            deck.loaded.add(content_hash)
+            return added
+
+    def deck_size(self, activity_id):
+        deck = self._deck(activity_id)
+        return len(deck.words) if deck is not None else 0
+
+    def card_count(self):
+        """Número de cartas já revistas em todas as atividades"""
+        with self._lock:
+            decks = list(self._activities.values())
+        total = 0
+        for deck in decks:
+            with deck.lock:
+                total += sum(cards.introduced for cards in deck.students.values())
+        return total
+
+    def _card(self, deck, cards, slot):
+        if slot >= len(cards.due):
+            # Palavra acrescentada ao deck depois do último estudo do aluno
+            return {"word": deck.words[slot], "due": 0.0, "interval": 0.0, "ease": INITIAL_EASE,
+                    "reps": 0, "lapses": 0, "new": True}
+        return {
+            "word": deck.words[slot],
+            "due": cards.due[slot],
+            "interval": float(cards.interval[slot]),
+            "ease": round(float(cards.ease[slot]), 4),
+            "reps": cards.reps[slot],
+            "lapses": cards.lapses[slot],
+            "new": cards.due[slot] == 0
+        }
+
+    def review(self, activity_id, student_id, word, quality, now=None):
+        """
+        Registra uma resposta e agenda a próxima revisão da palavra
+
+        Returns:
+            dict ou None: Estado atualizado da carta; None se a palavra
+                          não está no deck da atividade
+        """
+        now = self._clock() if now is None else now
+        deck = self._deck(activity_id)
+        if deck is None:
+            return None
+        with deck.lock:
+            slot = deck.slots.get(word)
+            if slot is None:
+                return None
+            cards = deck.students.get(student_id)
+            if cards is None:
+                cards = deck.students[student_id] = _StudentCards()
+            cards.ensure(slot + 1)
+
+            if cards.due[slot] == 0:
+                cards.introduced += 1
+            elif quality < 3:
+                cards.lapses[slot] = min(cards.lapses[slot] + 1, 0xFFFF)
+
+            interval, ease, reps = sm2(quality, cards.interval[slot], cards.ease[slot], cards.reps[slot])
+            cards.interval[slot] = interval
+            cards.ease[slot] = ease
+            cards.reps[slot] = min(reps, 0xFFFF)
+            # Nunca 0: 0 marca a palavra como nova
+            cards.due[slot] = max(now + interval * SECONDS_PER_DAY, 1.0)
+            cards.push(slot)
+            return self._card(deck, cards, slot)
+
+    def due_cards(self, activity_id, student_id, limit=20, now=None, include_new=True):
+        """
+        As próximas cartas a estudar: revisões vencidas (mais antigas
+        primeiro) e, se sobrar espaço, palavras novas na ordem do deck
+
+        Returns:
+            list: Estados das cartas (ver review), no máximo limit
+        """
+        now = self._clock() if now is None else now
+        deck = self._deck(activity_id)
+        if deck is None or limit <= 0:
+            return []
+        with deck.lock:
+            cards = deck.students.get(student_id) or _StudentCards()
+
+            # Retira as vencidas do topo do heap e as devolve depois
+            taken = []
+            taken_slots = set()
+            heap = cards.heap
+            while heap and len(taken) < limit and heap[0] // SLOT_LIMIT <= now:
+                key = heapq.heappop(heap)
+                current, slot = cards.is_current(key)
+                # Duas revisões no mesmo segundo geram a mesma chave: só
+                # a primeira volta ao heap, as cópias são descartadas
+                if current and slot not in taken_slots:
+                    taken.append(key)
+                    taken_slots.add(slot)
+            for key in taken:
+                heapq.heappush(heap, key)
+            result = [self._card(deck, cards, key % SLOT_LIMIT) for key in taken]
+
+            if include_new and len(result) < limit:
+                slot = cards.new_cursor
+                seen = len(cards.due)
+                # Avança o cursor enquanto as palavras já foram introduzidas
+                while slot < seen and cards.due[slot] != 0:
+                    slot += 1
+                if student_id in deck.students:
+                    cards.new_cursor = slot
+                while slot < len(deck.words) and len(result) < limit:
+                    if slot >= seen or cards.due[slot] == 0:
+                        result.append(self._card(deck, cards, slot))
+                    slot += 1
+            return result
@@ -0,0 +1,217 @@
+"""
+Logging estruturado e assíncrono (QueueHandler -> QueueListener)
+
+Na thread da requisição o registro só passa pelos filtros (amostragem e
+limite de taxa) e é colocado numa fila limitada; a formatação em JSON e
+a escrita no stderr acontecem na thread do QueueListener. A latência da
+requisição não inclui E/S de log, e uma fila cheia descarta o registro
+em vez de bloquear.
+
+Cada registro é uma linha JSON com ts, level, logger, event e os campos
+passados em extra={"fields": {...}}:
+
+    logger = get_logger("facade")
+    logger.info("analytics_request", extra={"fields": {"activity_id": "turma_A"}})
+
+O nome do evento (a mensagem) é a chave da amostragem e do limite de
+taxa, então deve ser fixo; os valores variáveis vão em fields.
+"""
+
+import atexit
+import itertools
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+from config.config import Config
+
+ROOT_LOGGER = "wordmemorizer"
+
+
+def get_logger(name):
+    """Logger da aplicação (filho de "wordmemorizer")"""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def parse_sample_rates(value):
+    """
+    Converte "evento:taxa,evento:taxa" num dict
+
+    Raises:
+        ValueError: Entrada malformada ou taxa fora de (0, 1]
+    """
+    rates = {}
+    for item in filter(None, (part.strip() for part in (value or "").split(","))):
+        event, _, rate = item.partition(":")
+        rate = float(rate)
+        if not 0 < rate <= 1:
+            raise ValueError(f"Taxa de amostragem inválida para {event}: {rate}")
+        rates[event.strip()] = rate
+    return rates
+
+
+class JsonFormatter(logging.Formatter):
+    """Formata o registro como uma linha JSON"""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage()
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Mantém só 1 de cada N registros dos eventos configurados
+
+    Avisos e erros nunca são amostrados. A contagem é determinística
+    (itertools.count, atômico no CPython), sem sorteio nem lock.
+    """
+
+    def __init__(self, sample_rates):
+        super().__init__()
+        self._every = {event: max(1, round(1 / rate)) for event, rate in sample_rates.items()}
+        self._counters = {event: itertools.count() for event in self._every}
+
+    def filter(self, record):
+        every = self._every.get(record.msg)
+        if every is None or every == 1 or record.levelno >= logging.WARNING:
+            return True
+        return next(self._counters[record.msg]) % every == 0
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Limita cada evento a max_per_second registros por janela de um segundo
+
+    Os registros descartados são contados e o total é anexado
+    (fields["suppressed"]) ao primeiro registro aceito da janela seguinte.
+    """
+
+    def __init__(self, max_per_second, clock=time.monotonic):
+        super().__init__()
+        self.max_per_second = max_per_second
+        self._clock = clock
+        # evento -> [início da janela, aceitos, descartados]
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        now = self._clock()
+        with self._lock:
+            window = self._windows.get(record.msg)
+            if window is None or now - window[0] >= 1:
+                suppressed = window[2] if window is not None else 0
+                window = self._windows[record.msg] = [now, 0, 0]
+            else:
+                suppressed = 0
+            if window[1] >= self.max_per_second:
+                window[2] += 1
+                return False
+            window[1] += 1
+
+        if suppressed:
+            record.fields = dict(getattr(record, "fields", None) or {}, suppressed=suppressed)
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que não formata nem bloqueia na thread de origem
+
+    O QueueHandler padrão formata a mensagem em prepare(); aqui o
+    registro segue intacto e o JsonFormatter roda no listener. Com a
+    fila cheia o registro é descartado e contado em dropped.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class AsyncLogPipeline:
+    """
+    Fila + listener ligados ao logger "wordmemorizer"
+
+    Args:
+        handlers (list, optional): Destinos finais (padrão: stderr em JSON)
+        level (str): Nível mínimo
+        sample_rates (dict): evento -> fração mantida (ex.: 0.1)
+        max_per_second (int): Limite por evento (0 desativa)
+        queue_size (int): Registros aguardando formatação
+    """
+
+    def __init__(self, handlers=None, level="INFO", sample_rates=None, max_per_second=0, queue_size=10000):
+        if handlers is None:
+            stream = logging.StreamHandler(sys.stderr)
+            stream.setFormatter(JsonFormatter())
+            handlers = [stream]
+
+        self.queue_handler = NonBlockingQueueHandler(queue.Queue(queue_size))
+        if sample_rates:
+            self.queue_handler.addFilter(SamplingFilter(sample_rates))
+        if max_per_second:
+            self.queue_handler.addFilter(RateLimitFilter(max_per_second))
+        self.listener = logging.handlers.QueueListener(
+            self.queue_handler.queue, *handlers, respect_handler_level=True
+        )
+
+        self.logger = logging.getLogger(ROOT_LOGGER)
+        self.logger.setLevel(level)
+        self.logger.propagate = False
+
+    def start(self):
+        self.logger.addHandler(self.queue_handler)
+        self.listener.start()
+        return self
+
+    def stop(self):
+        """Remove o handler e escreve os registros pendentes"""
+        self.logger.removeHandler(self.queue_handler)
+        self.listener.stop()
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def configure_logging():
+    """
+    Inicia o pipeline de log da aplicação a partir de Config (uma única vez)
+
+    Returns:
+        AsyncLogPipeline
+    """
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = AsyncLogPipeline(
+                level=Config.LOG_LEVEL,
+                sample_rates=parse_sample_rates(Config.LOG_SAMPLE_RATES),
+                max_per_second=Config.LOG_RATE_LIMIT_PER_SECOND,
+                queue_size=Config.LOG_QUEUE_SIZE
+            ).start()
+            atexit.register(_pipeline.stop)
+        return _pipeline
@@ -34,6 +34,48 @@ class ValidationSubsystem:
             
         return True, None, activity_id
     
+    @staticmethod
+    def validate_analytics_scope(data):
+        """
+        Valida o campo opcional "scope" da requisição de analytics
+        
+        "student" (padrão) retorna as métricas por aluno e "class" as
+        métricas agregadas da turma.
+        
+        Args:
+            data (dict): Dados recebidos no POST (já validados)
+            
+        Returns:
+            tuple: (is_valid, error_message, scope)
+        """
+        scope = data.get('scope', 'student')
+        
+        if scope not in ('student', 'class'):
+            return False, "Bad Request: scope must be 'student' or 'class'", None
+            
+        return True, None, scope
+    
+    @staticmethod
+    def validate_analytics_since(data):
+        """
+        Valida o campo opcional "since" (cursor do feed de mudanças)
+        
+        Args:
+            data (dict): Dados recebidos no POST (já validados)
+            
+        Returns:
+            tuple: (is_valid, error_message, since ou None)
+        """
+        since = data.get('since')
+        
+        if since is None:
+            return True, None, None
+            
+        if isinstance(since, bool) or not isinstance(since, int) or since < 0:
+            return False, "Bad Request: since must be a non-negative integer", None
+            
+        return True, None, since
+    
     @staticmethod
     def validate_deploy_request(params):
         """
@@ -0,0 +1,9 @@
+"""
+Ponto de entrada ASGI (conexões longas sem ocupar workers)
+
+Para executar: uvicorn asgi:app
+O modo WSGI (gunicorn app:app) continua disponível em app.py.
+"""
+from app.asgi import create_asgi_app
+
+app = create_asgi_app()
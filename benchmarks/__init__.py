@@ -0,0 +1,6 @@
+"""
+Benchmarks de desempenho do WordMemorizer
+
+Execute cada script como módulo a partir da raiz do projeto, por exemplo:
+    python -m benchmarks.bench_storage
+"""
@@ -0,0 +1,104 @@
+"""
+Benchmark da busca aproximada de respostas (AnswerIndex)
+
+Uso:
+    python -m benchmarks.bench_answers [--words N] [--queries Q]
+
+Gera N respostas pseudo-aleatórias (sílabas com acentos e tremas) e Q
+respostas com até dois erros de digitação, e compara a latência da
+busca no índice com a de percorrer o deck calculando a distância
+limitada de cada resposta.
+"""
+import argparse
+import random
+import time
+
+from app.decks.answer_matching import AnswerIndex, answer_spellings, bounded_distance, max_edits_for, normalize_answer
+
+SYLLABLES = (
+    "ba", "be", "bi", "bo", "cão", "ça", "da", "de", "dö", "fa", "fü", "ga", "gu", "grü", "ha",
+    "ja", "ka", "la", "le", "li", "lo", "ma", "me", "mi", "mö", "na", "ne", "no", "pa", "pé",
+    "ra", "re", "ri", "ro", "sa", "se", "si", "so", "ta", "te", "ti", "to", "tü", "va", "ve",
+    "vi", "wa", "za", "ze", "ßa", "ch", "sch", "st", "nh", "lh", "r", "s", "n", "l", "m"
+)
+LETTERS = "abcdefghijklmnopqrstuvwxyzäöüßçãéá"
+
+
+def synthetic_answers(count, rng):
+    answers = set()
+    while len(answers) < count:
+        answers.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 6))))
+    return sorted(answers)
+
+
+def misspell(answer, rng):
+    chars = list(answer)
+    for _ in range(rng.randint(0, 2)):
+        position = rng.randrange(len(chars))
+        operation = rng.randrange(3)
+        if operation == 0:
+            chars[position] = rng.choice(LETTERS)
+        elif operation == 1:
+            chars.insert(position, rng.choice(LETTERS))
+        elif len(chars) > 1:
+            del chars[position]
+    return "".join(chars)
+
+
+def naive_search(spellings, text):
+    """Mesmo resultado do índice, calculado comparando com todas as respostas"""
+    query = normalize_answer(text)
+    max_edits = max_edits_for(query)
+    found = []
+    for index, candidates in enumerate(spellings):
+        distances = [bounded_distance(spelling, query, max_edits) for spelling in candidates]
+        distances = [distance for distance in distances if distance is not None]
+        if distances:
+            found.append((index, min(distances)))
+    return sorted(found, key=lambda item: (item[1], item[0]))
+
+
+def percentile(values, fraction):
+    return sorted(values)[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--words", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--naive-queries", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    answers = synthetic_answers(args.words, rng)
+    queries = [misspell(rng.choice(answers), rng) for _ in range(args.queries)]
+
+    start = time.perf_counter()
+    index = AnswerIndex(answers)
+    build_time = time.perf_counter() - start
+
+    latencies = {}
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query)
+        elapsed = time.perf_counter() - start
+        latencies.setdefault(max_edits_for(normalize_answer(query)), []).append(elapsed)
+
+    spellings = [answer_spellings(answer) for answer in answers]
+    start = time.perf_counter()
+    for query in queries[:args.naive_queries]:
+        naive_search(spellings, query)
+    naive_latency = (time.perf_counter() - start) / args.naive_queries
+
+    print(f"[respostas] {len(answers):,} respostas, {len(index):,} chaves")
+    print(f"  construir o índice          {build_time:>10.2f} s")
+    for max_edits in sorted(latencies):
+        values = latencies[max_edits]
+        print(f"  busca k={max_edits} p50 / p99        "
+              f"{percentile(values, 0.5) * 1e3:>7.3f} / {percentile(values, 0.99) * 1e3:.3f} ms  ({len(values)} buscas)")
+    print(f"  percorrer o deck            {naive_latency * 1e3:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Comparação de carga entre os modos WSGI (gunicorn) e ASGI (uvicorn)
+
+Uso:
+    python -m benchmarks.bench_asgi [--subscribers N] [--writes W] [--workers K]
+
+Para cada modo sobe um servidor local e abre N long-polls em
+/game/poll (dashboards esperando mudanças) enquanto um cliente de jogo
+envia W /game/save-progress em sequência. Mede a latência das gravações
+e quantos long-polls foram atendidos, sem erro, até o fim.
+
+No modo WSGI cada long-poll ocupa um dos K workers síncronos; no modo
+ASGI os long-polls são corrotinas e as gravações continuam a ser
+atendidas.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def server_command(mode, port, workers):
+    if mode == "wsgi":
+        return [sys.executable, "-m", "gunicorn", "-w", str(workers), "-b", f"127.0.0.1:{port}", "run:app"]
+    return [sys.executable, "-m", "uvicorn", "asgi:app", "--port", str(port), "--log-level", "warning"]
+
+
+async def http_request(port, method, path, body=None, timeout=60):
+    """Requisição HTTP/1.1 mínima (Connection: close); retorna (status, corpo)"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    payload = json.dumps(body).encode() if body is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n\r\n".encode() + payload
+    )
+    await writer.drain()
+    try:
+        response = await asyncio.wait_for(reader.read(), timeout)
+    finally:
+        writer.close()
+    head, _, content = response.partition(b"\r\n\r\n")
+    return int(head.split(b" ", 2)[1]), content
+
+
+async def wait_ready(port, deadline=15):
+    start = time.perf_counter()
+    while time.perf_counter() - start < deadline:
+        try:
+            await http_request(port, "GET", "/", timeout=1)
+            return
+        except (OSError, asyncio.TimeoutError, IndexError):
+            await asyncio.sleep(0.1)
+    raise RuntimeError("Servidor não respondeu")
+
+
+async def run_scenario(port, subscribers, writes, poll_timeout):
+    await http_request(port, "POST", "/game/save-progress", {
+        "activity_id": "bench_push", "student_id": "S0", "time_played": 1, "words_learned": 1
+    })
+
+    async def poll():
+        try:
+            status, _ = await http_request(
+                port, "GET", f"/game/poll/bench_push?timeout={poll_timeout}", timeout=poll_timeout * 4
+            )
+            return status == 200
+        except (OSError, asyncio.TimeoutError):
+            return False
+
+    polls = [asyncio.ensure_future(poll()) for _ in range(subscribers)]
+    await asyncio.sleep(0.5)
+
+    # Gravações sem resposta em poll_timeout segundos contam como falhas
+    latencies = []
+    start = time.perf_counter()
+    for i in range(writes):
+        request_start = time.perf_counter()
+        try:
+            await http_request(port, "POST", "/game/save-progress", {
+                "activity_id": "bench_push", "student_id": f"S{i}", "time_played": i, "words_learned": i % 50
+            }, timeout=poll_timeout)
+        except (OSError, asyncio.TimeoutError):
+            continue
+        latencies.append(time.perf_counter() - request_start)
+    elapsed = time.perf_counter() - start
+
+    answered = sum(await asyncio.gather(*polls))
+    return latencies, elapsed, answered
+
+
+def report(mode, latencies, elapsed, answered, subscribers, writes):
+    latencies = sorted(latencies)
+
+    def percentile(p):
+        return latencies[min(int(p / 100 * len(latencies)), len(latencies) - 1)] * 1000
+
+    print(f"[{mode}]")
+    print(f"  gravações concluídas       {len(latencies):>10} de {writes} ({len(latencies) / elapsed:,.1f}/s)")
+    if latencies:
+        print(f"  latência p50 / p95 / max   {percentile(50):>8.1f} / {percentile(95):.1f} / {latencies[-1] * 1000:.1f} ms")
+    print(f"  long-polls atendidos       {answered:>10} de {subscribers}")
+
+
+def run_mode(mode, args):
+    port = free_port()
+    env = dict(os.environ, STORAGE_ENGINE="memory")
+    server = subprocess.Popen(server_command(mode, port, args.workers), cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        asyncio.run(wait_ready(port))
+        latencies, elapsed, answered = asyncio.run(
+            run_scenario(port, args.subscribers, args.writes, args.poll_timeout)
+        )
+        report(mode, latencies, elapsed, answered, args.subscribers, args.writes)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--subscribers", type=int, default=200)
+    parser.add_argument("--writes", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=4, help="workers síncronos do gunicorn")
+    parser.add_argument("--poll-timeout", type=float, default=5)
+    args = parser.parse_args()
+
+    for mode in ("wsgi", "asgi"):
+        run_mode(mode, args)
+
+
+if __name__ == "__main__":
+    main()
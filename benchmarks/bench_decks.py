@@ -0,0 +1,94 @@
+"""
+Benchmark do formato compilado dos decks (.wmdeck)
+
+Uso:
+    python -m benchmarks.bench_decks [--words N] [--lookups L]
+
+Gera um deck sintético de N palavras em CSV e JSON e compara o custo de
+carregar o deck interpretando a fonte com o de abrir o .wmdeck via mmap,
+além da latência de busca por palavra e do tamanho dos arquivos.
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import tempfile
+import time
+
+from app.decks import CompiledDeck, compile_deck, load_source
+
+PARTS_OF_SPEECH = ("noun", "verb", "adjective", "adverb")
+
+
+def synthetic_entries(words, rng):
+    return [
+        {
+            "word": f"wort{i}_{rng.randrange(10 ** 6)}",
+            "translation": f"tradução {rng.randrange(words // 4 or 1)}",
+            "part_of_speech": rng.choice(PARTS_OF_SPEECH)
+        }
+        for i in range(words)
+    ]
+
+
+def timed(function, repeat=5):
+    """Menor tempo de repeat execuções (segundos) e o último resultado"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--words", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    entries = synthetic_entries(args.words, rng)
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, "bench.csv")
+        json_path = os.path.join(directory, "bench.json")
+        with open(csv_path, "w", newline="", encoding="utf-8") as output:
+            writer = csv.DictWriter(output, fieldnames=["word", "translation", "part_of_speech"])
+            writer.writeheader()
+            writer.writerows(entries)
+        with open(json_path, "w", encoding="utf-8") as output:
+            json.dump({"words": entries}, output, ensure_ascii=False)
+
+        compile_time, result = timed(lambda: compile_deck(csv_path), repeat=1)
+        csv_time, _ = timed(lambda: load_source(csv_path))
+        json_time, _ = timed(lambda: load_source(json_path))
+
+        def open_and_close():
+            CompiledDeck(result["path"]).close()
+
+        open_time, _ = timed(open_and_close, repeat=50)
+
+        with CompiledDeck(result["path"]) as deck:
+            queries = [rng.choice(entries)["word"] for _ in range(args.lookups)]
+            start = time.perf_counter()
+            for word in queries:
+                deck.get(word)
+            lookup_time = (time.perf_counter() - start) / args.lookups
+            words_time, _ = timed(deck.words)
+
+        print(f"[decks] {args.words:,} palavras")
+        print(f"  tamanho  csv {os.path.getsize(csv_path):>12,} B   json {os.path.getsize(json_path):,} B"
+              f"   wmdeck {result['bytes']:,} B")
+        print(f"  compilar (uma vez)          {compile_time * 1000:>10.1f} ms")
+        print(f"  carregar csv / json         {csv_time * 1000:>10.1f} / {json_time * 1000:.1f} ms")
+        print(f"  abrir wmdeck (mmap)         {open_time * 1000:>10.3f} ms")
+        print(f"  get(palavra)                {lookup_time * 1e6:>10.2f} µs")
+        print(f"  words() (todas)             {words_time * 1000:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+"""
+Teste de carga dos endpoints com misturas de tráfego realistas
+
+Uso:
+    python -m benchmarks.bench_endpoints [--mix NOME] [--students N]
+        [--requests R] [--target client|wsgi|asgi]
+        [--save-baseline ARQ] [--compare ARQ] [--tolerance 0.2]
+
+Gera uma turma sintética de N alunos (via /game/save-progress/batch) e
+reproduz R requisições sorteadas da mistura escolhida contra:
+- client: o test client do Flask, no mesmo processo
+- wsgi / asgi: um servidor local (gunicorn / uvicorn) sobre HTTP
+
+Mede vazão, latência p50/p95/p99 por operação e memória (pico de RSS
+do processo no modo client; RSS do servidor nos outros). Os resultados
+podem ser gravados como baseline em JSON e comparados numa execução
+posterior: latências ou vazão piores que a tolerância contam como
+regressão e o processo termina com código 1.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+
+from benchmarks.bench_asgi import ROOT, free_port, server_command
+
+ACTIVITY_ID = "bench_load"
+
+# Pesos de cada operação por mistura
+MIXES = {
+    # Inven!RA e dashboards consultando a turma
+    "analytics": {"analytics_poll": 6, "analytics_since": 2, "progress_page": 2, "save": 1},
+    # Alunos a jogar: gravações e atualizações em rajadas
+    "game": {"save": 3, "update_burst": 5, "batch_save": 1, "analytics_poll": 1},
+    # Fim de atividade: resets e regravações
+    "reset": {"reset": 3, "save": 3, "update_burst": 2, "analytics_poll": 2},
+    "mixed": {
+        "analytics_poll": 4, "analytics_since": 1, "progress_page": 1, "class_stats": 1,
+        "save": 3, "update_burst": 3, "batch_save": 1, "reset": 1
+    }
+}
+
+UPDATE_BURST_SIZE = 10
+BATCH_SIZE = 100
+
+
+def synthetic_records(students, rng):
+    return [
+        {
+            "activity_id": ACTIVITY_ID,
+            "student_id": f"Student_{i}",
+            "time_played": rng.randint(30, 3600),
+            "words_learned": rng.randint(0, 120),
+            "feedback": rng.choice(["Progredindo bem", "Precisa praticar", ""])
+        }
+        for i in range(students)
+    ]
+
+
+class ClientTarget:
+    """Requisições no test client do Flask (mesmo processo)"""
+
+    name = "client"
+
+    def __init__(self):
+        from app import create_app
+        self.client = create_app().test_client()
+
+    def request(self, method, path, body=None):
+        response = self.client.open(path, method=method, json=body)
+        return response.status_code, response.get_data()
+
+    def memory_bytes(self):
+        # ru_maxrss em KiB no Linux (bytes no macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+    def close(self):
+        pass
+
+
+class ServerTarget:
+    """Requisições HTTP (keep-alive) a um servidor local gunicorn/uvicorn"""
+
+    def __init__(self, mode, workers=4):
+        self.name = mode
+        self.port = free_port()
+        self.process = subprocess.Popen(
+            server_command(mode, self.port, workers), cwd=ROOT,
+            env=dict(os.environ), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        self.connection = None
+        deadline = time.perf_counter() + 15
+        while True:
+            try:
+                self.request("GET", "/")
+                break
+            except OSError:
+                if time.perf_counter() > deadline:
+                    self.close()
+                    raise RuntimeError("Servidor não respondeu") from None
+                self.connection = None
+                time.sleep(0.1)
+
+    def request(self, method, path, body=None):
+        if self.connection is None:
+            self.connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=30)
+        payload = json.dumps(body) if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload is not None else {}
+        try:
+            self.connection.request(method, path, body=payload, headers=headers)
+            response = self.connection.getresponse()
+            content = response.read()
+        except (http.client.HTTPException, OSError):
+            self.connection.close()
+            self.connection = None
+            raise
+        return response.status, content
+
+    def memory_bytes(self):
+        """RSS do servidor (e dos workers), lido de /proc; None fora do Linux"""
+        pids = [self.process.pid]
+        try:
+            with open(f"/proc/{self.process.pid}/task/{self.process.pid}/children") as children:
+                pids += [int(pid) for pid in children.read().split()]
+            total = 0
+            for pid in pids:
+                with open(f"/proc/{pid}/status") as status:
+                    for line in status:
+                        if line.startswith("VmRSS:"):
+                            total += int(line.split()[1]) * 1024
+            return total
+        except OSError:
+            return None
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+        self.process.terminate()
+        self.process.wait()
+
+
+class TrafficMix:
+    """
+    Sorteia e executa as operações de uma mistura
+
+    Cada operação é uma sequência de requisições (uma rajada de
+    update-score conta como uma operação) e tem a latência medida de
+    ponta a ponta.
+    """
+
+    def __init__(self, target, weights, students, rng):
+        self.target = target
+        self.students = students
+        self.rng = rng
+        self.cursor = 0
+        self.operations = list(weights)
+        self.weights = [weights[name] for name in self.operations]
+
+    def _student(self):
+        return f"Student_{self.rng.randrange(self.students)}"
+
+    def analytics_poll(self):
+        return self.target.request("POST", "/analytics-data", {"activityID": ACTIVITY_ID})
+
+    def analytics_since(self):
+        # Consumidor do feed de mudanças: reenvia o cursor da resposta anterior
+        status, content = self.target.request(
+            "POST", "/analytics-data", {"activityID": ACTIVITY_ID, "since": self.cursor}
+        )
+        if status == 200:
+            self.cursor = json.loads(content)["cursor"]
+        return status, content
+
+    def progress_page(self):
+        sort = self.rng.choice(["time", "-time", "words", "-words"])
+        return self.target.request("GET", f"/game/get-progress/{ACTIVITY_ID}?limit=50&sort={sort}")
+
+    def class_stats(self):
+        return self.target.request("GET", f"/game/class-stats/{ACTIVITY_ID}?top=10&bins=10")
+
+    def save(self):
+        return self.target.request("POST", "/game/save-progress", {
+            "activity_id": ACTIVITY_ID, "student_id": self._student(),
+            "time_played": self.rng.randint(30, 3600), "words_learned": self.rng.randint(0, 120),
+            "feedback": "Progredindo bem"
+        })
+
+    def update_burst(self):
+        student_id = self._student()
+        for _ in range(UPDATE_BURST_SIZE):
+            response = self.target.request("POST", "/game/update-score", {
+                "activity_id": ACTIVITY_ID, "student_id": student_id,
+                "additional_words": 1, "additional_time": 5
+            })
+        return response
+
+    def batch_save(self):
+        records = synthetic_records(BATCH_SIZE, self.rng)
+        for record in records:
+            record["student_id"] = self._student()
+        return self.target.request("POST", "/game/save-progress/batch", {"records": records})
+
+    def reset(self):
+        student_id = self._student()
+        response = self.target.request("POST", "/game/reset-progress", {
+            "activity_id": ACTIVITY_ID, "student_id": student_id
+        })
+        # Regrava o aluno para manter o tamanho da turma
+        self.target.request("POST", "/game/save-progress", {
+            "activity_id": ACTIVITY_ID, "student_id": student_id,
+            "time_played": 0, "words_learned": 0, "feedback": ""
+        })
+        return response
+
+    def run(self, requests):
+        """
+        Returns:
+            tuple: ({operação: [latências em segundos]}, erros, duração total)
+        """
+        latencies = {name: [] for name in self.operations}
+        errors = 0
+        start = time.perf_counter()
+        for name in self.rng.choices(self.operations, weights=self.weights, k=requests):
+            operation_start = time.perf_counter()
+            try:
+                status, _ = getattr(self, name)()
+            except (http.client.HTTPException, OSError):
+                status = None
+            latencies[name].append(time.perf_counter() - operation_start)
+            if status is None or status >= 500:
+                errors += 1
+        return latencies, errors, time.perf_counter() - start
+
+
+def percentiles(values):
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def pick(p):
+        return round(ordered[min(int(p / 100 * len(ordered)), len(ordered) - 1)] * 1000, 3)
+
+    return {"count": len(ordered), "p50_ms": pick(50), "p95_ms": pick(95), "p99_ms": pick(99)}
+
+
+def run_benchmark(mix, students, requests, target, seed=42):
+    """
+    Executa uma mistura e retorna o resultado no formato de baseline
+
+    Returns:
+        dict: mix, target, students, requests, throughput_ops, errors,
+              memory_bytes e percentis por operação ("operations")
+    """
+    rng = random.Random(seed)
+    records = synthetic_records(students, rng)
+    for start in range(0, students, 1000):
+        target.request("POST", "/game/save-progress/batch", {"records": records[start:start + 1000]})
+
+    latencies, errors, elapsed = TrafficMix(target, MIXES[mix], students, rng).run(requests)
+    operations = {name: percentiles(values) for name, values in latencies.items() if values}
+    return {
+        "mix": mix,
+        "target": target.name,
+        "students": students,
+        "requests": requests,
+        "throughput_ops": round(requests / elapsed, 1),
+        "errors": errors,
+        "memory_bytes": target.memory_bytes(),
+        "total": percentiles([value for values in latencies.values() for value in values]),
+        "operations": operations
+    }
+
+
+def compare(result, baseline, tolerance):
+    """
+    Compara um resultado com a baseline
+
+    Returns:
+        list: Descrição de cada métrica pior que a baseline além da tolerância
+    """
+    regressions = []
+    if result["throughput_ops"] < baseline["throughput_ops"] * (1 - tolerance):
+        regressions.append(
+            f"vazão {result['throughput_ops']} ops/s < baseline {baseline['throughput_ops']} ops/s"
+        )
+    for name, stats in [("total", result["total"]), *result["operations"].items()]:
+        reference = baseline["total"] if name == "total" else baseline["operations"].get(name)
+        if not reference:
+            continue
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            if stats[key] > reference[key] * (1 + tolerance):
+                regressions.append(f"{name} {key}: {stats[key]} ms > baseline {reference[key]} ms")
+    return regressions
+
+
+def print_result(result):
+    print(f"[{result['mix']} @ {result['target']}] {result['students']} alunos, {result['requests']} operações")
+    print(f"  vazão        {result['throughput_ops']:>10,.1f} ops/s   erros: {result['errors']}")
+    if result["memory_bytes"] is not None:
+        print(f"  memória      {result['memory_bytes'] / 1024 / 1024:>10,.1f} MiB")
+    print(f"  {'operação':<16} {'n':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, stats in [*result["operations"].items(), ("total", result["total"])]:
+        print(f"  {name:<16} {stats['count']:>6} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mix", choices=sorted(MIXES), default="mixed")
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--target", choices=("client", "wsgi", "asgi"), default="client")
+    parser.add_argument("--workers", type=int, default=1, help="workers do gunicorn (--target wsgi)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save-baseline", metavar="ARQ")
+    parser.add_argument("--compare", metavar="ARQ")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    if args.target == "client":
+        target = ClientTarget()
+    else:
+        target = ServerTarget(args.target, workers=args.workers)
+    try:
+        result = run_benchmark(args.mix, args.students, args.requests, target, seed=args.seed)
+    finally:
+        target.close()
+    print_result(result)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as baseline_file:
+            json.dump(result, baseline_file, indent=2)
+        print(f"Baseline gravada em {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline_file:
+            regressions = compare(result, json.load(baseline_file), args.tolerance)
+        for regression in regressions:
+            print(f"  REGRESSÃO: {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"Sem regressões face a {args.compare} (tolerância {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Microbenchmark da serialização de analytics de uma turma
+
+Uso:
+    python -m benchmarks.bench_metrics [--students N] [--repeat R]
+
+Compara o caminho Factory Method (3 métricas + to_json por aluno +
+json.dumps) com o serializador em lote, em tempo e em memória alocada.
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+from app.repositories import StudentProgressRepository
+from app.services.analytics_service import AnalyticsService
+
+
+def build_service(students):
+    records = [
+        {"student_id": f"Student_{i}", "time": i * 3, "words": i % 80, "note": "Progredindo bem"}
+        for i in range(students)
+    ]
+    return AnalyticsService(StudentProgressRepository({"bench": records}))
+
+
+def factory_path(service):
+    data = service.get_analytics_for_activity("bench")
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+def bulk_path(service):
+    return service.serialize_analytics_for_activity("bench")
+
+
+def measure(label, func, service, repeat):
+    func(service)  # aquecimento
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(service)
+    elapsed = (time.perf_counter() - start) / repeat
+
+    tracemalloc.start()
+    func(service)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"  {label:<22} {elapsed * 1000:>8.2f} ms/chamada   pico {peak / 1024:>9.0f} KiB")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    service = build_service(args.students)
+    assert factory_path(service) == bulk_path(service)
+
+    print(f"[{args.students} alunos]")
+    factory = measure("factory + to_json", factory_path, service, args.repeat)
+    bulk = measure("serializador em lote", bulk_path, service, args.repeat)
+    print(f"  ganho: {factory / bulk:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark das rodadas de escolha múltipla (índice de distratores)
+
+Uso:
+    python -m benchmarks.bench_rounds [--words N] [--rounds R] [--choices C]
+
+Compila um deck sintético de N palavras (o índice de distratores é
+calculado nesta etapa) e mede quantas rodadas por segundo são montadas
+com o índice precalculado e com a alternativa ingênua, que percorre o
+deck a cada pergunta para escolher as palavras mais parecidas.
+"""
+import argparse
+import heapq
+import os
+import random
+import tempfile
+import time
+
+from app.decks import CompiledDeck, build_deck, build_round
+from app.decks.distractors import OTHER_CLASS_PENALTY, shared_affix
+from benchmarks.bench_decks import synthetic_entries
+
+
+def naive_round(entries, word_index, choices, rng):
+    """Mesmo critério do índice, mas calculado varrendo o deck inteiro"""
+    target = entries[word_index]
+    word = target["word"].casefold()
+
+    def score(other):
+        candidate = other["word"].casefold()
+        value = 2 * abs(len(candidate) - len(word)) - shared_affix(word, candidate)
+        return value + (OTHER_CLASS_PENALTY if other["part_of_speech"] != target["part_of_speech"] else 0)
+
+    nearest = heapq.nsmallest(
+        2 * (choices - 1),
+        (other for index, other in enumerate(entries)
+         if index != word_index and other["translation"] != target["translation"]),
+        key=score
+    )
+    options = [target["translation"]] + [other["translation"] for other in rng.sample(nearest, choices - 1)]
+    rng.shuffle(options)
+    return options
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--words", type=int, default=100000)
+    parser.add_argument("--rounds", type=int, default=100000)
+    parser.add_argument("--naive-rounds", type=int, default=20)
+    parser.add_argument("--choices", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    entries = synthetic_entries(args.words, rng)
+
+    start = time.perf_counter()
+    content, entries = build_deck(entries, "bench")
+    compile_time = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.wmdeck")
+        with open(path, "wb") as output:
+            output.write(content)
+
+        with CompiledDeck(path) as deck:
+            words = [rng.choice(entries)["word"] for _ in range(args.rounds)]
+            start = time.perf_counter()
+            for word in words:
+                build_round(deck, word, args.choices, rng)
+            indexed_rate = args.rounds / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for _ in range(args.naive_rounds):
+            naive_round(entries, rng.randrange(len(entries)), args.choices, rng)
+        naive_rate = args.naive_rounds / (time.perf_counter() - start)
+
+    print(f"[rodadas] {len(entries):,} palavras, {args.choices} opções")
+    print(f"  compilar deck + índice      {compile_time:>10.2f} s")
+    print(f"  rodadas com o índice        {indexed_rate:>10,.0f} /s")
+    print(f"  rodadas varrendo o deck     {naive_rate:>10,.1f} /s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark do agendador de revisões espaçadas (SM-2)
+
+Uso:
+    python -m benchmarks.bench_scheduler [--students N] [--words W] [--queries Q]
+
+Cria um deck de W palavras, revê todas as palavras de N alunos (N * W
+cartas) com notas e instantes sorteados e mede a vazão das revisões, a
+latência de due_cards (as próximas 20 cartas de um aluno) e a memória.
+"""
+import argparse
+import random
+import resource
+import sys
+import time
+
+from app.services.review_scheduler import SECONDS_PER_DAY, ReviewScheduler
+
+
+def peak_rss_mib():
+    # ru_maxrss em KiB no Linux (bytes no macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--words", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    scheduler = ReviewScheduler()
+    words = [f"palavra_{i}" for i in range(args.words)]
+    scheduler.add_words("bench", words)
+    rss_before = peak_rss_mib()
+
+    start = time.perf_counter()
+    for student in range(args.students):
+        student_id = f"Student_{student}"
+        for word in words:
+            scheduler.review("bench", student_id, word, rng.randint(0, 5), now=rng.uniform(0, 30 * SECONDS_PER_DAY))
+    elapsed = time.perf_counter() - start
+    cards = args.students * args.words
+
+    latencies = []
+    now = 15 * SECONDS_PER_DAY
+    for _ in range(args.queries):
+        student_id = f"Student_{rng.randrange(args.students)}"
+        query_start = time.perf_counter()
+        scheduler.due_cards("bench", student_id, limit=20, now=now)
+        latencies.append(time.perf_counter() - query_start)
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(int(p / 100 * len(latencies)), len(latencies) - 1)] * 1e6
+
+    print(f"[scheduler] {args.students} alunos x {args.words} palavras = {cards:,} cartas")
+    print(f"  revisões                 {cards / elapsed:>12,.0f} /s")
+    print(f"  due_cards(20) p50 / p99  {percentile(50):>9.1f} / {percentile(99):.1f} µs")
+    print(f"  memória (pico de RSS)    {peak_rss_mib() - rss_before:>12,.1f} MiB acima do deck")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark de salvamentos por segundo para cada motor de armazenamento
+
+Uso:
+    python -m benchmarks.bench_storage [--students N] [--batch-size B]
+
+Mede quatro cenários por motor:
+- save individual (um commit por aluno)
+- save em lote (B alunos por transação)
+- update incremental sobre alunos existentes
+- estatísticas da turma (média, percentis, top-N, histograma)
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from app.repositories import (
+    StudentProgressRepository,
+    SQLiteStudentRepository,
+    ColumnarStudentRepository
+)
+from app.services.analytics_service import AnalyticsService
+
+
+def _measure(label, operations, func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<28} {operations / elapsed:>12,.0f} ops/s  ({elapsed * 1000:.1f} ms)")
+
+
+def run_engine(name, repository, students, batch_size):
+    print(f"[{name}]")
+
+    def save_single():
+        for i in range(students):
+            repository.save_student("bench_single", f"S{i}", i, i % 50, "nota")
+
+    def save_batched():
+        for start in range(0, students, batch_size):
+            with repository.transaction():
+                for i in range(start, min(start + batch_size, students)):
+                    repository.save_student("bench_batch", f"S{i}", i, i % 50, "nota")
+
+    def update_incremental():
+        for i in range(students):
+            repository.increment_student("bench_single", f"S{i}", 1, 1)
+
+    _measure("save (individual)", students, save_single)
+    _measure(f"save (lote de {batch_size})", students, save_batched)
+    _measure("update incremental", students, update_incremental)
+
+    service = AnalyticsService(repository)
+    _measure("estatísticas da turma", 1, lambda: service.get_class_statistics("bench_single"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    run_engine("memory", StudentProgressRepository(), args.students, args.batch_size)
+    run_engine("columnar (NumPy)", ColumnarStudentRepository(), args.students, args.batch_size)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        repository = SQLiteStudentRepository(os.path.join(tmpdir, "bench.db"))
+        run_engine("sqlite (WAL)", repository, args.students, args.batch_size)
+        repository.close()
+
+
+if __name__ == "__main__":
+    main()
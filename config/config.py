@@ -9,6 +9,64 @@ class Config:
     DEBUG = False
     TESTING = False
 
+    # Armazenamento do progresso dos estudantes: "memory", "columnar" ou "sqlite"
+    STORAGE_ENGINE = os.environ.get('STORAGE_ENGINE', 'memory')
+    SQLITE_PATH = os.environ.get('SQLITE_PATH', 'wordmemorizer.db')
+
+    # Orçamento de memória do cache de respostas do /analytics-data
+    ANALYTICS_CACHE_MAX_BYTES = int(os.environ.get('ANALYTICS_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+
+    # Tamanho padrão e máximo das páginas de /game/get-progress
+    PAGE_DEFAULT_LIMIT = int(os.environ.get('PAGE_DEFAULT_LIMIT', 100))
+    PAGE_MAX_LIMIT = int(os.environ.get('PAGE_MAX_LIMIT', 1000))
+
+    # Push de progresso (/game/events SSE e /game/poll long-poll)
+    EVENT_BUFFER_SIZE = int(os.environ.get('EVENT_BUFFER_SIZE', 256))
+    SSE_HEARTBEAT_SECONDS = int(os.environ.get('SSE_HEARTBEAT_SECONDS', 15))
+    LONG_POLL_TIMEOUT_SECONDS = int(os.environ.get('LONG_POLL_TIMEOUT_SECONDS', 25))
+
+    # Instrumentação (latências por rota/comando/armazenamento) e endpoint /metrics
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+
+    # Log estruturado (JSON no stderr, formatado fora da thread da requisição)
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    # Fração mantida dos eventos de alto volume ("evento:taxa,...")
+    LOG_SAMPLE_RATES = os.environ.get('LOG_SAMPLE_RATES', 'analytics_request:0.1,command_executed:0.1')
+    LOG_RATE_LIMIT_PER_SECOND = int(os.environ.get('LOG_RATE_LIMIT_PER_SECOND', 100))
+    LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))
+
+    # Threads para as rotas Flask no modo ASGI (uvicorn asgi:app)
+    ASGI_THREADS = int(os.environ.get('ASGI_THREADS', 32))
+
+    # Decks: fontes CSV/JSON e versões compiladas (.wmdeck) lidas via mmap
+    DECK_DIR = os.environ.get('DECK_DIR', 'decks')
+    DEFAULT_DECK_ID = os.environ.get('DEFAULT_DECK_ID', 'deck_123_exemplo')
+    # Orçamento do cache de decks do processo (partilhado entre atividades)
+    DECK_CACHE_MAX_BYTES = int(os.environ.get('DECK_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+
+    # Palavras aprendidas para considerar a atividade concluída (taxa_conclusao)
+    COMPLETION_TARGET_WORDS = int(os.environ.get('COMPLETION_TARGET_WORDS', 50))
+
+    # Número máximo de registros aceitos por /game/save-progress/batch
+    BATCH_MAX_RECORDS = int(os.environ.get('BATCH_MAX_RECORDS', 1000))
+
+    # Execução assíncrona dos comandos de escrita (também ativável com ?async=true)
+    ASYNC_WRITES = os.environ.get('ASYNC_WRITES', 'false').lower() == 'true'
+    COMMAND_QUEUE_WORKERS = int(os.environ.get('COMMAND_QUEUE_WORKERS', 4))
+    COMMAND_QUEUE_MAX_PENDING = int(os.environ.get('COMMAND_QUEUE_MAX_PENDING', 10000))
+    COMMAND_QUEUE_MAX_TICKETS = int(os.environ.get('COMMAND_QUEUE_MAX_TICKETS', 10000))
+
+    # Agregação dos /game/update-score do mesmo aluno antes de gravar
+    COALESCE_SCORE_UPDATES = os.environ.get('COALESCE_SCORE_UPDATES', 'false').lower() == 'true'
+    COALESCE_WINDOW_MS = int(os.environ.get('COALESCE_WINDOW_MS', 500))
+    COALESCE_MAX_UPDATES = int(os.environ.get('COALESCE_MAX_UPDATES', 20))
+
+    # Journal de comandos (desativado se JOURNAL_DIR não for definido)
+    JOURNAL_DIR = os.environ.get('JOURNAL_DIR')
+    JOURNAL_FSYNC_INTERVAL_MS = int(os.environ.get('JOURNAL_FSYNC_INTERVAL_MS', 100))
+    JOURNAL_FSYNC_BATCH = int(os.environ.get('JOURNAL_FSYNC_BATCH', 256))
+    JOURNAL_SNAPSHOT_EVERY = int(os.environ.get('JOURNAL_SNAPSHOT_EVERY', 10000))
+
 class DevelopmentConfig(Config):
     """Configuração para desenvolvimento"""
     DEBUG = True
@@ -0,0 +1,162 @@
+"""
+Testes para a correção das respostas digitadas (busca aproximada)
+"""
+import os
+import random
+import tempfile
+import unittest
+from app import create_app
+from app.decks import AnswerIndex, CompiledDeck, build_deck, check_answer, grade_answer, normalize_answer
+from app.decks.answer_matching import answer_spellings, bounded_distance, max_edits_for
+
+
+def levenshtein(first, second):
+    previous = list(range(len(second) + 1))
+    for row, char in enumerate(first, 1):
+        current = [row]
+        for column, other in enumerate(second, 1):
+            current.append(min(previous[column] + 1, current[-1] + 1, previous[column - 1] + (char != other)))
+        previous = current
+    return previous[-1]
+
+
+class TestNormalization(unittest.TestCase):
+    def test_accents_case_and_spaces(self):
+        self.assertEqual(normalize_answer("  Grün "), "grun")
+        self.assertEqual(normalize_answer("CÃO"), "cao")
+        self.assertEqual(normalize_answer("weiß"), "weiss")
+        self.assertEqual(normalize_answer("ﬁm  do\tdia"), "fim do dia")
+
+    def test_umlaut_spellings(self):
+        self.assertEqual(answer_spellings("grün"), ["grun", "gruen"])
+        self.assertEqual(answer_spellings("azul"), ["azul"])
+
+    def test_max_edits_grow_with_length(self):
+        self.assertEqual([max_edits_for("x" * size) for size in (3, 4, 6, 7, 20)], [0, 1, 1, 2, 2])
+        self.assertEqual(max_edits_for("x" * 20, limit=1), 1)
+
+    def test_bounded_distance(self):
+        rng = random.Random(3)
+        for _ in range(2000):
+            first = "".join(rng.choice("abc") for _ in range(rng.randint(0, 6)))
+            second = "".join(rng.choice("abc") for _ in range(rng.randint(0, 6)))
+            limit = rng.randint(0, 3)
+            distance = levenshtein(first, second)
+            self.assertEqual(bounded_distance(first, second, limit), distance if distance <= limit else None)
+
+
+class TestGradeAnswer(unittest.TestCase):
+    def test_grades(self):
+        self.assertEqual(grade_answer("grün", "GRUEN")["exact"], True)
+        self.assertEqual(grade_answer("amarelo", "amrelo"), {
+            "correct": True, "exact": False, "distance": 1, "expected": "amarelo"
+        })
+        self.assertFalse(grade_answer("rot", "rit")["correct"])
+        self.assertFalse(grade_answer("azul", "")["correct"])
+        self.assertFalse(grade_answer("castanho", "cinzento")["correct"])
+
+
+class TestAnswerIndex(unittest.TestCase):
+    def test_matches_naive_scan(self):
+        rng = random.Random(7)
+        letters = "abcdeäöüß çé"
+        answers = ["".join(rng.choice(letters) for _ in range(rng.randint(1, 9))) for _ in range(800)]
+        index = AnswerIndex(answers)
+        for max_edits in (0, 1, 2, 3):
+            for _ in range(25):
+                query = "".join(rng.choice(letters) for _ in range(rng.randint(0, 10)))
+                typed = normalize_answer(query)
+                expected = {}
+                for position, answer in enumerate(answers):
+                    distances = [
+                        distance for spelling in answer_spellings(answer)
+                        for distance in [bounded_distance(spelling, typed, max_edits)] if distance is not None
+                    ]
+                    if distances:
+                        expected[position] = min(distances)
+                self.assertEqual(
+                    index.search(query, max_edits),
+                    sorted(expected.items(), key=lambda item: (item[1], item[0])),
+                    (query, max_edits)
+                )
+
+    def test_default_edits_and_order(self):
+        index = AnswerIndex(["verde", "vermelho", "verdes", "azul"])
+        # 5 caracteres: só 1 edição por omissão
+        self.assertEqual(index.search("vrede"), [])
+        self.assertEqual(index.search("vrede", 2), [(0, 2)])
+        self.assertEqual(index.search("vermelhos"), [(1, 1)])
+        self.assertEqual(index.search("verde", 1), [(0, 0), (2, 1)])
+        self.assertEqual(index.search("VERMELHO"), [(1, 0)])
+        self.assertEqual(AnswerIndex([]).search("nada"), [])
+
+
+class TestCheckAnswer(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        entries = [
+            {"word": "rot", "translation": "vermelho", "part_of_speech": "adjective"},
+            {"word": "grün", "translation": "verde", "part_of_speech": "adjective"},
+            {"word": "blau", "translation": "azul", "part_of_speech": "adjective"},
+            {"word": "Größe", "translation": "", "part_of_speech": "noun"}
+        ]
+        content, _ = build_deck(entries, "cores")
+        path = os.path.join(tmp.name, "cores.wmdeck")
+        with open(path, "wb") as output:
+            output.write(content)
+        self.deck = CompiledDeck(path)
+        self.addCleanup(self.deck.close)
+        self.answers = AnswerIndex.from_deck(self.deck)
+
+    def test_typo_accepted(self):
+        result = check_answer(self.deck, self.answers, "rot", "vermelo")
+        self.assertTrue(result["correct"])
+        self.assertNotIn("confused_with", result)
+
+    def test_answer_of_another_card(self):
+        result = check_answer(self.deck, self.answers, "rot", "Verde")
+        self.assertFalse(result["correct"])
+        self.assertEqual(result["confused_with"], ["grün"])
+
+    def test_word_without_translation(self):
+        self.assertTrue(check_answer(self.deck, self.answers, "Größe", "groesse")["exact"])
+        self.assertIsNone(check_answer(self.deck, self.answers, "gelb", "amarelo"))
+
+
+class TestAnswerRoutes(unittest.TestCase):
+    def setUp(self):
+        self.client = create_app().test_client()
+        self.client.post('/game/save-progress', json={
+            "activity_id": "turma_answer", "student_id": "S1", "time_played": 0, "words_learned": 0
+        })
+
+    def answer(self, **body):
+        payload = {"activity_id": "turma_answer", "student_id": "S1", "deck_id": "deck_123_exemplo"}
+        payload.update(body)
+        return self.client.post('/game/answer', json=payload)
+
+    def test_correct_answer_updates_score(self):
+        response = self.answer(word="grün", answer="Verdee", time_spent=7)
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertTrue(data["grade"]["correct"])
+        self.assertEqual(data["score"]["new_totals"], {"time": 7, "words": 1})
+
+        data = self.answer(word="rot", answer="azul", time_spent=3).get_json()
+        self.assertFalse(data["grade"]["correct"])
+        self.assertEqual(data["grade"]["confused_with"], ["blau"])
+        self.assertEqual(data["score"]["new_totals"], {"time": 10, "words": 1})
+
+        self.assertIsNone(self.answer(word="rot", answer="x").get_json()["score"])
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.answer(word="rot", answer=3).status_code, 400)
+        self.assertEqual(self.answer(word="rot", answer="x", time_spent=-1).status_code, 400)
+        self.assertEqual(self.answer(answer="x").status_code, 400)
+        self.assertEqual(self.answer(word="Elefant", answer="x").status_code, 404)
+        self.assertEqual(self.answer(word="rot", answer="x", deck_id="nao_existe").status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+"""
+Testes para o modo ASGI (app/asgi.py)
+"""
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import unittest
+from app import create_app
+from app.asgi import AsgiApplication
+from app.repositories import SQLiteStudentRepository, StudentProgressRepository
+from app.services.progress_events import ProgressEventBus
+
+
+def http_scope(method, path, query=b"", headers=()):
+    return {
+        "type": "http", "method": method, "path": path, "query_string": query,
+        "headers": list(headers), "http_version": "1.1", "scheme": "http",
+        "server": ("testserver", 80), "client": ("127.0.0.1", 1234), "root_path": ""
+    }
+
+
+class AsgiClient:
+    """Executa uma requisição completa e coleta as mensagens enviadas"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def request(self, method, path, query=b"", body=b"", headers=()):
+        messages = []
+        received = asyncio.Queue()
+        await received.put({"type": "http.request", "body": body, "more_body": False})
+
+        async def send(message):
+            messages.append(message)
+
+        await self.app(http_scope(method, path, query, headers), received.get, send)
+        start = messages[0]
+        content = b"".join(message.get("body", b"") for message in messages[1:])
+        return start["status"], dict(start["headers"]), content
+
+
+class TestAsgiApplication(unittest.TestCase):
+    def setUp(self):
+        self.repository = StudentProgressRepository()
+        self.bus = ProgressEventBus(self.repository, buffer_size=16)
+        self.addCleanup(self.bus.close)
+        self.app = AsgiApplication(create_app(), self.bus, max_threads=4)
+        self.client = AsgiClient(self.app)
+        self.addCleanup(lambda: self.app.executor and self.app.executor.shutdown())
+
+    def test_flask_routes_through_thread_pool(self):
+        status, _, body = asyncio.run(self.client.request("GET", "/"))
+        self.assertEqual(status, 200)
+        self.assertIn(b"Running", body)
+
+        payload = json.dumps({"activityID": "asgi_missing"}).encode()
+        status, headers, body = asyncio.run(self.client.request(
+            "POST", "/analytics-data", body=payload,
+            headers=[(b"content-type", b"application/json")]
+        ))
+        self.assertEqual(status, 200)
+        self.assertEqual(headers[b"content-type"], b"application/json")
+        self.assertEqual(json.loads(body), [])
+
+    def test_native_long_poll(self):
+        cursor = self.repository.get_version("turma")
+
+        async def scenario():
+            loop = asyncio.get_running_loop()
+            loop.call_later(0.05, self.repository.save_student, "turma", "S1", 10, 1, "")
+            return await self.client.request("GET", "/game/poll/turma", f"after={cursor}&timeout=5".encode())
+
+        status, _, body = asyncio.run(scenario())
+        result = json.loads(body)
+        self.assertEqual(status, 200)
+        self.assertEqual(result["events"][0]["student"]["inveniraStdID"], "S1")
+        self.assertEqual(self.bus.subscriber_count("turma"), 0)
+
+        status, _, _ = asyncio.run(self.client.request("GET", "/game/poll/turma", b"after=-1"))
+        self.assertEqual(status, 400)
+
+    def test_native_event_stream_until_disconnect(self):
+        async def scenario():
+            received = asyncio.Queue()
+            chunks = []
+            got_event = asyncio.Event()
+
+            async def send(message):
+                chunks.append(message)
+                if b"data:" in message.get("body", b""):
+                    got_event.set()
+
+            task = asyncio.ensure_future(self.app(http_scope("GET", "/game/events/turma"), received.get, send))
+            await asyncio.sleep(0.01)
+            self.assertEqual(self.bus.subscriber_count("turma"), 1)
+            self.repository.save_student("turma", "S1", 10, 1, "")
+            await asyncio.wait_for(got_event.wait(), 5)
+
+            await received.put({"type": "http.disconnect"})
+            await asyncio.wait_for(task, 5)
+            return chunks
+
+        chunks = asyncio.run(scenario())
+        self.assertEqual(chunks[0]["status"], 200)
+        self.assertIn((b"content-type", b"text/event-stream; charset=utf-8"), chunks[0]["headers"])
+        self.assertTrue(any(b"id: 1\ndata: " in chunk.get("body", b"") for chunk in chunks[1:]))
+        self.assertEqual(self.bus.subscriber_count("turma"), 0)
+
+
+    def test_streaming_body_stays_on_one_thread(self):
+        """Um corpo em streaming sobre o SQLite é lido inteiro na mesma thread"""
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        repository = SQLiteStudentRepository(os.path.join(tmpdir.name, "stream.db"))
+        with repository.transaction():
+            for index in range(1200):
+                repository.save_student("turma", f"S{index}", index, 1, "")
+        threads = set()
+
+        def wsgi_app(environ, start_response):
+            start_response("200 OK", [("Content-Type", "application/json")])
+
+            def body():
+                yield b"["
+                for index, record in enumerate(repository.iter_students("turma", batch_size=100)):
+                    threads.add(threading.get_ident())
+                    yield (b"," if index else b"") + json.dumps(record).encode()
+                yield b"]"
+            return body()
+
+        client = AsgiClient(AsgiApplication(wsgi_app, self.bus, max_threads=4))
+        self.addCleanup(lambda: client.app.executor.shutdown())
+        status, _, body = asyncio.run(client.request("GET", "/analytics-data", b"stream=true"))
+        self.assertEqual(status, 200)
+        self.assertEqual(len(json.loads(body)), 1200)
+        self.assertEqual(len(threads), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
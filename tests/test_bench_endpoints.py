@@ -0,0 +1,38 @@
+"""
+Teste de fumaça do harness de carga (benchmarks/bench_endpoints.py)
+"""
+import unittest
+from benchmarks.bench_endpoints import MIXES, ClientTarget, compare, run_benchmark
+
+
+class TestBenchEndpoints(unittest.TestCase):
+    def test_every_mix_runs_against_test_client(self):
+        target = ClientTarget()
+        for mix in MIXES:
+            result = run_benchmark(mix, students=20, requests=30, target=target)
+            self.assertEqual(result["errors"], 0, mix)
+            self.assertEqual(result["total"]["count"], 30)
+            self.assertGreater(result["throughput_ops"], 0)
+
+    def test_compare_flags_regressions_beyond_tolerance(self):
+        baseline = {
+            "throughput_ops": 100.0,
+            "total": {"p50_ms": 1.0, "p95_ms": 2.0, "p99_ms": 3.0},
+            "operations": {"save": {"p50_ms": 1.0, "p95_ms": 2.0, "p99_ms": 3.0}}
+        }
+        similar = {
+            "throughput_ops": 90.0,
+            "total": {"count": 1, "p50_ms": 1.1, "p95_ms": 2.0, "p99_ms": 3.0},
+            "operations": {"save": {"count": 1, "p50_ms": 1.0, "p95_ms": 2.2, "p99_ms": 3.0}}
+        }
+        self.assertEqual(compare(similar, baseline, tolerance=0.2), [])
+
+        slower = dict(similar, throughput_ops=50.0,
+                      operations={"save": {"count": 1, "p50_ms": 5.0, "p95_ms": 2.0, "p99_ms": 3.0}})
+        regressions = compare(slower, baseline, tolerance=0.2)
+        self.assertEqual(len(regressions), 2)
+        self.assertIn("save p50_ms", regressions[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
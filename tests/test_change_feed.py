@@ -0,0 +1,77 @@
+"""
+Testes para o feed de mudanças ("since") do /analytics-data e /game/get-progress
+"""
+import json
+import unittest
+from app import create_app
+from app.facades.invenira_facade import InveniraFacade
+from app.repositories import StudentProgressRepository
+from app.repositories.change_feed import ChangeLog
+
+
+class TestChangeLog(unittest.TestCase):
+    def test_tombstone_limit_moves_horizon(self):
+        """Descartar tombstones antigos força resincronização de cursores anteriores"""
+        repository = StudentProgressRepository()
+        log = ChangeLog(repository, max_tombstones=2)
+        self.addCleanup(repository.remove_change_listener, log._on_change)
+        for index in range(4):
+            repository.save_student("turma", f"S{index}", 1, 1, "")
+        cursor = repository.get_version("turma")
+        for index in range(3):
+            repository.remove_student("turma", f"S{index}")
+
+        self.assertTrue(log.changes_since("turma", cursor).full)
+        recent = log.changes_since("turma", cursor + 1)
+        self.assertFalse(recent.full)
+        self.assertEqual(recent.deleted, ["S1", "S2"])
+
+
+class TestChangeFeedEndpoints(unittest.TestCase):
+    def setUp(self):
+        self.facade = InveniraFacade()
+        self.repository = self.facade.analytics.repository
+        if "feed_activity" in self.repository:
+            del self.repository["feed_activity"]
+        self.repository.save_student("feed_activity", "S1", 10, 1, "ok")
+        self.repository.save_student("feed_activity", "S2", 10, 1, "ok")
+
+    def test_analytics_data_since(self):
+        status, body, etag = self.facade.get_analytics_response({"activityID": "feed_activity", "since": 0})
+        first = json.loads(body)
+        self.assertEqual(status, 200)
+        self.assertIsNone(etag)
+        self.assertTrue(first["full"])
+        self.assertEqual(len(first["data"]), 2)
+
+        self.repository.increment_student("feed_activity", "S2", 5, 1)
+        self.repository.remove_student("feed_activity", "S1")
+
+        _, body, _ = self.facade.get_analytics_response(
+            {"activityID": "feed_activity", "since": first["cursor"]}
+        )
+        changes = json.loads(body)
+        self.assertFalse(changes["full"])
+        self.assertEqual([s["inveniraStdID"] for s in changes["data"]], ["S2"])
+        self.assertEqual(changes["deleted"], ["S1"])
+
+    def test_invalid_since(self):
+        for since in (-1, "3", True):
+            status, _, _ = self.facade.get_analytics_response({"activityID": "feed_activity", "since": since})
+            self.assertEqual(status, 400)
+
+    def test_get_progress_since(self):
+        client = create_app().test_client()
+        cursor = client.get('/game/get-progress/feed_activity?since=0').get_json()["cursor"]
+        self.repository.save_student("feed_activity", "S3", 1, 1, "")
+
+        result = client.get(f'/game/get-progress/feed_activity?since={cursor}').get_json()
+        self.assertEqual(result["count"], 1)
+        self.assertEqual(result["data"][0]["inveniraStdID"], "S3")
+
+        self.assertEqual(client.get('/game/get-progress/feed_activity?since=x').status_code, 400)
+        self.assertEqual(client.get('/game/get-progress/feed_activity?since=1&limit=5').status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+"""
+Testes para as métricas agregadas da turma (incrementais)
+"""
+import json
+import random
+import unittest
+from app.commands import CommandInvoker, SaveStudentProgressCommand, UpdateStudentScoreCommand
+from app.facades.invenira_facade import InveniraFacade
+from app.repositories import StudentProgressRepository
+from app.services.analytics_service import AnalyticsService
+from app.services.class_aggregates import ClassAggregateTracker, QuantileSketch
+
+
+class TestQuantileSketch(unittest.TestCase):
+    def test_relative_accuracy(self):
+        """Quantis estimados respeitam o erro relativo"""
+        rng = random.Random(42)
+        values = [rng.uniform(1, 1000) for _ in range(5000)]
+        sketch = QuantileSketch(relative_accuracy=0.01)
+        for value in values:
+            sketch.add(value)
+
+        ordered = sorted(values)
+        for q in (0.25, 0.5, 0.9):
+            exact = ordered[int(q * (len(ordered) - 1))]
+            self.assertAlmostEqual(sketch.quantile(q) / exact, 1, delta=0.011)
+
+    def test_remove(self):
+        """Remoções desfazem as inserções"""
+        sketch = QuantileSketch()
+        sketch.add(0)
+        sketch.add(10)
+        sketch.add(100)
+        sketch.remove(100)
+        sketch.remove(0)
+        self.assertEqual(sketch.count, 1)
+        self.assertAlmostEqual(sketch.quantile(0.5), 10, delta=0.1)
+        sketch.remove(10)
+        self.assertIsNone(sketch.quantile(0.5))
+
+
+class TestClassAggregateTracker(unittest.TestCase):
+    def setUp(self):
+        self.repository = StudentProgressRepository()
+        self.repository.seed({
+            "turma": [
+                {"student_id": "S1", "time": 60, "words": 10, "note": ""},
+                {"student_id": "S2", "time": 10, "words": 0, "note": "Desistiu"}
+            ]
+        })
+        self.service = AnalyticsService(self.repository)
+        self.invoker = CommandInvoker()
+        self.tracker = ClassAggregateTracker(self.repository, completion_target=20)
+        self.addCleanup(self.tracker.close)
+
+    def test_initial_summary(self):
+        summary = self.tracker.get_summary("turma")
+        self.assertEqual(summary["alunos"], 2)
+        self.assertEqual(summary["desistencias"], 1)
+        self.assertEqual(summary["taxa_conclusao"], 0)
+        self.assertEqual(summary["palavras_por_minuto"]["mean"], 5.0)
+
+    def test_commands_update_aggregates_without_rescanning(self):
+        """Save e UpdateScore alteram os agregados lendo só os alunos tocados"""
+        self.tracker.get_summary("turma")
+
+        calls = []
+        original = self.repository.list_students
+        self.repository.list_students = lambda activity_id: calls.append(activity_id) or original(activity_id)
+
+        self.invoker.execute_command(UpdateStudentScoreCommand(self.service, "turma", "S2", 30, 50))
+        self.invoker.execute_command(SaveStudentProgressCommand(self.service, "turma", "S3", 120, 40, ""))
+
+        summary = self.tracker.get_summary("turma")
+        self.assertEqual(calls, [])
+        self.assertEqual(summary["alunos"], 3)
+        self.assertEqual(summary["desistencias"], 0)
+        self.assertAlmostEqual(summary["taxa_conclusao"], 200 / 3)
+        self.assertEqual(summary["media_palavras_aprendidas"], 80 / 3)
+
+    def test_removed_student_and_activity(self):
+        self.tracker.get_summary("turma")
+        self.repository.remove_student("turma", "S2")
+        self.assertEqual(self.tracker.get_summary("turma")["desistencias"], 0)
+
+        del self.repository["turma"]
+        self.assertEqual(self.tracker.get_summary("turma")["alunos"], 0)
+
+
+class TestClassAnalyticsContract(unittest.TestCase):
+    def setUp(self):
+        self.facade = InveniraFacade()
+
+    def test_analytics_list_advertises_class_metrics(self):
+        names = [m["name"] for m in self.facade.get_analytics_list()["classAnalytics"]]
+        self.assertIn("palavras_por_minuto", names)
+        self.assertIn("taxa_conclusao", names)
+        self.assertIn("desistencias", names)
+
+    def test_analytics_data_class_scope(self):
+        """scope=class retorna os agregados e usa o cache/ETag"""
+        request = {"activityID": "instancia_turma_B", "scope": "class"}
+        status, body, etag = self.facade.get_analytics_response(request)
+        self.assertEqual(status, 200)
+
+        data = json.loads(body)
+        metrics = {m["name"]: m["value"] for m in data["classAnalytics"]}
+        self.assertEqual(data["activityID"], "instancia_turma_B")
+        self.assertEqual(metrics["desistencias"], 1)
+        self.assertEqual(metrics["alunos"], 2)
+
+        status, _, _ = self.facade.get_analytics_response(request, if_none_match=etag)
+        self.assertEqual(status, 304)
+
+    def test_invalid_scope(self):
+        request = {"activityID": "instancia_turma_B", "scope": "escola"}
+        self.assertEqual(self.facade.get_analytics_response(request)[0], 400)
+        self.assertEqual(self.facade.handle_analytics_request(request)[2], 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
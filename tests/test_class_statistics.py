@@ -0,0 +1,84 @@
+"""
+Testes para as estatísticas agregadas da turma (tabelas colunares)
+"""
+import unittest
+from app import create_app
+from app.repositories import (
+    ColumnarActivityTable,
+    ColumnarStudentRepository,
+    StudentProgressRepository
+)
+from app.services.analytics_service import AnalyticsService
+
+RECORDS = [
+    {"student_id": f"S{index}", "time": index * 10, "words": index, "note": ""}
+    for index in range(1, 11)
+]
+
+
+class TestColumnarActivityTable(unittest.TestCase):
+    def setUp(self):
+        self.table = ColumnarActivityTable.from_records(RECORDS)
+
+    def test_describe(self):
+        """Média, mediana, extremos e percentis das colunas"""
+        stats = self.table.describe("time")
+        self.assertEqual(stats["count"], 10)
+        self.assertEqual(stats["mean"], 55.0)
+        self.assertEqual(stats["median"], 55.0)
+        self.assertEqual(stats["min"], 10)
+        self.assertEqual(stats["max"], 100)
+        self.assertAlmostEqual(stats["p90"], 91.0)
+
+    def test_top_n_ignores_removed_rows(self):
+        """Top-N em ordem decrescente, sem alunos removidos"""
+        self.table.remove("S10")
+        top = self.table.top_n("words", 3)
+        self.assertEqual([entry["student_id"] for entry in top], ["S9", "S8", "S7"])
+        self.assertEqual(top[0]["words"], 9)
+
+    def test_histogram(self):
+        """Histograma cobre todos os alunos vivos"""
+        histogram = self.table.histogram("words", bins=5)
+        self.assertEqual(sum(histogram["counts"]), 10)
+        self.assertEqual(len(histogram["edges"]), 6)
+
+    def test_empty_table(self):
+        """Tabela vazia não gera estatísticas inválidas"""
+        table = ColumnarActivityTable()
+        self.assertEqual(table.describe("time"), {"count": 0})
+        self.assertEqual(table.top_n("time"), [])
+        self.assertEqual(table.histogram("time")["counts"], [])
+
+    def test_unknown_column(self):
+        with self.assertRaises(ValueError):
+            self.table.describe("note")
+
+
+class TestClassStatistics(unittest.TestCase):
+    def test_same_result_for_every_engine(self):
+        """O motor colunar e o de memória produzem as mesmas estatísticas"""
+        results = []
+        for repository in (ColumnarStudentRepository(), StudentProgressRepository()):
+            repository.seed({"turma": RECORDS})
+            results.append(AnalyticsService(repository).get_class_statistics("turma", top=2))
+
+        self.assertEqual(results[0], results[1])
+        metrics = results[0]["metrics"]
+        self.assertEqual(metrics["palavras_aprendidas"]["mean"], 5.5)
+        self.assertEqual(metrics["tempo_jogado"]["top"][0], {"inveniraStdID": "S10", "value": 100})
+
+    def test_route(self):
+        """GET /game/class-stats/<activity_id>"""
+        client = create_app().test_client()
+        response = client.get('/game/class-stats/instancia_turma_A?top=1')
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()["data"]
+        self.assertEqual(data["count"], 2)
+        self.assertEqual(len(data["metrics"]["tempo_jogado"]["top"]), 1)
+
+        self.assertEqual(client.get('/game/class-stats/instancia_turma_A?bins=0').status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
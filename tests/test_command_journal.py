@@ -0,0 +1,134 @@
+"""
+Testes para o journal durável de comandos
+"""
+import os
+import tempfile
+import unittest
+from app.commands import (
+    CommandInvoker,
+    CommandJournal,
+    BatchSaveProgressCommand,
+    SaveStudentProgressCommand,
+    UpdateStudentScoreCommand,
+    ResetStudentProgressCommand
+)
+from app.repositories import SQLiteStudentRepository, StudentProgressRepository
+from app.services.analytics_service import AnalyticsService
+
+
+class TestCommandJournal(unittest.TestCase):
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.directory = tmpdir.name
+
+    def start(self, repository=None):
+        """Simula o início de um processo: novo repositório + recuperação"""
+        service = AnalyticsService(repository if repository is not None else StudentProgressRepository())
+        journal = CommandJournal(self.directory, service, fsync_batch=1, snapshot_every=0)
+        replayed = journal.recover()
+        journal.open()
+        self.addCleanup(journal.close)
+        return service, journal, CommandInvoker(journal=journal), replayed
+
+    def test_state_rebuilt_from_journal(self):
+        """Um novo processo reconstrói o estado reexecutando o journal"""
+        service, journal, invoker, _ = self.start()
+        invoker.execute_command(SaveStudentProgressCommand(service, "turma", "S1", 10, 1, "a"))
+        invoker.execute_command(SaveStudentProgressCommand(service, "turma", "S2", 20, 2, "b"))
+        invoker.execute_command(UpdateStudentScoreCommand(service, "turma", "S1", 4, 5))
+        invoker.execute_command(ResetStudentProgressCommand(service, "turma", "S2"))
+        journal.close()
+
+        restored, _, _, replayed = self.start()
+        self.assertEqual(replayed, 4)
+        self.assertEqual(restored.repository.list_students("turma"), [
+            {"student_id": "S1", "time": 15, "words": 5, "note": "a"}
+        ])
+
+    def test_failed_commands_are_not_journaled(self):
+        """Comandos sem efeito não entram no journal"""
+        service, journal, invoker, _ = self.start()
+        invoker.execute_command(UpdateStudentScoreCommand(service, "nada", "S1", 1, 1))
+        self.assertEqual(journal.last_seq, 0)
+
+    def test_partially_failed_batch_is_journaled(self):
+        """Os registros válidos de um lote com falhas sobrevivem à recuperação"""
+        service, journal, invoker, _ = self.start()
+        result = invoker.execute_command(BatchSaveProgressCommand(service, [
+            {"activity_id": "turma", "student_id": "S1", "time_played": 10, "words_learned": 1},
+            {"activity_id": "turma", "student_id": "S2", "time_played": "muito"}
+        ]))
+        self.assertEqual((result["success"], result["saved"]), (False, 1))
+        self.assertEqual(journal.last_seq, 1)
+        journal.close()
+
+        restored, _, _, replayed = self.start()
+        self.assertEqual(replayed, 1)
+        self.assertEqual(restored.repository.list_students("turma"), [
+            {"student_id": "S1", "time": 10, "words": 1, "note": ""}
+        ])
+
+    def test_snapshot_then_tail_replay(self):
+        """Após um snapshot, apenas a cauda do journal é reexecutada"""
+        service, journal, invoker, _ = self.start()
+        invoker.execute_command(SaveStudentProgressCommand(service, "turma", "S1", 10, 1, "a"))
+        invoker.execute_command(UpdateStudentScoreCommand(service, "turma", "S1", 1, 1))
+        self.assertEqual(journal.snapshot(), 2)
+        invoker.execute_command(UpdateStudentScoreCommand(service, "turma", "S1", 1, 1))
+        journal.close()
+
+        restored, new_journal, _, replayed = self.start()
+        self.assertEqual(replayed, 1)
+        self.assertEqual(new_journal.last_seq, 3)
+        self.assertEqual(restored.repository.get_student("turma", "S1")["words"], 3)
+
+    def test_partial_last_line_is_ignored(self):
+        """Uma linha truncada por crash não impede a recuperação"""
+        service, journal, invoker, _ = self.start()
+        invoker.execute_command(SaveStudentProgressCommand(service, "turma", "S1", 10, 1, "a"))
+        journal.close()
+        with open(os.path.join(self.directory, "commands.jsonl"), "a") as journal_file:
+            journal_file.write('{"seq":2,"type":"Upd')
+
+        restored, _, _, replayed = self.start()
+        self.assertEqual(replayed, 1)
+        self.assertIsNotNone(restored.repository.get_student("turma", "S1"))
+
+    def test_partial_last_line_is_truncated_before_appending(self):
+        """Registros escritos depois do crash não se colam à linha truncada"""
+        service, journal, invoker, _ = self.start()
+        invoker.execute_command(SaveStudentProgressCommand(service, "turma", "S1", 10, 1, "a"))
+        journal.close()
+        with open(os.path.join(self.directory, "commands.jsonl"), "a") as journal_file:
+            journal_file.write('{"seq":2,"type":"Upd')
+
+        service, journal, invoker, _ = self.start()
+        invoker.execute_command(SaveStudentProgressCommand(service, "turma", "S2", 20, 2, "b"))
+        journal.close()
+
+        restored, _, _, replayed = self.start()
+        self.assertEqual(replayed, 2)
+        self.assertIsNotNone(restored.repository.get_student("turma", "S2"))
+
+
+    def test_durable_engine_is_not_replayed(self):
+        """No SQLite o journal não reaplica comandos já gravados no banco"""
+        db_path = os.path.join(self.directory, "progress.db")
+        service, journal, invoker, _ = self.start(SQLiteStudentRepository(db_path))
+        invoker.execute_command(SaveStudentProgressCommand(service, "turma", "S1", 10, 1, "a"))
+        invoker.execute_command(UpdateStudentScoreCommand(service, "turma", "S1", 1, 1))
+        journal.snapshot()
+        invoker.execute_command(UpdateStudentScoreCommand(service, "turma", "S1", 1, 1))
+        journal.close()
+
+        restored, new_journal, invoker, replayed = self.start(SQLiteStudentRepository(db_path))
+        self.assertEqual(replayed, 0)
+        self.assertEqual(new_journal.last_seq, 3)
+        self.assertEqual(restored.repository.get_student("turma", "S1")["words"], 3)
+        invoker.execute_command(UpdateStudentScoreCommand(restored, "turma", "S1", 1, 1))
+        self.assertEqual(new_journal.last_seq, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
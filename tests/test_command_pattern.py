@@ -4,10 +4,14 @@ Testes para o padrão Command
 Valida o funcionamento dos comandos e do invoker.
 """
 
+import threading
 import unittest
+from contextlib import ExitStack
+from app import create_app
 from app.services.analytics_service import AnalyticsService
 from app.commands import (
     SaveStudentProgressCommand,
+    BatchSaveProgressCommand,
     RetrieveAnalyticsCommand,
     UpdateStudentScoreCommand,
     ResetStudentProgressCommand,
@@ -24,8 +28,9 @@ class TestCommandPattern(unittest.TestCase):
         self.invoker = CommandInvoker()
         
         # Limpa dados de teste
-        if "test_activity" in self.analytics_service.fake_database:
-            del self.analytics_service.fake_database["test_activity"]
+        for activity_id in ("test_activity", "test_activity_2"):
+            if activity_id in self.analytics_service.fake_database:
+                del self.analytics_service.fake_database[activity_id]
     
     def test_save_progress_command(self):
         """Testa o comando de salvar progresso"""
@@ -50,6 +55,24 @@ class TestCommandPattern(unittest.TestCase):
         self.assertEqual(students[0]["time"], 100)
         self.assertEqual(students[0]["words"], 10)
     
+    def test_save_progress_rejects_malformed_record(self):
+        """Testa que o salvamento individual usa a validação do lote"""
+        for student_id, time_played, feedback in (("S1", "muito", ""), (None, 10, ""), ("S1", 10, 5)):
+            command = SaveStudentProgressCommand(
+                self.analytics_service, "test_activity", student_id, time_played, 1, feedback
+            )
+            result = self.invoker.execute_command(command)
+            self.assertFalse(result['success'])
+        
+        self.assertNotIn("test_activity", self.analytics_service.fake_database)
+        
+        client = create_app().test_client()
+        response = client.post('/game/save-progress', json={
+            "activity_id": "test_activity", "student_id": "S1", "time_played": "muito"
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json()["message"], "time_played must be an integer")
+    
     def test_retrieve_analytics_command(self):
         """Testa o comando de recuperar analytics"""
         # Primeiro salva alguns dados
@@ -103,6 +126,28 @@ class TestCommandPattern(unittest.TestCase):
         self.assertEqual(result['new_totals']['time'], 130)
         self.assertEqual(result['new_totals']['words'], 15)
     
+    def test_update_score_rejects_malformed_deltas(self):
+        """Deltas que não são inteiros não chegam ao repositório"""
+        self.invoker.execute_command(SaveStudentProgressCommand(
+            self.analytics_service, "test_activity", "Student_B", 11, 11, ""
+        ))
+        for words, time_played in (("x", 5), (None, 5), (1.5, 5), (True, 5), (5, "x")):
+            result = self.invoker.execute_command(UpdateStudentScoreCommand(
+                self.analytics_service, "test_activity", "Student_B", words, time_played
+            ))
+            self.assertFalse(result['success'])
+        
+        student = self.analytics_service.repository.get_student("test_activity", "Student_B")
+        self.assertEqual((student["time"], student["words"]), (11, 11))
+        
+        client = create_app().test_client()
+        response = client.post('/game/update-score', json={
+            "activity_id": "test_activity", "student_id": "Student_B",
+            "additional_words": None, "additional_time": 5
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("additional_words must be an integer", response.get_json()["message"])
+    
     def test_reset_progress_command(self):
         """Testa o comando de reset de progresso"""
         # Salva progresso
@@ -192,6 +237,79 @@ class TestCommandPattern(unittest.TestCase):
             self.assertIn('description', entry)
             self.assertIn('executed_at', entry)
     
+    def test_batch_save_command(self):
+        """Testa o salvamento em lote com resultado por item"""
+        command = BatchSaveProgressCommand(self.analytics_service, [
+            {"activity_id": "test_activity", "student_id": "S1", "time_played": 10, "words_learned": 1},
+            {"activity_id": "test_activity_2", "student_id": "S2", "time_played": 20, "words_learned": 2},
+            {"activity_id": "test_activity", "time_played": 30},
+            {"activity_id": "test_activity", "student_id": "S3", "words_learned": "muitas"}
+        ])
+        
+        result = self.invoker.execute_command(command)
+        
+        self.assertFalse(result['success'])
+        self.assertEqual(result['saved'], 2)
+        self.assertEqual(result['failed'], 2)
+        self.assertEqual([r['success'] for r in result['results']], [True, True, False, False])
+        self.assertIn("student_id", result['results'][2]['message'])
+        
+        self.assertEqual(len(self.analytics_service.fake_database["test_activity"]), 1)
+        self.assertEqual(len(self.analytics_service.fake_database["test_activity_2"]), 1)
+    
+    def test_invoker_history_is_bounded(self):
+        """Testa que o histórico descarta as entradas mais antigas"""
+        invoker = CommandInvoker(max_history_size=3)
+        
+        for i in range(5):
+            invoker.execute_command(SaveStudentProgressCommand(
+                self.analytics_service, "test_activity", f"S{i}", i, i, ""
+            ))
+        
+        history = invoker.get_history()
+        self.assertEqual(len(history), 3)
+        self.assertIn("S2", history[0]['description'])
+        self.assertEqual(len(invoker.get_history(limit=2)), 2)
+        self.assertIn("S4", invoker.get_history(limit=1)[0]['description'])
+    
+    def test_concurrent_updates_are_not_lost(self):
+        """Testa atualizações concorrentes através do mesmo invoker"""
+        self.invoker.execute_command(SaveStudentProgressCommand(
+            self.analytics_service, "test_activity", "Student_Busy", 0, 0, ""
+        ))
+        
+        def worker():
+            for _ in range(200):
+                self.invoker.execute_command(UpdateStudentScoreCommand(
+                    self.analytics_service, "test_activity", "Student_Busy", 1, 1
+                ))
+        
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        student = self.analytics_service.repository.get_student("test_activity", "Student_Busy")
+        self.assertEqual(student["words"], 1600)
+        self.assertEqual(len(self.invoker.get_history()), self.invoker.max_history_size)
+    
+    def test_activity_locks_are_striped(self):
+        """Testa que os locks não crescem com as turmas e que faixas repetidas não travam"""
+        invoker = CommandInvoker()
+        stripes = invoker.ACTIVITY_LOCK_STRIPES
+        keys = [f"turma_{i}" for i in range(stripes * 4)]
+        
+        # Mais chaves do que faixas: pelo menos duas caem na mesma faixa
+        locks = invoker._locks_for(keys)
+        self.assertLessEqual(len(locks), stripes)
+        self.assertEqual(len(locks), len(set(map(id, locks))))
+        self.assertEqual(len(invoker._activity_locks), stripes)
+        
+        with ExitStack() as stack:
+            for lock in locks:
+                stack.enter_context(lock)
+    
     def test_command_description(self):
         """Testa se os comandos retornam descrições legíveis"""
         command = SaveStudentProgressCommand(
@@ -210,5 +328,35 @@ class TestCommandPattern(unittest.TestCase):
         self.assertIn("activity_123", description)
 
 
+class TestPaginatedProgressRoute(unittest.TestCase):
+    """GET /game/get-progress com paginação, filtros e projeção"""
+
+    def setUp(self):
+        self.client = create_app().test_client()
+
+    def test_page_with_projection(self):
+        response = self.client.get(
+            '/game/get-progress/instancia_turma_A?sort=-words&limit=1&fields=palavras_aprendidas'
+        )
+        self.assertEqual(response.status_code, 200)
+        result = response.get_json()
+        self.assertEqual(result["count"], 1)
+        self.assertEqual(result["data"][0], {
+            "inveniraStdID": "Student_Maria",
+            "quantAnalytics": [{"name": "palavras_aprendidas", "type": "integer", "value": 50}]
+        })
+
+        next_page = self.client.get(
+            f'/game/get-progress/instancia_turma_A?sort=-words&limit=1&cursor={result["next_cursor"]}'
+        ).get_json()
+        self.assertEqual(next_page["data"][0]["inveniraStdID"], "Student_Joao")
+        self.assertIsNone(next_page["next_cursor"])
+
+    def test_invalid_parameters(self):
+        for query in ('sort=note', 'limit=0', 'cursor=xyz', 'fields=idade', 'min_time=abc'):
+            response = self.client.get(f'/game/get-progress/instancia_turma_A?{query}')
+            self.assertEqual(response.status_code, 400, query)
+
+
 if __name__ == '__main__':
     unittest.main()
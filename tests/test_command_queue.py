@@ -0,0 +1,104 @@
+"""
+Testes para a fila assíncrona de comandos
+"""
+import threading
+import unittest
+from app.commands import (
+    AsyncCommandQueue,
+    Command,
+    CommandInvoker,
+    QueueFullError,
+    SaveStudentProgressCommand,
+    UpdateStudentScoreCommand
+)
+from app.repositories import StudentProgressRepository
+from app.services.analytics_service import AnalyticsService
+
+
+class BlockingCommand(Command):
+    """Comando que só termina quando o evento é liberado"""
+
+    def __init__(self, release):
+        super().__init__()
+        self.release = release
+
+    def execute(self):
+        self.release.wait(5)
+        return {"success": True}
+
+    def get_description(self):
+        return "Blocking command"
+
+
+class FailingCommand(Command):
+    activity_id = "turma"
+    student_id = "S1"
+
+    def execute(self):
+        raise RuntimeError("falhou")
+
+    def get_description(self):
+        return "Failing command"
+
+
+class TestAsyncCommandQueue(unittest.TestCase):
+    def setUp(self):
+        self.service = AnalyticsService(StudentProgressRepository())
+        self.invoker = CommandInvoker()
+
+    def test_ticket_reports_result(self):
+        """O ticket passa a done com o resultado do comando"""
+        command_queue = AsyncCommandQueue(self.invoker, num_workers=2)
+        ticket = command_queue.submit(
+            SaveStudentProgressCommand(self.service, "turma", "S1", 10, 1, "ok")
+        )
+        command_queue.wait_until_idle()
+
+        self.assertEqual(command_queue.get_ticket(ticket.ticket_id).status, "done")
+        self.assertTrue(ticket.result["success"])
+        self.assertIsNotNone(self.service.repository.get_student("turma", "S1"))
+
+    def test_failed_command(self):
+        """Exceções do comando ficam registradas no ticket"""
+        command_queue = AsyncCommandQueue(self.invoker, num_workers=1)
+        ticket = command_queue.submit(FailingCommand())
+        command_queue.wait_until_idle()
+
+        self.assertEqual(ticket.status, "failed")
+        self.assertIn("falhou", ticket.error)
+
+    def test_per_student_ordering(self):
+        """Comandos do mesmo aluno executam na ordem de envio"""
+        command_queue = AsyncCommandQueue(self.invoker, num_workers=4)
+        command_queue.submit(SaveStudentProgressCommand(self.service, "turma", "S1", 0, 0, ""))
+        tickets = [
+            command_queue.submit(UpdateStudentScoreCommand(self.service, "turma", "S1", 1, 0))
+            for _ in range(50)
+        ]
+        command_queue.wait_until_idle()
+
+        totals = [t.result["new_totals"]["words"] for t in tickets]
+        self.assertEqual(totals, list(range(1, 51)))
+
+    def test_backpressure(self):
+        """Com a fila cheia, submit levanta QueueFullError"""
+        release = threading.Event()
+        command_queue = AsyncCommandQueue(self.invoker, num_workers=1, max_pending=1)
+        self.addCleanup(release.set)
+
+        first = command_queue.submit(BlockingCommand(release))
+        # Espera o worker retirar o primeiro comando da fila
+        while first.status == "queued":
+            threading.Event().wait(0.001)
+        command_queue.submit(BlockingCommand(release))
+
+        with self.assertRaises(QueueFullError):
+            command_queue.submit(BlockingCommand(release))
+
+        release.set()
+        command_queue.wait_until_idle()
+        self.assertEqual(command_queue.pending_count(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
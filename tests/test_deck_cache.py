@@ -0,0 +1,127 @@
+"""
+Testes para o cache de decks partilhado entre atividades
+"""
+import os
+import tempfile
+import threading
+import time
+import unittest
+from app import create_app
+from app.decks import DeckCache, DeckStore
+
+
+class SlowStore(DeckStore):
+    """DeckStore que conta as aberturas e demora a abrir"""
+
+    def __init__(self, deck_dir, delay=0.0):
+        super().__init__(deck_dir)
+        self.delay = delay
+        self.opened = 0
+
+    def open(self, deck_id):
+        self.opened += 1
+        time.sleep(self.delay)
+        return super().open(deck_id)
+
+
+class TestDeckCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        for name, words in (("cores", ["rot", "blau"]), ("animais", ["Hund", "Katze"]), ("numeros", ["eins"])):
+            self.write_source(name, words)
+
+    def write_source(self, name, words):
+        path = os.path.join(self.tmp.name, name + ".csv")
+        with open(path, "w", encoding="utf-8") as source:
+            source.write("".join(f"{word},tradução de {word}\n" for word in words))
+        return path
+
+    def test_hits_after_first_load(self):
+        store = SlowStore(self.tmp.name)
+        cache = DeckCache(store, max_bytes=10 ** 7)
+        first = cache.get("cores")
+        self.assertIs(cache.get("cores"), first)
+        self.assertEqual(first.words, ["rot", "blau"])
+        self.assertEqual(first.get("blau")["translation"], "tradução de blau")
+        self.assertEqual(store.opened, 1)
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["loads"]), (1, 1, 1))
+
+    def test_single_flight(self):
+        """Primeiras requisições simultâneas disparam uma única carga"""
+        store = SlowStore(self.tmp.name, delay=0.05)
+        cache = DeckCache(store, max_bytes=10 ** 7)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get("cores"))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(store.opened, 1)
+        self.assertEqual(len({id(deck) for deck in results}), 1)
+
+    def test_load_errors_are_not_cached(self):
+        cache = DeckCache(SlowStore(self.tmp.name), max_bytes=10 ** 7)
+        for deck_id in ("nao_existe", "../cores"):
+            with self.assertRaises(KeyError):
+                cache.get(deck_id)
+        self.assertEqual(len(cache), 0)
+
+    def test_lru_eviction_within_budget(self):
+        store = SlowStore(self.tmp.name)
+        probe = DeckCache(store, max_bytes=10 ** 7)
+        size = max(probe.get(deck_id).nbytes for deck_id in ("cores", "animais", "numeros"))
+
+        cache = DeckCache(store, max_bytes=2 * size)
+        cache.get("cores")
+        cache.get("animais")
+        cache.get("cores")
+        cache.get("numeros")
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertLessEqual(cache.current_bytes, cache.max_bytes)
+
+        opened = store.opened
+        cache.get("cores")
+        self.assertEqual(store.opened, opened)
+        cache.get("animais")
+        self.assertEqual(store.opened, opened + 1)
+
+    def test_oversized_deck_is_served_but_not_kept(self):
+        cache = DeckCache(SlowStore(self.tmp.name), max_bytes=1)
+        self.assertEqual(cache.get("cores").words, ["rot", "blau"])
+        self.assertEqual(len(cache), 0)
+
+    def test_recompiled_deck_gets_new_version(self):
+        store = SlowStore(self.tmp.name)
+        cache = DeckCache(store, max_bytes=10 ** 7)
+        old = cache.get("cores")
+
+        source = self.write_source("cores", ["rot", "blau", "gelb"])
+        earlier = os.path.getmtime(source) - 10
+        os.utime(store.compiled_path("cores"), (earlier, earlier))
+        new = cache.get("cores")
+        self.assertNotEqual(new.content_hash, old.content_hash)
+        self.assertEqual(new.words, ["rot", "blau", "gelb"])
+        self.assertEqual(len(cache), 1)
+        # A versão antiga continua utilizável por quem ainda a tem
+        self.assertEqual(old.get("rot")["word"], "rot")
+
+
+class TestDeckCacheRoutes(unittest.TestCase):
+    def test_entry_cards_include_translation(self):
+        client = create_app().test_client()
+        data = client.get(
+            "/game/entry?activity_id=turma_cache&student_id=S1&deck_id=deck_123_exemplo&limit=1"
+        ).get_json()
+        self.assertEqual(data["cards"][0]["translation"], "vermelho")
+        self.assertEqual(data["cards"][0]["part_of_speech"], "adjective")
+
+        client.get("/game/entry?activity_id=turma_cache_2&student_id=S1&deck_id=deck_123_exemplo")
+        metrics = client.get("/metrics").get_data(as_text=True)
+        self.assertIn('deck_cache_requests_total{result="hit"}', metrics)
+        self.assertIn("# TYPE deck_cache_loads_total counter", metrics)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,181 @@
+"""
+Testes para o formato compilado dos decks (compilador, leitor mmap e diretório)
+"""
+import json
+import os
+import struct
+import tempfile
+import unittest
+from app import create_app
+from app.decks import CompiledDeck, DeckFormatError, DeckStore, build_deck, compile_deck, load_source
+
+
+class DeckTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dir = self.tmp.name
+
+    def write(self, name, content):
+        path = os.path.join(self.dir, name)
+        with open(path, "w", encoding="utf-8") as source:
+            source.write(content)
+        return path
+
+
+class TestDeckCompiler(DeckTestCase):
+    def test_csv_with_header(self):
+        path = self.write("cores.csv", "word,translation,part_of_speech\nrot,vermelho,adjective\ngrün,verde,adjective\n")
+        meta, entries = load_source(path)
+        self.assertEqual(meta, {})
+        self.assertEqual(entries[1], {"word": "grün", "translation": "verde", "part_of_speech": "adjective"})
+
+    def test_csv_without_header_and_blank_lines(self):
+        path = self.write("cores.csv", "rot,vermelho\n\nblau\n")
+        _, entries = load_source(path)
+        self.assertEqual([entry["word"] for entry in entries], ["rot", "blau"])
+        self.assertEqual(entries[1]["translation"], "")
+
+    def test_json_object_and_strings(self):
+        path = self.write("deck.json", json.dumps({
+            "deck_id": "cores_de", "title": "Cores em Alemão",
+            "words": ["rot", {"word": "blau", "translation": "azul"}]
+        }))
+        result = compile_deck(path)
+        self.assertEqual(result["deck_id"], "cores_de")
+        with CompiledDeck(result["path"]) as deck:
+            self.assertEqual(deck.title, "Cores em Alemão")
+            self.assertEqual(deck.get("blau")["translation"], "azul")
+
+    def test_invalid_sources(self):
+        for name, content in (("a.json", "{"), ("b.json", '[""]'), ("c.json", "[1]"), ("d.txt", "rot")):
+            with self.assertRaises(DeckFormatError):
+                load_source(self.write(name, content))
+
+    def test_duplicates_keep_first(self):
+        path = self.write("cores.csv", "rot,vermelho\nrot,encarnado\n")
+        result = compile_deck(path)
+        self.assertEqual((result["entries"], result["duplicates"]), (1, 1))
+        with CompiledDeck(result["path"]) as deck:
+            self.assertEqual(deck.get("rot")["translation"], "vermelho")
+
+
+class TestCompiledDeck(DeckTestCase):
+    def compile(self, entries, deck_id="deck", **kwargs):
+        content, _ = build_deck(entries, deck_id, **kwargs)
+        path = os.path.join(self.dir, deck_id + ".wmdeck")
+        with open(path, "wb") as output:
+            output.write(content)
+        return CompiledDeck(path)
+
+    def test_round_trip_and_lookup(self):
+        entries = [{"word": f"wort_{i}", "translation": f"palavra_{i % 7}", "part_of_speech": "noun"}
+                   for i in range(1000)]
+        with self.compile(entries) as deck:
+            self.assertEqual(len(deck), 1000)
+            self.assertEqual(deck.words()[:2], ["wort_0", "wort_1"])
+            self.assertEqual(deck.entry(999), entries[999])
+            self.assertEqual(deck.index_of("wort_500"), 500)
+            self.assertIsNone(deck.index_of("wort_1000"))
+            self.assertNotIn("", deck)
+
+    def test_strings_are_interned(self):
+        """Traduções repetidas ocupam o pool uma só vez"""
+        repeated = [{"word": f"w{i}", "translation": "mesma tradução", "part_of_speech": "noun"} for i in range(500)]
+        distinct = [{"word": f"w{i}", "translation": f"tradução {i:05d}", "part_of_speech": "noun"} for i in range(500)]
+        with self.compile(repeated, "a") as small, self.compile(distinct, "b") as large:
+            self.assertLess(small.nbytes + 500 * 10, large.nbytes)
+
+    def test_empty_deck(self):
+        with self.compile([]) as deck:
+            self.assertEqual(len(deck), 0)
+            self.assertIsNone(deck.get("rot"))
+
+    def test_content_hash_tracks_content(self):
+        entries = [{"word": "rot", "translation": "vermelho", "part_of_speech": ""}]
+        with self.compile(entries, "a") as first, self.compile(entries, "b") as second:
+            self.assertNotEqual(first.content_hash, second.content_hash)
+        with self.compile(entries, "a") as again:
+            self.assertEqual(again.content_hash, first.content_hash)
+
+    def test_extra_sections_are_kept(self):
+        with self.compile([], extra_sections={"TEST": b"abc"}) as deck:
+            section = deck.section("TEST")
+            self.assertEqual(bytes(section), b"abc")
+            section.release()
+            self.assertIsNone(deck.section("NONE"))
+
+    def test_rejects_other_files(self):
+        for content in (b"", b"WMDK", b"x" * 64):
+            path = os.path.join(self.dir, "bad.wmdeck")
+            with open(path, "wb") as output:
+                output.write(content)
+            with self.assertRaises(DeckFormatError):
+                CompiledDeck(path)
+
+
+    def test_corrupt_hash_table(self):
+        entries = [{"word": "rot", "translation": "vermelho", "part_of_speech": "adjective"}]
+        with self.compile(entries) as deck:
+            offset, length = deck.sections["HASH"]
+            path = deck.path
+        with open(path, "rb") as deck_file:
+            content = bytearray(deck_file.read())
+
+        # Tabela cheia (sem posições vazias): a busca termina após uma volta
+        content[offset:offset + length] = struct.pack(f"<{length // 4}I", *[1] * (length // 4))
+        with open(path, "wb") as output:
+            output.write(content)
+        with CompiledDeck(path) as deck:
+            self.assertIsNone(deck.index_of("blau"))
+            self.assertEqual(deck.index_of("rot"), 0)
+
+        # Posição que aponta para fora da tabela de entradas
+        content[offset:offset + 4] = struct.pack("<I", 99)
+        with open(path, "wb") as output:
+            output.write(content)
+        with self.assertRaises(DeckFormatError):
+            CompiledDeck(path)
+
+class TestDeckStore(DeckTestCase):
+    def test_open_compiles_stale_sources(self):
+        source = self.write("cores.csv", "rot,vermelho\n")
+        store = DeckStore(self.dir)
+        with store.open("cores") as deck:
+            self.assertEqual(deck.words(), ["rot"])
+
+        # Fonte alterada depois da compilação
+        self.write("cores.csv", "rot,vermelho\nblau,azul\n")
+        earlier = os.path.getmtime(source) - 10
+        os.utime(store.compiled_path("cores"), (earlier, earlier))
+        self.assertTrue(store.is_stale("cores"))
+        with store.open("cores") as deck:
+            self.assertEqual(len(deck), 2)
+        self.assertEqual(store.compile_all(), [])
+
+    def test_deck_ids_and_invalid_ids(self):
+        self.write("cores.csv", "rot\n")
+        self.write("notas.txt", "")
+        store = DeckStore(self.dir)
+        self.assertEqual(store.deck_ids(), ["cores"])
+        for deck_id in ("../cores", "", "missing", None):
+            with self.assertRaises(KeyError):
+                store.open(deck_id)
+
+
+class TestDeckRoutes(unittest.TestCase):
+    def test_config_page_lists_decks(self):
+        html = create_app().test_client().get("/config").get_data(as_text=True)
+        self.assertIn('<option value="deck_123_exemplo" selected>', html)
+
+    def test_entry_loads_deck_words(self):
+        client = create_app().test_client()
+        data = client.get("/game/entry?activity_id=turma_deck&student_id=S1&deck_id=deck_123_exemplo&limit=3").get_json()
+        self.assertEqual([card["word"] for card in data["cards"]], ["rot", "blau", "grün"])
+
+        response = client.get("/game/entry?activity_id=turma_deck_2&student_id=S1&deck_id=nao_existe")
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+"""
+Testes para o índice de distratores das rodadas de escolha múltipla
+"""
+import os
+import random
+import tempfile
+import unittest
+from app import create_app
+from app.decks import CompiledDeck, build_deck, build_distractor_index, build_round
+from app.decks.deck_format import NO_DISTRACTOR
+
+
+def entry(word, translation, part_of_speech="noun"):
+    return {"word": word, "translation": translation, "part_of_speech": part_of_speech}
+
+
+class TestDistractorIndex(unittest.TestCase):
+    def distractors(self, entries, per_word=3):
+        table = build_distractor_index(entries, per_word=per_word)
+        self.assertEqual(table[0], per_word)
+        return [
+            [other for other in table[1 + i * per_word:1 + (i + 1) * per_word] if other != NO_DISTRACTOR]
+            for i in range(len(entries))
+        ]
+
+    def test_prefers_same_class_and_similar_length(self):
+        entries = [
+            entry("Hund", "cão"),
+            entry("Mund", "boca"),
+            entry("geht", "vai", "verb"),
+            entry("Handys", "telemóveis"),
+            entry("Hand", "mão")
+        ]
+        first = self.distractors(entries)[0]
+        self.assertEqual(set(first[:2]), {1, 4})
+        self.assertEqual(first[2], 3)
+
+    def test_skips_synonyms_and_repeated_translations(self):
+        entries = [entry("Auto", "carro"), entry("Wagen", "carro"), entry("Bahn", "comboio"), entry("Zug", "comboio")]
+        distractors = self.distractors(entries)
+        self.assertNotIn(1, distractors[0])
+        self.assertEqual(len(distractors[0]), 1)
+        # Deck só de sinônimos: nenhum distrator possível
+        self.assertEqual(self.distractors(entries[:2]), [[], []])
+
+    def test_small_deck_is_padded(self):
+        self.assertEqual(self.distractors([entry("eins", "um")]), [[]])
+        self.assertEqual(build_distractor_index([], per_word=3).tolist(), [3])
+
+
+class TestRounds(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        entries = [entry(f"wort{i}", f"palavra {i}") for i in range(50)]
+        content, _ = build_deck(entries, "round")
+        path = os.path.join(tmp.name, "round.wmdeck")
+        with open(path, "wb") as output:
+            output.write(content)
+        self.deck = CompiledDeck(path)
+        self.addCleanup(self.deck.close)
+
+    def test_round_has_answer_and_distinct_options(self):
+        rng = random.Random(1)
+        for _ in range(20):
+            question = build_round(self.deck, "wort7", choices=4, rng=rng)
+            self.assertEqual(question["prompt"], "wort7")
+            self.assertEqual(question["answer"], "palavra 7")
+            self.assertEqual(len(set(question["options"])), 4)
+            self.assertIn("palavra 7", question["options"])
+
+    def test_unknown_word(self):
+        self.assertIsNone(build_round(self.deck, "Elefant"))
+
+    def test_deck_without_index(self):
+        """Decks compilados sem a seção DIST continuam legíveis"""
+        self.assertTrue(self.deck.distractors(0))
+        self.deck.distractors_per_word = 0
+        self.assertEqual(build_round(self.deck, "wort7")["options"], ["palavra 7"])
+
+
+class TestRoundRoutes(unittest.TestCase):
+    def test_entry_with_choices(self):
+        client = create_app().test_client()
+        data = client.get(
+            "/game/entry?activity_id=turma_round&student_id=S1&deck_id=deck_123_exemplo&limit=2&choices=4"
+        ).get_json()
+        for card in data["cards"]:
+            self.assertEqual(len(card["options"]), 4)
+            self.assertIn(card["translation"], card["options"])
+
+        response = client.get("/game/entry?activity_id=turma_round&student_id=S1&deck_id=deck_123_exemplo&choices=50")
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
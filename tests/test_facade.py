@@ -4,6 +4,8 @@ Demonstra como o padrão simplifica os testes
 """
 import unittest
 from app.facades.invenira_facade import InveniraFacade
+from app.services.analytics_service import AnalyticsService
+from app.commands import SaveStudentProgressCommand, CommandInvoker
 
 
 class TestInveniraFacade(unittest.TestCase):
@@ -115,5 +117,51 @@ class TestSubsystemsIntegration(unittest.TestCase):
         self.assertEqual(data[1]["inveniraStdID"], "Student_Ana")
 
 
+class TestSharedDataSource(unittest.TestCase):
+    """O caminho Command e o caminho Facade leem a mesma fonte de dados"""
+    
+    def setUp(self):
+        self.facade = InveniraFacade()
+        self.analytics_service = AnalyticsService()
+        self.invoker = CommandInvoker()
+        
+        if "shared_activity" in self.analytics_service.repository:
+            del self.analytics_service.repository["shared_activity"]
+    
+    def save(self, student_id, words):
+        command = SaveStudentProgressCommand(
+            self.analytics_service, "shared_activity", student_id, 60, words, "ok"
+        )
+        self.invoker.execute_command(command)
+    
+    def test_saved_progress_appears_in_facade(self):
+        """Progresso salvo via Command aparece no /analytics-data"""
+        self.save("Student_Shared", 7)
+        
+        _, data, _ = self.facade.handle_analytics_request({"activityID": "shared_activity"})
+        
+        self.assertEqual(len(data), 1)
+        self.assertEqual(data[0]["inveniraStdID"], "Student_Shared")
+    
+    def test_response_cache_invalidated_only_by_writes(self):
+        """A resposta em cache é reutilizada até uma escrita na atividade"""
+        self.save("Student_1", 1)
+        request = {"activityID": "shared_activity"}
+        
+        _, first, etag = self.facade.get_analytics_response(request)
+        status, body, _ = self.facade.get_analytics_response(request, if_none_match=etag)
+        self.assertEqual((status, body), (304, b""))
+        
+        self.save("Student_2", 2)
+        status, second, new_etag = self.facade.get_analytics_response(request, if_none_match=etag)
+        self.assertEqual(status, 200)
+        self.assertNotEqual(etag, new_etag)
+        self.assertIn(b"Student_2", second)
+    
+    def test_class_tracker_registered_once_per_repository(self):
+        """Várias Facades sobre o mesmo repositório partilham um listener"""
+        other = InveniraFacade()
+        self.assertIs(other.analytics.class_aggregates, self.facade.analytics.class_aggregates)
+
 if __name__ == '__main__':
     unittest.main()
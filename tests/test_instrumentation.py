@@ -0,0 +1,90 @@
+"""
+Testes para a instrumentação (shards por thread e endpoint /metrics)
+"""
+import threading
+import unittest
+from app import create_app
+from app.commands import CommandInvoker, SaveStudentProgressCommand, ResetStudentProgressCommand
+from app.repositories import StudentProgressRepository
+from app.services.analytics_service import AnalyticsService
+from app.services.instrumentation import MetricsRegistry, instrument_repository
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def test_shards_are_merged_on_scrape(self):
+        registry = MetricsRegistry(buckets=(0.1, 1.0))
+
+        def work():
+            for _ in range(1000):
+                registry.inc("hits_total", (("route", "/x"),))
+                registry.observe("latency_seconds", 0.5)
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        registry.inc("hits_total", (("route", "/x"),))
+
+        snapshot = registry.snapshot()
+        self.assertEqual(snapshot.counters[("hits_total", (("route", "/x"),))], 4001)
+        # Shards das threads encerradas foram consolidados
+        self.assertEqual(len(registry._shards), 1)
+        self.assertEqual(snapshot.histograms[("latency_seconds", ())][:3], [0, 4000, 0])
+
+    def test_render_prometheus_text(self):
+        registry = MetricsRegistry(buckets=(0.1, 1.0))
+        registry.describe("latency_seconds", "histogram", "Latência")
+        registry.observe("latency_seconds", 0.05, (("route", "/a"),))
+        registry.observe("latency_seconds", 2.0, (("route", "/a"),))
+        registry.add_gauge("queue_depth", "Fila", lambda: 3)
+
+        text = registry.render()
+        self.assertIn("# TYPE latency_seconds histogram", text)
+        self.assertIn('latency_seconds_bucket{route="/a",le="0.1"} 1', text)
+        self.assertIn('latency_seconds_bucket{route="/a",le="1.0"} 1', text)
+        self.assertIn('latency_seconds_bucket{route="/a",le="+Inf"} 2', text)
+        self.assertIn('latency_seconds_count{route="/a"} 2', text)
+        self.assertIn("queue_depth 3", text)
+
+
+class TestCommandAndStorageInstrumentation(unittest.TestCase):
+    def test_invoker_records_outcome_per_command_class(self):
+        registry = MetricsRegistry()
+        service = AnalyticsService(StudentProgressRepository())
+        invoker = CommandInvoker(metrics=registry)
+        invoker.execute_command(SaveStudentProgressCommand(service, "turma", "S1", 10, 1, ""))
+        invoker.execute_command(ResetStudentProgressCommand(service, "turma", "S2"))
+
+        counters = registry.snapshot().counters
+        self.assertEqual(counters[("commands_total", (("command", "SaveStudentProgressCommand"), ("outcome", "success")))], 1)
+        self.assertEqual(counters[("commands_total", (("command", "ResetStudentProgressCommand"), ("outcome", "failure")))], 1)
+
+    def test_instrument_repository_once(self):
+        registry = MetricsRegistry()
+        repository = StudentProgressRepository()
+        instrument_repository(repository, registry)
+        instrument_repository(repository, registry)
+        repository.save_student("turma", "S1", 1, 1, "")
+
+        histogram = registry.snapshot().histograms[("storage_operation_duration_seconds", (("operation", "save_student"),))]
+        self.assertEqual(sum(histogram[:-1]), 1)
+
+
+class TestMetricsEndpoint(unittest.TestCase):
+    def test_route_latencies_exposed(self):
+        client = create_app().test_client()
+        client.get('/analytics-list')
+        client.get('/game/tickets/missing')
+
+        response = client.get('/metrics')
+        text = response.get_data(as_text=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        self.assertIn('http_request_duration_seconds_count{route="/analytics-list",method="GET"}', text)
+        self.assertIn('http_requests_total{route="/game/tickets/<ticket_id>",method="GET",status="404"}', text)
+        self.assertIn("command_queue_pending", text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+"""
+Testes para o Factory Method das métricas e a serialização em lote
+"""
+import json
+import unittest
+from app.models.metrics import MetricFactory, QuantitativeMetric, QualitativeMetric
+from app.repositories import StudentProgressRepository
+from app.services.analytics_service import AnalyticsService
+
+
+class TestMetricFactory(unittest.TestCase):
+    def test_dispatch_by_category(self):
+        """A fábrica cria o produto concreto com o tipo padrão"""
+        quant = MetricFactory.create_metric("quant", "tempo_jogado", 10)
+        qual = MetricFactory.create_metric("qual", "feedback_professor", "ok")
+
+        self.assertIsInstance(quant, QuantitativeMetric)
+        self.assertEqual(quant.to_json(), {"name": "tempo_jogado", "type": "integer", "value": 10})
+        self.assertIsInstance(qual, QualitativeMetric)
+        self.assertEqual(qual.data_type, "text/plain")
+
+    def test_unknown_category(self):
+        """Categoria desconhecida levanta ValueError"""
+        with self.assertRaises(ValueError):
+            MetricFactory.create_metric("outra", "x", 1)
+
+    def test_metrics_have_no_instance_dict(self):
+        """As métricas usam __slots__"""
+        metric = MetricFactory.create_metric("quant", "x", 1)
+        self.assertFalse(hasattr(metric, "__dict__"))
+
+
+class TestBulkSerialization(unittest.TestCase):
+    def test_bulk_matches_factory_path(self):
+        """O JSON em lote é idêntico ao gerado via Factory + to_json"""
+        repository = StudentProgressRepository({
+            "turma": [
+                {"student_id": "Jürgen", "time": 10, "words": 0, "note": 'Disse "Grün" \\ ok'},
+                {"student_id": "S2", "time": 12.5, "words": 3, "note": None}
+            ]
+        })
+        service = AnalyticsService(repository)
+
+        expected = json.dumps(
+            service.get_analytics_for_activity("turma"), separators=(",", ":")
+        ).encode()
+        self.assertEqual(service.serialize_analytics_for_activity("turma"), expected)
+
+    def test_empty_class(self):
+        """Turma vazia serializa como lista vazia"""
+        service = AnalyticsService(StudentProgressRepository())
+        self.assertEqual(service.serialize_analytics_for_activity("nada"), b"[]")
+        self.assertEqual(b"".join(service.stream_analytics_for_activity("nada")), b"[]")
+        self.assertEqual(b"".join(service.stream_analytics_for_activity("nada", ndjson=True)), b"")
+
+    def test_stream_matches_bulk(self):
+        """O streaming em pedaços gera o mesmo JSON, e NDJSON um aluno por linha"""
+        repository = StudentProgressRepository({
+            "turma": [
+                {"student_id": f"S{index}", "time": index, "words": index, "note": "ok"}
+                for index in range(7)
+            ]
+        })
+        service = AnalyticsService(repository)
+
+        chunks = list(service.stream_analytics_for_activity("turma", chunk_size=3))
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(b"".join(chunks), service.serialize_analytics_for_activity("turma"))
+
+        lines = b"".join(service.stream_analytics_for_activity("turma", ndjson=True, chunk_size=3)).splitlines()
+        self.assertEqual(
+            [json.loads(line) for line in lines],
+            service.get_analytics_for_activity("turma")
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
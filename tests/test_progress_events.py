@@ -0,0 +1,113 @@
+"""
+Testes para o push de progresso (barramento de eventos, SSE e long-poll)
+"""
+import json
+import threading
+import unittest
+from app import create_app
+from app.repositories import StudentProgressRepository, get_shared_repository
+from app.services.progress_events import ProgressEventBus, iter_sse
+
+
+class TestProgressEventBus(unittest.TestCase):
+    def setUp(self):
+        self.repository = StudentProgressRepository()
+        self.bus = ProgressEventBus(self.repository, buffer_size=4)
+        self.addCleanup(self.bus.close)
+
+    def test_fan_out_to_subscribers(self):
+        """Cada assinante recebe o mesmo evento, serializado uma vez"""
+        first = self.bus.subscribe("turma")
+        second = self.bus.subscribe("turma")
+        self.repository.save_student("turma", "S1", 60, 3, "ok")
+
+        events_first = first.next_events(timeout=0)
+        events_second = second.next_events(timeout=0)
+        self.assertEqual(len(events_first), 1)
+        self.assertIs(events_first[0][1], events_second[0][1])
+
+        event = json.loads(events_first[0][1])
+        self.assertEqual(event["type"], "update")
+        self.assertEqual(event["cursor"], self.repository.get_version("turma"))
+        self.assertEqual(event["student"]["inveniraStdID"], "S1")
+
+        self.repository.remove_student("turma", "S1")
+        self.assertEqual(json.loads(first.next_events(timeout=0)[0][1])["type"], "delete")
+
+    def test_slow_subscriber_catches_up_from_change_feed(self):
+        """Quem fica para trás do buffer recebe só o estado atual dos alterados"""
+        self.repository.save_student("turma", "S0", 1, 1, "")
+        subscription = self.bus.subscribe("turma")
+        for index in range(1, 6):
+            self.repository.save_student("turma", f"S{index}", 1, 1, "")
+        self.repository.remove_student("turma", "S0")
+
+        events = [json.loads(payload) for _, payload in subscription.next_events(timeout=0)]
+        self.assertEqual([e["student"]["inveniraStdID"] for e in events if e["type"] == "update"],
+                         ["S1", "S2", "S3", "S4", "S5"])
+        self.assertEqual([e["student_id"] for e in events if e["type"] == "delete"], ["S0"])
+        self.assertEqual(subscription.position, self.repository.get_version("turma"))
+
+        self.repository.save_student("turma", "S9", 1, 1, "")
+        self.assertEqual(json.loads(subscription.next_events(timeout=0)[0][1])["type"], "update")
+
+    def test_resync_without_history(self):
+        self.repository.save_student("turma", "S1", 1, 1, "")
+        subscription = self.bus.subscribe("turma", after=0)
+        resync = json.loads(subscription.next_events(timeout=0)[0][1])
+        self.assertEqual(resync["type"], "resync")
+        self.assertEqual(resync["cursor"], self.repository.get_version("turma"))
+
+    def test_channel_released_without_subscribers(self):
+        with self.bus.subscribe("turma"):
+            self.assertEqual(self.bus.subscriber_count("turma"), 1)
+        self.assertEqual(self.bus.subscriber_count("turma"), 0)
+        self.assertNotIn("turma", self.bus._channels)
+
+    def test_waiting_subscriber_is_woken(self):
+        subscription = self.bus.subscribe("turma")
+        timer = threading.Timer(0.05, self.repository.save_student, ("turma", "S1", 1, 1, ""))
+        timer.start()
+        self.addCleanup(timer.cancel)
+        self.assertEqual(len(subscription.next_events(timeout=5)), 1)
+
+    def test_iter_sse(self):
+        subscription = self.bus.subscribe("turma")
+        stream = iter_sse(subscription, heartbeat_seconds=0)
+        self.assertEqual(next(stream), "retry: 3000\n\n")
+        self.assertEqual(next(stream), ": keepalive\n\n")
+
+        self.repository.save_student("turma", "S1", 1, 1, "")
+        chunk = next(stream)
+        self.assertTrue(chunk.startswith(f"id: {self.repository.get_version('turma')}\ndata: "))
+        stream.close()
+        self.assertEqual(self.bus.subscriber_count("turma"), 0)
+
+
+class TestLongPollRoute(unittest.TestCase):
+    def setUp(self):
+        self.client = create_app().test_client()
+        self.repository = get_shared_repository()
+        self.repository.save_student("poll_activity", "S1", 10, 1, "")
+
+    def test_poll_returns_events_after_cursor(self):
+        cursor = self.repository.get_version("poll_activity")
+        self.repository.save_student("poll_activity", "S2", 20, 2, "")
+
+        response = self.client.get(f'/game/poll/poll_activity?after={cursor}&timeout=0')
+        result = response.get_json()
+        self.assertTrue(result["success"])
+        self.assertEqual(result["cursor"], self.repository.get_version("poll_activity"))
+        self.assertEqual([e["student"]["inveniraStdID"] for e in result["events"]], ["S2"])
+
+        empty = self.client.get(f'/game/poll/poll_activity?after={result["cursor"]}&timeout=0').get_json()
+        self.assertEqual(empty["events"], [])
+
+    def test_invalid_params(self):
+        self.assertEqual(self.client.get('/game/poll/poll_activity?after=x').status_code, 400)
+        self.assertEqual(self.client.get('/game/poll/poll_activity?timeout=x').status_code, 400)
+        self.assertEqual(self.client.get('/game/events/poll_activity?after=-1').status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+"""
+Testes para o cache de respostas do /analytics-data
+"""
+import json
+import unittest
+from app import create_app
+from app.facades.invenira_facade import InveniraFacade
+from app.services.response_cache import AnalyticsResponseCache, etag_matches
+
+
+class TestAnalyticsResponseCache(unittest.TestCase):
+    def test_hit_requires_same_version(self):
+        """Uma versão diferente é tratada como miss"""
+        cache = AnalyticsResponseCache(max_bytes=1024)
+        cache.put("a", 1, b"[1]")
+
+        self.assertIsNotNone(cache.get("a", 1))
+        self.assertIsNone(cache.get("a", 2))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_lru_eviction_by_bytes(self):
+        """Entradas menos usadas são despejadas ao exceder o orçamento"""
+        cache = AnalyticsResponseCache(max_bytes=10)
+        cache.put("a", 1, b"aaaa")
+        cache.put("b", 1, b"bbbb")
+        cache.get("a", 1)
+        cache.put("c", 1, b"cccc")
+
+        self.assertIsNotNone(cache.get("a", 1))
+        self.assertIsNone(cache.get("b", 1))
+        self.assertEqual(cache.current_bytes, 8)
+
+    def test_oversized_body_not_stored(self):
+        """Respostas maiores que o orçamento não ocupam o cache"""
+        cache = AnalyticsResponseCache(max_bytes=4)
+        entry = cache.put("a", 1, b"0123456789")
+
+        self.assertIsNotNone(entry.etag)
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.current_bytes, 0)
+
+    def test_etag_matches(self):
+        """If-None-Match aceita listas, ETags fracos e *"""
+        self.assertTrue(etag_matches('"x", "y"', '"y"'))
+        self.assertTrue(etag_matches('W/"y"', '"y"'))
+        self.assertTrue(etag_matches('*', '"y"'))
+        self.assertFalse(etag_matches(None, '"y"'))
+        self.assertFalse(etag_matches('"x"', '"y"'))
+
+
+class TestFacadeAnalyticsResponse(unittest.TestCase):
+    def setUp(self):
+        self.facade = InveniraFacade()
+        self.repository = self.facade.analytics.repository
+        if "cache_activity" in self.repository:
+            del self.repository["cache_activity"]
+        self.repository.save_student("cache_activity", "S1", 10, 1, "ok")
+        self.request = {"activityID": "cache_activity"}
+
+    def test_not_modified_with_current_etag(self):
+        """Cliente com o ETag atual recebe 304 sem corpo"""
+        status, body, etag = self.facade.get_analytics_response(self.request)
+        self.assertEqual(status, 200)
+        self.assertIn(b"S1", body)
+
+        status, body, same_etag = self.facade.get_analytics_response(self.request, etag)
+        self.assertEqual(status, 304)
+        self.assertEqual(body, b"")
+        self.assertEqual(same_etag, etag)
+
+    def test_write_invalidates_response(self):
+        """Uma escrita na atividade gera nova resposta e novo ETag"""
+        _, _, etag = self.facade.get_analytics_response(self.request)
+        self.repository.save_student("cache_activity", "S2", 20, 2, "ok")
+
+        status, body, new_etag = self.facade.get_analytics_response(self.request, etag)
+        self.assertEqual(status, 200)
+        self.assertIn(b"S2", body)
+        self.assertNotEqual(new_etag, etag)
+
+    def test_invalid_request(self):
+        """Requisição inválida retorna 400 sem ETag"""
+        status, body, etag = self.facade.get_analytics_response({})
+        self.assertEqual(status, 400)
+        self.assertIsNone(etag)
+
+
+class TestStreamingAnalyticsRoute(unittest.TestCase):
+    def setUp(self):
+        self.client = create_app().test_client()
+        self.request = {"activityID": "instancia_turma_A"}
+
+    def test_stream_matches_buffered_response(self):
+        """?stream=true envia o mesmo JSON em pedaços, sem ETag"""
+        buffered = self.client.post('/analytics-data', json=self.request)
+        streamed = self.client.post('/analytics-data?stream=true', json=self.request)
+
+        self.assertTrue(streamed.is_streamed)
+        self.assertNotIn('ETag', streamed.headers)
+        self.assertEqual(streamed.get_data(), buffered.get_data())
+
+    def test_ndjson(self):
+        """NDJSON por Accept ou ?format=ndjson"""
+        response = self.client.post(
+            '/analytics-data', json=self.request, headers={'Accept': 'application/x-ndjson'}
+        )
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        lines = response.get_data().splitlines()
+        self.assertEqual(json.loads(lines[0])["inveniraStdID"], "Student_Joao")
+        self.assertEqual(len(lines), 2)
+
+        invalid = self.client.post('/analytics-data?format=ndjson', json={})
+        self.assertEqual(invalid.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
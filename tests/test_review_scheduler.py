@@ -0,0 +1,172 @@
+"""
+Testes para o agendador de revisões espaçadas (SM-2) e o /game/entry
+"""
+import unittest
+from app import create_app
+from app.commands import CommandInvoker, RecordReviewCommand
+from app.services.review_scheduler import SECONDS_PER_DAY, ReviewScheduler, sm2
+
+DAY = SECONDS_PER_DAY
+
+
+class TestSm2(unittest.TestCase):
+    def test_intervals_grow_with_correct_answers(self):
+        """1 dia, 6 dias e depois intervalo * facilidade"""
+        interval, ease, reps = sm2(5, 0.0, 2.5, 0)
+        self.assertEqual((interval, reps), (1.0, 1))
+        interval, ease, reps = sm2(5, interval, ease, reps)
+        self.assertEqual((interval, reps), (6.0, 2))
+        interval, ease, reps = sm2(4, interval, ease, reps)
+        self.assertEqual(interval, round(6.0 * 2.7))
+
+    def test_lapse_restarts_sequence(self):
+        interval, ease, reps = sm2(1, 15.0, 2.6, 3)
+        self.assertEqual((interval, ease, reps), (1.0, 2.6, 0))
+
+    def test_ease_has_floor(self):
+        ease = 2.5
+        for _ in range(20):
+            _, ease, _ = sm2(3, 1.0, ease, 0)
+        self.assertAlmostEqual(ease, 1.3)
+
+
+class TestReviewScheduler(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = ReviewScheduler()
+        self.scheduler.add_words("turma", ["Hund", "Katze", "Maus", "Vogel"])
+
+    def words(self, cards):
+        return [card["word"] for card in cards]
+
+    def test_new_student_gets_new_words_in_deck_order(self):
+        cards = self.scheduler.due_cards("turma", "S1", limit=3, now=0)
+        self.assertEqual(self.words(cards), ["Hund", "Katze", "Maus"])
+        self.assertTrue(all(card["new"] for card in cards))
+
+    def test_duplicate_words_are_ignored(self):
+        self.assertEqual(self.scheduler.add_words("turma", ["Hund", "Fisch"]), 1)
+        self.assertEqual(self.scheduler.deck_size("turma"), 5)
+
+    def test_deck_versions_loaded_once(self):
+        """Cada content_hash é carregado uma vez; um deck recompilado acrescenta o que falta"""
+        self.assertEqual(self.scheduler.load_deck("turma", "v1", ["Hund", "Fisch"]), 1)
+        self.assertEqual(self.scheduler.load_deck("turma", "v1", ["Hund", "Fisch", "Pferd"]), 0)
+        self.assertEqual(self.scheduler.load_deck("turma", "v2", ["Hund", "Fisch", "Pferd"]), 1)
+        self.assertEqual(self.scheduler.deck_size("turma"), 6)
+
+    def test_reviewed_word_leaves_until_due(self):
+        self.scheduler.review("turma", "S1", "Katze", 5, now=100)
+        self.assertEqual(self.words(self.scheduler.due_cards("turma", "S1", now=100)), ["Hund", "Maus", "Vogel"])
+
+        due = self.scheduler.due_cards("turma", "S1", now=100 + DAY)
+        self.assertEqual(self.words(due), ["Katze", "Hund", "Maus", "Vogel"])
+        self.assertFalse(due[0]["new"])
+
+    def test_due_reviews_ordered_oldest_first(self):
+        self.scheduler.review("turma", "S1", "Maus", 5, now=300)
+        self.scheduler.review("turma", "S1", "Hund", 5, now=100)
+        self.scheduler.review("turma", "S1", "Katze", 5, now=200)
+        due = self.scheduler.due_cards("turma", "S1", limit=3, now=10 * DAY, include_new=False)
+        self.assertEqual(self.words(due), ["Hund", "Katze", "Maus"])
+
+    def test_students_are_independent(self):
+        self.scheduler.review("turma", "S1", "Hund", 5, now=0)
+        self.assertEqual(self.words(self.scheduler.due_cards("turma", "S2", limit=1, now=0)), ["Hund"])
+
+    def test_rescheduled_card_is_not_duplicated(self):
+        """Entradas antigas do heap de uma carta revista são ignoradas"""
+        self.scheduler.review("turma", "S1", "Hund", 5, now=0)
+        card = self.scheduler.review("turma", "S1", "Hund", 5, now=DAY)
+        self.assertEqual(card["interval"], 6.0)
+        due = self.scheduler.due_cards("turma", "S1", now=7 * DAY + 1, include_new=False)
+        self.assertEqual(self.words(due), ["Hund"])
+
+    def test_card_reviewed_twice_in_same_second_is_listed_once(self):
+        """Revisões no mesmo segundo deixam chaves iguais no heap, devolvidas uma só vez"""
+        self.scheduler.review("turma", "S1", "Hund", 1, now=0.2)
+        self.scheduler.review("turma", "S1", "Hund", 1, now=0.7)
+        for _ in range(2):
+            due = self.scheduler.due_cards("turma", "S1", now=2 * DAY, include_new=False)
+            self.assertEqual(self.words(due), ["Hund"])
+            self.assertEqual(due[0]["due"], DAY + 0.7)
+        self.assertEqual(len(self.scheduler._activities["turma"].students["S1"].heap), 1)
+
+    def test_heap_is_rebuilt_when_mostly_stale(self):
+        for step in range(200):
+            self.scheduler.review("turma", "S1", "Hund", 5, now=step)
+        cards = self.scheduler._activities["turma"].students["S1"]
+        self.assertLess(len(cards.heap), 2 * cards.introduced + 65)
+
+    def test_lapse_counted(self):
+        self.scheduler.review("turma", "S1", "Hund", 5, now=0)
+        card = self.scheduler.review("turma", "S1", "Hund", 1, now=DAY)
+        self.assertEqual((card["lapses"], card["reps"], card["interval"]), (1, 0, 1.0))
+
+    def test_unknown_word_or_activity(self):
+        self.assertIsNone(self.scheduler.review("turma", "S1", "Elefant", 5))
+        self.assertIsNone(self.scheduler.review("outra", "S1", "Hund", 5))
+        self.assertEqual(self.scheduler.due_cards("outra", "S1"), [])
+
+    def test_card_count(self):
+        self.scheduler.review("turma", "S1", "Hund", 5, now=0)
+        self.scheduler.review("turma", "S1", "Hund", 5, now=DAY)
+        self.scheduler.review("turma", "S2", "Katze", 4, now=0)
+        self.assertEqual(self.scheduler.card_count(), 2)
+
+
+class TestRecordReviewCommand(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = ReviewScheduler()
+        self.scheduler.add_words("turma", ["Hund"])
+        self.invoker = CommandInvoker()
+
+    def test_review_through_invoker(self):
+        result = self.invoker.execute_command(RecordReviewCommand(self.scheduler, "turma", "S1", "Hund", 4, 0))
+        self.assertTrue(result["success"])
+        self.assertEqual(result["card"]["due"], DAY)
+        self.assertEqual(len(self.invoker.get_history()), 1)
+
+    def test_invalid_quality(self):
+        for quality in (6, -1, "5", None, True):
+            result = RecordReviewCommand(self.scheduler, "turma", "S1", "Hund", quality).execute()
+            self.assertFalse(result["success"])
+
+    def test_word_not_in_deck(self):
+        result = RecordReviewCommand(self.scheduler, "turma", "S1", "Katze", 4).execute()
+        self.assertEqual(result["message"], "Word not found in deck")
+
+
+class TestGameEntryRoutes(unittest.TestCase):
+    def setUp(self):
+        self.client = create_app().test_client()
+
+    def test_entry_requires_ids(self):
+        response = self.client.get("/game/entry?activity_id=turma_entry")
+        self.assertEqual(response.status_code, 400)
+
+    def test_entry_and_review_flow(self):
+        response = self.client.post("/game/entry", json={
+            "activity_id": "turma_entry", "student_id": "S1", "words": ["Hund", "Katze"], "limit": 5
+        })
+        data = response.get_json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([card["word"] for card in data["cards"]], ["Hund", "Katze"])
+
+        response = self.client.post("/game/review", json={
+            "activity_id": "turma_entry", "student_id": "S1", "word": "Hund", "quality": 5
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["card"]["reps"], 1)
+
+        data = self.client.get("/game/entry?activity_id=turma_entry&student_id=S1").get_json()
+        self.assertEqual([card["word"] for card in data["cards"]], ["Katze"])
+
+    def test_review_unknown_word(self):
+        response = self.client.post("/game/review", json={
+            "activity_id": "turma_entry", "student_id": "S1", "word": "Elefant", "quality": 5
+        })
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
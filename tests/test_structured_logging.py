@@ -0,0 +1,105 @@
+"""
+Testes para o log estruturado assíncrono
+"""
+import contextlib
+import io
+import json
+import logging
+import queue
+import threading
+import unittest
+from app.facades.invenira_facade import InveniraFacade
+from app.services.structured_logging import (
+    AsyncLogPipeline,
+    JsonFormatter,
+    NonBlockingQueueHandler,
+    RateLimitFilter,
+    SamplingFilter,
+    get_logger,
+    parse_sample_rates
+)
+
+
+def make_record(event, level=logging.INFO, fields=None):
+    record = logging.LogRecord("wordmemorizer.test", level, __file__, 1, event, None, None)
+    if fields is not None:
+        record.fields = fields
+    return record
+
+
+class CapturingHandler(logging.Handler):
+    """Guarda as linhas formatadas e a thread onde a formatação ocorreu"""
+
+    def __init__(self):
+        super().__init__()
+        self.setFormatter(JsonFormatter())
+        self.lines = []
+        self.threads = set()
+
+    def emit(self, record):
+        self.lines.append(json.loads(self.format(record)))
+        self.threads.add(threading.current_thread().name)
+
+
+class TestFilters(unittest.TestCase):
+    def test_json_formatter(self):
+        line = json.loads(JsonFormatter().format(make_record("analytics_request", fields={"activity_id": "A"})))
+        self.assertEqual(line["event"], "analytics_request")
+        self.assertEqual(line["level"], "INFO")
+        self.assertEqual(line["activity_id"], "A")
+
+    def test_sampling_keeps_one_in_n_and_all_warnings(self):
+        sampling = SamplingFilter({"noisy": 0.25})
+        kept = sum(sampling.filter(make_record("noisy")) for _ in range(100))
+        self.assertEqual(kept, 25)
+        self.assertTrue(all(sampling.filter(make_record("noisy", logging.WARNING)) for _ in range(10)))
+        self.assertTrue(all(sampling.filter(make_record("other")) for _ in range(10)))
+
+    def test_rate_limit_reports_suppressed(self):
+        now = [0.0]
+        limiter = RateLimitFilter(2, clock=lambda: now[0])
+        results = [limiter.filter(make_record("burst")) for _ in range(5)]
+        self.assertEqual(results, [True, True, False, False, False])
+
+        now[0] = 1.5
+        record = make_record("burst")
+        self.assertTrue(limiter.filter(record))
+        self.assertEqual(record.fields["suppressed"], 3)
+
+    def test_parse_sample_rates(self):
+        self.assertEqual(parse_sample_rates("a:0.5, b:1"), {"a": 0.5, "b": 1.0})
+        with self.assertRaises(ValueError):
+            parse_sample_rates("a:2")
+
+
+class TestAsyncLogPipeline(unittest.TestCase):
+    def test_records_are_formatted_on_listener_thread(self):
+        handler = CapturingHandler()
+        pipeline = AsyncLogPipeline(handlers=[handler]).start()
+        get_logger("test").info("event_one", extra={"fields": {"n": 1}})
+        pipeline.stop()
+
+        self.assertEqual([line["event"] for line in handler.lines], ["event_one"])
+        self.assertNotIn(threading.current_thread().name, handler.threads)
+
+    def test_full_queue_drops_without_blocking(self):
+        handler = NonBlockingQueueHandler(queue.Queue(1))
+        handler.handle(make_record("a"))
+        handler.handle(make_record("b"))
+        self.assertEqual(handler.dropped, 1)
+
+    def test_facade_logs_instead_of_printing(self):
+        handler = CapturingHandler()
+        pipeline = AsyncLogPipeline(handlers=[handler]).start()
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            InveniraFacade().handle_analytics_request({"activityID": "log_activity"})
+        pipeline.stop()
+
+        self.assertEqual(stdout.getvalue(), "")
+        self.assertIn({"event": "analytics_request", "activity_id": "log_activity"},
+                      [{"event": line["event"], "activity_id": line.get("activity_id")} for line in handler.lines])
+
+
+if __name__ == '__main__':
+    unittest.main()
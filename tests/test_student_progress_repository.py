@@ -0,0 +1,263 @@
+"""
+Testes para os motores de armazenamento do progresso dos estudantes
+
+Os mesmos cenários são executados sobre os motores em memória, colunar e SQLite.
+"""
+import os
+import tempfile
+import unittest
+from app.repositories import (
+    StudentProgressRepository,
+    SQLiteStudentRepository,
+    ColumnarStudentRepository,
+    StudentQuery
+)
+from app.repositories.student_query import decode_cursor
+
+INITIAL_DATA = {
+    "turma": [
+        {"student_id": "S1", "time": 10, "words": 1, "note": "A"},
+        {"student_id": "S2", "time": 20, "words": 2, "note": "B"}
+    ]
+}
+
+
+class RepositoryContract:
+    """Cenários comuns a todos os motores"""
+
+    def create_repository(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.repository = self.create_repository()
+        self.repository.seed(INITIAL_DATA)
+
+    def test_save_updates_in_place_keeping_order(self):
+        """Atualizar um aluno existente não muda sua posição"""
+        self.repository.save_student("turma", "S1", 99, 9, "Z")
+        self.repository.save_student("turma", "S3", 30, 3, "C")
+
+        ids = [s["student_id"] for s in self.repository.list_students("turma")]
+        self.assertEqual(ids, ["S1", "S2", "S3"])
+        self.assertEqual(self.repository.get_student("turma", "S1")["time"], 99)
+
+    def test_iter_students_in_batches(self):
+        """A leitura em lotes percorre a turma na ordem de inserção"""
+        for index in range(3, 8):
+            self.repository.save_student("turma", f"S{index}", index, index, "")
+        ids = [s["student_id"] for s in self.repository.iter_students("turma", batch_size=2)]
+        self.assertEqual(ids, [f"S{index}" for index in range(1, 8)])
+        self.assertEqual(list(self.repository.iter_students("nada")), [])
+
+    def page_ids(self, **kwargs):
+        records, cursor = self.repository.query_students("turma", StudentQuery(**kwargs))
+        return [record["student_id"] for record in records], cursor
+
+    def test_query_pages_follow_cursor(self):
+        """Páginas ordenadas por palavras (decrescente) seguem o cursor sem repetir"""
+        for index in range(3, 9):
+            self.repository.save_student("turma", f"S{index}", index * 10, index % 4, "")
+
+        seen = []
+        cursor = None
+        while True:
+            ids, cursor = self.page_ids(
+                limit=3, sort="words", descending=True,
+                cursor=decode_cursor(cursor) if cursor else None
+            )
+            seen.extend(ids)
+            if cursor is None:
+                break
+        # Ordem decrescente exata de (words, ordem de inserção)
+        self.assertEqual(seen, ["S7", "S3", "S6", "S2", "S5", "S1", "S8", "S4"])
+
+    def test_query_filters(self):
+        """Filtros por faixa e por conjunto de IDs"""
+        self.repository.save_student("turma", "S3", 30, 3, "C")
+        ids, cursor = self.page_ids(ranges={"time": (15, None)}, sort="time")
+        self.assertEqual(ids, ["S2", "S3"])
+        self.assertIsNone(cursor)
+
+        ids, _ = self.page_ids(student_ids=["S3", "S1", "X"], ranges={"words": (None, 2)})
+        self.assertEqual(ids, ["S1"])
+
+    def test_query_index_follows_writes(self):
+        """O índice acompanha atualizações, remoções e novas inserções"""
+        self.page_ids(sort="time")
+        self.repository.increment_student("turma", "S1", 100, 0)
+        self.repository.remove_student("turma", "S2")
+        self.repository.save_student("turma", "S3", 50, 3, "C")
+
+        ids, _ = self.page_ids(sort="time", descending=True)
+        self.assertEqual(ids, ["S1", "S3"])
+        self.assertEqual(self.page_ids()[0], ["S1", "S3"])
+
+    def test_changes_since_returns_only_changes_and_tombstones(self):
+        """O feed retorna só o que mudou depois do cursor"""
+        cursor = self.repository.changes_since("turma", 0).cursor
+        self.repository.increment_student("turma", "S2", 5, 1)
+        self.repository.save_student("turma", "S3", 30, 3, "C")
+        self.repository.remove_student("turma", "S1")
+
+        changes = self.repository.changes_since("turma", cursor)
+        self.assertFalse(changes.full)
+        self.assertEqual([r["student_id"] for r in changes.records], ["S2", "S3"])
+        self.assertEqual(changes.deleted, ["S1"])
+        self.assertEqual(changes.cursor, self.repository.get_version("turma"))
+
+        unchanged = self.repository.changes_since("turma", changes.cursor)
+        self.assertEqual((unchanged.records, unchanged.deleted), ([], []))
+
+    def test_changes_since_requires_full_resync(self):
+        """Cursor inicial, de antes da remoção da atividade ou do futuro: turma inteira"""
+        self.assertTrue(self.repository.changes_since("turma", 0).full)
+
+        cursor = self.repository.changes_since("turma", 0).cursor
+        del self.repository["turma"]
+        self.repository.save_student("turma", "S9", 1, 1, "")
+        changes = self.repository.changes_since("turma", cursor)
+        self.assertTrue(changes.full)
+        self.assertEqual([r["student_id"] for r in changes.records], ["S9"])
+
+        self.assertTrue(self.repository.changes_since("turma", changes.cursor + 100).full)
+
+    def test_increment_student(self):
+        """Incremento soma aos totais existentes"""
+        record = self.repository.increment_student("turma", "S2", 5, 1)
+        self.assertEqual(record["time"], 25)
+        self.assertEqual(record["words"], 3)
+
+    def test_increment_missing_student(self):
+        """Incremento em aluno inexistente retorna None"""
+        self.assertIsNone(self.repository.increment_student("turma", "X", 1, 1))
+
+    def test_remove_and_restore(self):
+        """Remoção seguida de restauração reinsere o registro"""
+        removed = self.repository.remove_student("turma", "S1")
+        self.assertEqual(removed["student_id"], "S1")
+        self.assertEqual(len(self.repository["turma"]), 1)
+
+        self.assertTrue(self.repository.restore_student("turma", removed))
+        self.assertIsNotNone(self.repository.get_student("turma", "S1"))
+
+    def test_activity_survives_last_removal(self):
+        """A atividade continua existindo mesmo sem alunos"""
+        self.repository.remove_student("turma", "S1")
+        self.repository.remove_student("turma", "S2")
+        self.assertIn("turma", self.repository)
+        self.assertEqual(len(self.repository["turma"]), 0)
+
+    def test_delete_activity(self):
+        """del remove a atividade inteira"""
+        del self.repository["turma"]
+        self.assertNotIn("turma", self.repository)
+        self.assertEqual(self.repository.list_students("turma"), [])
+
+    def test_writes_bump_version_and_notify(self):
+        """Cada escrita incrementa a versão e notifica os listeners"""
+        changes = []
+        self.repository.add_change_listener(lambda a, s: changes.append((a, s)))
+        before = self.repository.get_version("turma")
+
+        self.repository.increment_student("turma", "S1", 1, 1)
+        self.repository.remove_student("turma", "S2")
+
+        self.assertEqual(self.repository.get_version("turma"), before + 2)
+        self.assertEqual(changes, [("turma", "S1"), ("turma", "S2")])
+        self.assertEqual(self.repository.get_version("outra"), 0)
+
+    def test_version_never_goes_back_after_delete(self):
+        """Remover a atividade não reinicia a versão"""
+        before = self.repository.get_version("turma")
+        del self.repository["turma"]
+        self.repository.save_student("turma", "S1", 1, 1, "x")
+        self.assertGreater(self.repository.get_version("turma"), before + 1)
+
+
+class TestMemoryRepository(RepositoryContract, unittest.TestCase):
+    def create_repository(self):
+        return StudentProgressRepository()
+
+
+class TestColumnarRepository(RepositoryContract, unittest.TestCase):
+    def create_repository(self):
+        return ColumnarStudentRepository()
+
+    def test_notes_survive_compaction(self):
+        """Remoções em massa compactam a tabela sem perder notas nem ordem"""
+        for index in range(200):
+            self.repository.save_student("turma", f"X{index}", index, 0, f"nota {index}")
+        for index in range(0, 200, 2):
+            self.repository.remove_student("turma", f"X{index}")
+        self.repository.save_student("turma", "S1", 10, 1, None)
+
+        students = self.repository.list_students("turma")
+        self.assertEqual([s["student_id"] for s in students[:3]], ["S1", "S2", "X1"])
+        self.assertIsNone(students[0]["note"])
+        self.assertEqual(self.repository.get_student("turma", "X199")["note"], "nota 199")
+
+
+class TestSQLiteRepository(RepositoryContract, unittest.TestCase):
+    def create_repository(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        repository = SQLiteStudentRepository(os.path.join(self.tmpdir.name, "test.db"))
+        self.addCleanup(repository.close)
+        return repository
+
+    def test_data_persists_across_instances(self):
+        """Uma nova instância (ex.: outro worker) enxerga os dados salvos"""
+        self.repository.save_student("turma", "S3", 30, 3, "C")
+        other = SQLiteStudentRepository(self.repository.db_path)
+        self.addCleanup(other.close)
+        self.assertEqual(other.get_student("turma", "S3")["words"], 3)
+
+    def test_migrates_database_without_change_feed(self):
+        """Bancos criados antes do feed de mudanças ganham as colunas novas"""
+        import sqlite3
+        path = os.path.join(self.tmpdir.name, "old.db")
+        conn = sqlite3.connect(path)
+        conn.executescript("""
+            CREATE TABLE students (id INTEGER PRIMARY KEY AUTOINCREMENT, activity_id TEXT NOT NULL,
+                student_id TEXT NOT NULL, time INTEGER NOT NULL, words INTEGER NOT NULL, note TEXT NOT NULL);
+            CREATE TABLE activity_versions (activity_id TEXT PRIMARY KEY, version INTEGER NOT NULL);
+        """)
+        conn.close()
+
+        repository = SQLiteStudentRepository(path)
+        self.addCleanup(repository.close)
+        repository.save_student("turma", "S1", 1, 1, "")
+        self.assertEqual(repository.changes_since("turma", 0).records[0]["student_id"], "S1")
+
+    def test_transaction_rollback(self):
+        """Uma exceção dentro da transação não deixa escritas parciais"""
+        with self.assertRaises(RuntimeError):
+            with self.repository.transaction():
+                self.repository.save_student("turma", "S9", 1, 1, "x")
+                raise RuntimeError("falha")
+        self.assertIsNone(self.repository.get_student("turma", "S9"))
+
+    def test_listeners_notified_after_commit(self):
+        """Listeners só são chamados após o COMMIT e nunca para escritas desfeitas"""
+        other = SQLiteStudentRepository(self.repository.db_path)
+        self.addCleanup(other.close)
+        seen = []
+        self.repository.add_change_listener(
+            lambda activity_id, student_id: seen.append(other.get_student(activity_id, student_id))
+        )
+
+        with self.repository.transaction():
+            self.repository.save_student("turma", "S7", 7, 7, "")
+            self.repository.increment_student("turma", "S7", 1, 1)
+            self.assertEqual(seen, [])
+        self.assertEqual([record["words"] for record in seen], [8, 8])
+
+        with self.assertRaises(RuntimeError):
+            with self.repository.transaction():
+                self.repository.save_student("turma", "S8", 1, 1, "")
+                raise RuntimeError("falha")
+        self.assertEqual(len(seen), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+"""
+Testes para a agregação de atualizações de pontuação
+"""
+import time
+import unittest
+from app.commands import CommandInvoker, ScoreUpdateCoalescer
+from app.repositories import StudentProgressRepository
+from app.services.analytics_service import AnalyticsService
+
+
+class TestScoreUpdateCoalescer(unittest.TestCase):
+    def setUp(self):
+        self.repository = StudentProgressRepository()
+        self.repository.save_student("turma", "S1", 100, 10, "")
+        self.service = AnalyticsService(self.repository)
+        self.invoker = CommandInvoker()
+
+    def create_coalescer(self, **kwargs):
+        coalescer = ScoreUpdateCoalescer(self.service, self.invoker, **kwargs)
+        self.addCleanup(coalescer.stop)
+        return coalescer
+
+    def test_running_totals_include_pending_deltas(self):
+        """Os totais retornados somam o valor gravado e os deltas pendentes"""
+        coalescer = self.create_coalescer(window_seconds=60, max_pending_updates=100)
+
+        coalescer.submit("turma", "S1", 1, 5)
+        result = coalescer.submit("turma", "S1", 2, 5)
+
+        self.assertEqual(result["new_totals"], {"time": 110, "words": 13})
+        # Nada foi gravado ainda
+        self.assertEqual(self.repository.get_student("turma", "S1")["words"], 10)
+
+    def test_rejected_delta_is_not_left_pending(self):
+        """Um delta inválido é recusado sem deixar o outro delta pendente"""
+        coalescer = self.create_coalescer(window_seconds=60, max_pending_updates=100)
+
+        result = coalescer.submit("turma", "S1", "x", 5)
+        self.assertFalse(result["success"])
+        self.assertFalse(coalescer.has_pending())
+
+        coalescer.flush_all()
+        student = self.repository.get_student("turma", "S1")
+        self.assertEqual((student["time"], student["words"]), (100, 10))
+
+    def test_count_threshold_applies_single_write(self):
+        """Ao atingir o limite, os deltas são gravados numa única escrita"""
+        coalescer = self.create_coalescer(window_seconds=60, max_pending_updates=5)
+
+        for _ in range(5):
+            coalescer.submit("turma", "S1", 1, 1)
+
+        self.assertEqual(self.repository.get_student("turma", "S1")["words"], 15)
+        self.assertEqual(coalescer.writes_applied, 1)
+        self.assertEqual(len(self.invoker.get_history()), 1)
+
+    def test_time_window_flush(self):
+        """A thread de flush grava os deltas após a janela"""
+        coalescer = self.create_coalescer(window_seconds=0.05, max_pending_updates=100)
+        coalescer.submit("turma", "S1", 3, 0)
+
+        deadline = time.monotonic() + 2
+        while coalescer.has_pending() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(self.repository.get_student("turma", "S1")["words"], 13)
+
+    def test_totals_continue_after_flush(self):
+        """Novas pendências partem dos totais já gravados"""
+        coalescer = self.create_coalescer(window_seconds=60, max_pending_updates=100)
+        coalescer.submit("turma", "S1", 5, 0)
+        coalescer.flush_activity("turma")
+
+        result = coalescer.submit("turma", "S1", 1, 0)
+        self.assertEqual(result["new_totals"]["words"], 16)
+
+    def test_unknown_student(self):
+        """Aluno ou atividade inexistente falha imediatamente"""
+        coalescer = self.create_coalescer()
+        self.assertEqual(coalescer.submit("turma", "X", 1, 1)["message"], "Student not found")
+        self.assertEqual(coalescer.submit("nada", "X", 1, 1)["message"], "Activity not found")
+        self.assertFalse(coalescer.has_pending())
+
+
+if __name__ == '__main__':
+    unittest.main()